@@ -0,0 +1,96 @@
+"""Importar e exportar 100 mil poderes.
+
+Gera um arquivo com --rows poderes (uma parte sem campos obrigatórios ou
+com imagem inválida, que a importação ignora), importa num banco
+temporário como o $import faz, numa transação, e exporta de volta nos três
+formatos. Também mede quanto a validação custa por linha.
+
+    python -m bench.bulk_import --rows 100000 --format jsonl
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import random
+import tempfile
+import time
+
+import bulk
+from bench.common import print_table, timed
+from database import Database
+from migrations import migrate
+
+
+def records(count):
+    generator = random.Random(0)
+    for index in range(count):
+        record = {
+            'name': f'Poder {index}',
+            'description': 'Descrição ' * generator.randint(1, 20),
+            'advantage': 'Vantagem',
+            'disadvantage': 'Desvantagem',
+            'image': f'https://example.com/powers/{index}.png' if index % 2 else '',
+            'creator_id': 1000 + index % 50,
+        }
+        # 1 em cada 100 é inválido: metade sem desvantagem, metade com imagem ruim
+        if index % 100 == 0:
+            record['disadvantage'] = ''
+        elif index % 100 == 50:
+            record['image'] = 'não é uma url'
+        yield record
+
+
+def write_file(path, fmt, count):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        if fmt == 'csv':
+            writer = csv.DictWriter(f, fieldnames=bulk.KINDS['powers'])
+            writer.writeheader()
+            writer.writerows(records(count))
+        elif fmt == 'json':
+            json.dump(list(records(count)), f, ensure_ascii=False)
+        else:
+            for record in records(count):
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--format', choices=bulk.FORMATS, default='jsonl')
+    args = parser.parse_args()
+
+    record = next(records(2))
+    record['image'] = 'https://example.com/powers/1.png'
+    print(f"validação: {timed(lambda: bulk._valid(record, 'powers'), 100_000) * 1e6:.2f} µs por linha com imagem")
+
+    async def run(directory):
+        source = os.path.join(directory, f'import.{args.format}')
+        write_file(source, args.format, args.rows)
+        db = Database(os.path.join(directory, 'bench.db'))
+        await db.open()
+        await db.run(migrate)
+        try:
+            start = time.perf_counter()
+            imported, ignored = await db.transaction(bulk.import_file, 'powers', source, 1, 1)
+            rows = [{'step': f'import {args.format}', 'rows': imported, 'ignored': ignored,
+                     'seconds': time.perf_counter() - start}]
+            for fmt in bulk.FORMATS:
+                start = time.perf_counter()
+                count = await bulk.export_file(db, 'powers', fmt, 1, os.path.join(directory, f'export.{fmt}'))
+                rows.append({'step': f'export {fmt}', 'rows': count, 'ignored': 0,
+                             'seconds': time.perf_counter() - start})
+        finally:
+            db.close()
+        for row in rows:
+            row['per_second'] = row['rows'] / row['seconds']
+        print_table(rows, [('etapa', 'step'), ('linhas', 'rows'), ('ignoradas', 'ignored'),
+                           ('segundos', 'seconds'), ('linhas/s', 'per_second')])
+
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(run(directory))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""CPU por card no $getpower e por página do $listpowers.
+
+Mede o trabalho do bot para cada card enviado: montar o embed e gerar o
+payload que o discord.py manda para a API, o mesmo
+handle_message_parameters que o send e o edit_message usam. Dois padrões:
+$getpower repetido num conjunto de poderes populares (Zipf) e vários
+usuários folheando as mesmas páginas do $listpowers. Montar o embed é
+cerca de um terço de um total de poucos microssegundos por card, pouco
+demais para justificar um cache de embeds com versão por linha.
+
+    python -m bench.cards --powers 1000 --getpower 50000 --readers 20 --pages 200
+"""
+
+import argparse
+import random
+import time
+
+from discord.http import handle_message_parameters
+
+from bench.common import print_table
+from cards import power_card
+
+
+def rows(count):
+    generator = random.Random(0)
+    return [(index, f"Poder {index}", "Descrição longa do poder. " * generator.randint(5, 40),
+             "Vantagem " * generator.randint(1, 10), "Desvantagem " * generator.randint(1, 10),
+             f"https://example.com/powers/{index}.png" if index % 2 else None)
+            for index in range(count)]
+
+
+def measure(render, sequence, payload=True):
+    start = time.perf_counter()
+    for row in sequence:
+        embed = render(row)
+        if payload:
+            handle_message_parameters(embed=embed)
+    return (time.perf_counter() - start) / len(sequence)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--powers', type=int, default=1000)
+    parser.add_argument('--getpower', type=int, default=50_000)
+    parser.add_argument('--readers', type=int, default=20)
+    parser.add_argument('--pages', type=int, default=200)
+    args = parser.parse_args()
+
+    powers = rows(args.powers)
+    generator = random.Random(1)
+    weights = [1 / (rank + 1) for rank in range(args.powers)]
+    workloads = {
+        '$getpower': generator.choices(powers, weights, k=args.getpower),
+        'página do $listpowers': powers[:args.pages] * args.readers,
+    }
+    results = []
+    for name, sequence in workloads.items():
+        build = measure(power_card, sequence, payload=False)
+        total = measure(power_card, sequence)
+        results.append({'workload': name, 'cards': len(sequence), 'build_us': build * 1e6,
+                        'payload_us': (total - build) * 1e6, 'total_us': total * 1e6, 'share': build / total})
+    print_table(results, [('comando', 'workload'), ('cards', 'cards'), ('montar embed µs', 'build_us'),
+                          ('gerar payload µs', 'payload_us'), ('total µs', 'total_us'), ('fração do embed', 'share')])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""Utilitários compartilhados pelos benchmarks.
+
+Os benchmarks rodam a partir da raiz do repositório, como módulos:
+
+    python -m bench.metrics_overhead
+
+Os que comparam variantes do bot (ex.: com e sem métricas) rodam cada
+variante num processo novo, com um banco temporário próprio, porque o
+bot.py só pode ser importado uma vez por processo.
+"""
+
+import asyncio
+import json
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import replay
+
+
+def percentile(values, q):
+    """Percentil q (0 a 1) de uma lista já ordenada."""
+    return values[max(math.ceil(q * len(values)) - 1, 0)]
+
+
+def timed(fn, repeat):
+    """Segundos por chamada de fn(), na média de `repeat` chamadas."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+async def timed_async(fn, repeat):
+    """Como timed, para uma função que retorna uma corrotina."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        await fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def summarize(results):
+    """Resume o retorno de replay.replay num dicionário serializável em JSON."""
+    latencies, failures, errors, sends, http_calls, duration = results
+    values = sorted(value for per_command in latencies.values() for value in per_command)
+    return {
+        'commands': len(values),
+        'seconds': duration,
+        'throughput': len(values) / duration,
+        'p50_ms': percentile(values, 0.5) * 1000,
+        'p99_ms': percentile(values, 0.99) * 1000,
+        'failures': sum(failures.values()),
+        'errors': sum(errors.values()),
+        'sends': dict(sends),
+        'http_calls': sum(http_calls.values()),
+    }
+
+
+def run_replay(entries, concurrency=10, prepare=None, db=None):
+    """Roda o trace no bot deste processo, num banco temporário; retorna o resumo.
+
+    prepare(lass), se informado, roda depois do setup_hook e antes do trace,
+    para a variante ajustar o bot (desligar métricas, trocar o banco etc.).
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, 'bench.db')
+        if db:
+            with open(db, 'rb') as source, open(db_path, 'wb') as target:
+                target.write(source.read())
+        lass = replay.load_bot(db_path)
+
+        async def main():
+            setup = [entry for entry in entries if entry.get('setup')]
+            measured = [entry for entry in entries if not entry.get('setup')]
+            # O replay roda o setup_hook; as entradas de setup vão junto, só os
+            # comandos medidos ficam para depois do prepare
+            await replay.replay(lass, setup, concurrency)
+            if prepare:
+                await prepare(lass)
+            return summarize(await replay.replay(lass, measured, concurrency, setup_hook=False))
+
+        try:
+            return asyncio.run(main())
+        finally:
+            lass.db.close()
+
+
+def run_variants(module, variants, *args, rounds=3):
+    """Roda `python -m module --variant V ...` para cada variante; retorna {variante: resumo}.
+
+    As variantes se alternam por `rounds` rodadas e fica a de maior vazão de
+    cada uma, para o ruído da máquina pesar igual nas duas.
+    """
+    results = {}
+    for _ in range(rounds):
+        for variant in variants:
+            output = subprocess.run([sys.executable, '-m', module, '--variant', variant, *map(str, args)],
+                                    check=True, capture_output=True, text=True).stdout
+            result = json.loads(output.splitlines()[-1])
+            if variant not in results or result['throughput'] > results[variant]['throughput']:
+                results[variant] = result
+    return results
+
+
+def print_table(rows, columns):
+    """Imprime uma tabela simples: rows é uma lista de dicionários."""
+    widths = [max(len(str(name)), *(len(_format(row[key])) for row in rows)) for name, key in columns]
+    print('  '.join(f"{name:>{width}}" for (name, _), width in zip(columns, widths)))
+    for row in rows:
+        print('  '.join(f"{_format(row[key]):>{width}}" for (_, key), width in zip(columns, widths)))
+
+
+def _format(value):
+    return f"{value:.3f}" if isinstance(value, float) else str(value)
@@ -0,0 +1,72 @@
+"""Custo do $dado de 10^3 a 10^7 dados, com e sem numpy.
+
+Para cada tamanho mede o tempo da rolagem e o maior atraso do event loop
+enquanto ela roda numa thread (como no $dado): sem numpy a geração é
+Python puro e segura o GIL, então o loop fica parado junto. O limite de
+dados do dice.py é ignorado aqui para medir também os tamanhos que ele
+recusa.
+
+    python -m bench.dice_throughput --sides 20 --max-exponent 7
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+import dice
+from bench.common import print_table
+
+
+async def stall(expression, rng):
+    """Segundos da rolagem numa thread e o maior atraso de um sleep de 1 ms no loop."""
+    worst = 0.0
+    done = False
+
+    async def heartbeat():
+        nonlocal worst
+        while not done:
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            worst = max(worst, time.perf_counter() - start - 0.001)
+
+    beat = asyncio.create_task(heartbeat())
+    start = time.perf_counter()
+    await asyncio.to_thread(dice.roll, expression, rng)
+    seconds = time.perf_counter() - start
+    done = True
+    await beat
+    return seconds, worst
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sides', type=int, default=20)
+    parser.add_argument('--max-exponent', type=int, default=7)
+    args = parser.parse_args()
+
+    backends = [('python', None)]
+    if dice.np is not None:
+        backends.insert(0, ('numpy', dice.np))
+    else:
+        print("numpy não está instalado; só o caminho em Python puro é medido")
+
+    numpy_module = dice.np
+    dice.MAX_DICE = 10 ** args.max_exponent
+    rows = []
+    try:
+        for name, module in backends:
+            dice.np = module
+            for exponent in range(3, args.max_exponent + 1):
+                count = 10 ** exponent
+                seconds, worst = asyncio.run(stall(f"{count}d{args.sides} sum", random.Random(exponent)))
+                rows.append({'backend': name, 'dice': f"10^{exponent}", 'ms': seconds * 1000,
+                             'per_die_ns': seconds / count * 1e9, 'stall_ms': worst * 1000})
+    finally:
+        dice.np = numpy_module
+    print_table(rows, [('backend', 'backend'), ('dados', 'dice'), ('ms', 'ms'),
+                       ('ns por dado', 'per_die_ns'), ('maior atraso do loop (ms)', 'stall_ms')])
+
+
+if __name__ == '__main__':
+    main()
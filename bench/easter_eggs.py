@@ -0,0 +1,67 @@
+"""Busca de easter eggs no $pergunta com 10 mil gatilhos.
+
+Compara o TriggerMatcher (Aho–Corasick, uma passada pelo texto) com a
+varredura de antes (`trigger in question.lower()` para cada gatilho), em
+perguntas curtas e longas, com e sem gatilho. Mede também quanto custa
+montar o autômato, o que acontece uma vez por servidor até a próxima
+mudança nos easter eggs.
+
+    python -m bench.easter_eggs --triggers 10000
+"""
+
+import argparse
+import random
+import string
+import time
+
+from bench.common import print_table, timed
+from matcher import TriggerMatcher
+
+
+def linear_scan(eggs, question, limit=2):
+    text = question.lower()
+    found = []
+    for trigger, response in eggs:
+        if trigger.lower() in text:
+            found.append(response)
+            if len(found) >= limit:
+                break
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--triggers', type=int, default=10_000)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    generator = random.Random(0)
+    words = [''.join(generator.choices(string.ascii_lowercase, k=generator.randint(4, 10)))
+             for _ in range(args.triggers)]
+    eggs = [(f'{word} {generator.choice(words)}' if index % 3 == 0 else word, f'Resposta {index}')
+            for index, word in enumerate(words)]
+
+    start = time.perf_counter()
+    matcher = TriggerMatcher(eggs)
+    build = time.perf_counter() - start
+    print(f"montar o autômato com {len(matcher)} gatilhos: {build * 1000:.1f} ms")
+
+    filler = 'o que voce acha que vai acontecer amanha na sessao de rpg '
+    questions = {
+        'curta, sem gatilho': 'o lotus vai ganhar?',
+        'curta, com gatilho': f'o {eggs[-1][0]} vai ganhar?',
+        'longa, sem gatilho': filler * 30,
+        'longa, com gatilho': filler * 15 + eggs[len(eggs) // 2][0] + ' ' + filler * 15,
+    }
+    rows = []
+    for name, question in questions.items():
+        scan = timed(lambda: linear_scan(eggs, question), args.repeat)
+        automaton = timed(lambda: matcher.match(question, limit=2), args.repeat * 10)
+        rows.append({'question': name, 'chars': len(question), 'scan_us': scan * 1e6,
+                     'matcher_us': automaton * 1e6, 'speedup': scan / automaton})
+    print_table(rows, [('pergunta', 'question'), ('caracteres', 'chars'), ('varredura µs', 'scan_us'),
+                       ('TriggerMatcher µs', 'matcher_us'), ('x mais rápido', 'speedup')])
+
+
+if __name__ == '__main__':
+    main()
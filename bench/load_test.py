@@ -0,0 +1,98 @@
+"""Teste de carga: SQLite no event loop contra a thread do banco.
+
+Dispara centenas de comandos simultâneos pelo replay, num powers.db
+temporário, e mostra o p50/p99 de latência nos dois cenários:
+
+- antes: toda consulta roda direto na corrotina, numa conexão comum
+  (journal padrão, commit com fsync completo), como fazia o cursor global;
+- depois: o Database de hoje, com a conexão numa thread própria e WAL.
+
+Além da mistura de leituras do trace sintético, uma parte dos comandos
+grava ($addpower, $rollcreate). Mede também o maior atraso do event loop
+(um sleep de 10 ms que deveria acordar na hora), que é o que atrasa o
+heartbeat do gateway e os outros comandos. As falhas são $dado recusados
+pelo limite de uma rolagem por usuário de cada vez; com o loop travado as
+rolagens demoram mais e se sobrepõem mais.
+
+    python -m bench.load_test --commands 3000 --concurrency 200 --writes 0.1
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sqlite3
+import time
+
+from bench.common import print_table, run_replay, run_variants
+from replay import synthetic_trace
+
+lags = []
+
+
+def trace(commands, writes, seed=0):
+    entries = synthetic_trace(commands, seed=seed)
+    generator = random.Random(seed)
+    for index, entry in enumerate(entries):
+        if entry.get('setup') or generator.random() >= writes:
+            continue
+        entry.update(admin=True, user_id=100)
+        if index % 2:
+            entry['content'] = (f'$addpower "Novo {index}" "Poder criado durante a carga" '
+                                f'"Vantagem" "Desvantagem"')
+        else:
+            entry['content'] = f'$rollcreate carga{index} a, b:2, c'
+    return entries
+
+
+async def watch_event_loop():
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        lags.append(time.perf_counter() - start - 0.01)
+
+
+async def start_watching(lass):
+    asyncio.get_running_loop().create_task(watch_event_loop())
+
+
+async def blocking_database(lass):
+    """Troca o Database por consultas síncronas no próprio event loop."""
+    # O WAL fica gravado no arquivo; só a conexão da thread, sozinha, pode desligá-lo
+    await lass.db.run(lambda conn: conn.execute('PRAGMA journal_mode=DELETE'))
+    conn = sqlite3.connect(lass.db.path)
+    conn.execute('PRAGMA foreign_keys=ON')
+
+    async def run(fn, *args, operation=None):
+        return fn(conn, *args)
+
+    lass.db.run = run
+    await start_watching(lass)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--commands', type=int, default=3000)
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--writes', type=float, default=0.1, help="fração dos comandos que grava no banco")
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--variant', choices=('antes', 'depois'))
+    args = parser.parse_args()
+
+    if args.variant:
+        prepare = blocking_database if args.variant == 'antes' else start_watching
+        summary = run_replay(trace(args.commands, args.writes), args.concurrency, prepare)
+        summary['max_lag_ms'] = max(lags, default=0) * 1000
+        print(json.dumps(summary))
+        return
+
+    results = run_variants('bench.load_test', ('antes', 'depois'), '--commands', args.commands,
+                           '--concurrency', args.concurrency, '--writes', args.writes, rounds=args.rounds)
+    print_table([{'variant': name, **result} for name, result in results.items()],
+                [('banco', 'variant'), ('comandos', 'commands'), ('comandos/s', 'throughput'),
+                 ('p50 ms', 'p50_ms'), ('p99 ms', 'p99_ms'), ('maior atraso do loop ms', 'max_lag_ms'),
+                 ('falhas', 'failures')])
+
+
+if __name__ == '__main__':
+    main()
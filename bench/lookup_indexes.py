@@ -0,0 +1,86 @@
+"""Latência das buscas por nome antes e depois das migrações.
+
+Cria um banco temporário só com o esquema original (sem índices), com
+--rows poderes, personagens e rolls, mede as buscas do $getpower,
+$getcharacter e $roll, aplica as migrações no mesmo banco e mede de novo.
+
+    python -m bench.lookup_indexes --rows 100000
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from bench.common import print_table, timed
+from migrations import _initial_schema, migrate
+
+GUILD_ID = 1
+
+# (nome, consulta no esquema original, consulta depois das migrações)
+LOOKUPS = [
+    ('getpower', "SELECT * FROM powers WHERE name = ?",
+     "SELECT * FROM powers WHERE guild_id = ? AND name = ?"),
+    ('getcharacter', "SELECT * FROM characters WHERE name = ? AND creator_id = ?",
+     "SELECT * FROM characters WHERE guild_id = ? AND name = ? AND creator_id = ?"),
+    ('roll', "SELECT options FROM rolls WHERE server_id = ? AND name = ?",
+     "SELECT o.option, o.weight FROM roll_options o JOIN rolls r ON r.id = o.roll_id "
+     "WHERE r.server_id = ? AND r.name = ?"),
+]
+
+
+def populate(conn, rows):
+    _initial_schema(conn)
+    conn.executemany("INSERT INTO powers (name, description, advantage, disadvantage, creator_id) VALUES (?, ?, ?, ?, ?)",
+                     ((f"Poder {i}", "descrição", "vantagem", "desvantagem", i % 100) for i in range(rows)))
+    conn.executemany("INSERT INTO characters (name, description, server, creator_id) VALUES (?, ?, ?, ?)",
+                     ((f"Personagem {i}", "descrição", "servidor", i % 100) for i in range(rows)))
+    conn.executemany("INSERT INTO rolls (server_id, name, options, creator_id) VALUES (?, ?, ?, ?)",
+                     ((GUILD_ID, f"roll {i}", "a, b, c", i % 100) for i in range(rows)))
+    conn.commit()
+
+
+def measure(conn, rows, migrated, repeat):
+    rng = random.Random(0)
+    results = {}
+    for name, before, after in LOOKUPS:
+        def lookup():
+            i = rng.randrange(rows)
+            if name == 'getpower':
+                params = (f"Poder {i}",)
+            elif name == 'getcharacter':
+                params = (f"Personagem {i}", i % 100)
+            else:
+                params = (GUILD_ID, f"roll {i}")
+            if migrated and name != 'roll':
+                params = (GUILD_ID, *params)
+            conn.execute(after if migrated else before, params).fetchall()
+        results[name] = timed(lookup, repeat) * 1000
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        conn = sqlite3.connect(os.path.join(directory, 'bench.db'))
+        populate(conn, args.rows)
+        before = measure(conn, args.rows, False, args.repeat)
+        start = time.perf_counter()
+        migrate(conn)
+        print(f"migrações em {args.rows:,} linhas por tabela: {time.perf_counter() - start:.2f}s")
+        after = measure(conn, args.rows, True, args.repeat * 10)
+        conn.close()
+
+    print_table([{'lookup': name, 'before': before[name], 'after': after[name],
+                  'speedup': f"{before[name] / after[name]:.0f}x"} for name, _, _ in LOOKUPS],
+                [('busca', 'lookup'), ('sem índice ms', 'before'), ('com índice ms', 'after'), ('ganho', 'speedup')])
+
+
+if __name__ == '__main__':
+    main()
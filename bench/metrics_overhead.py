@@ -0,0 +1,74 @@
+"""Custo da coleta de métricas.
+
+Mede o custo de registrar um comando (um inc e um observe) e uma consulta
+ao banco, e roda o mesmo trace sintético no bot com as métricas ligadas e
+com elas trocadas por funções vazias.
+
+    python -m bench.metrics_overhead --commands 5000 --concurrency 50
+"""
+
+import argparse
+import json
+
+from bench.common import print_table, run_replay, run_variants, timed
+from metrics import Metrics
+from replay import synthetic_trace
+
+
+class NullMetrics:
+    def inc(self, name, value=1, **labels):
+        pass
+
+    def observe(self, name, value, **labels):
+        pass
+
+
+async def disable_metrics(lass):
+    lass.metrics = NullMetrics()
+    lass.db.observer = None
+
+
+def micro():
+    metrics = Metrics()
+
+    def record_command():
+        metrics.inc('lass_commands_total', command='roll', status='ok')
+        metrics.observe('lass_command_duration_seconds', 0.0003, command='roll')
+
+    def record_query():
+        metrics.observe('lass_db_query_duration_seconds', 0.0001, operation='fetchone')
+
+    repeat = 200_000
+    command, query = timed(record_command, repeat), timed(record_query, repeat)
+    print(f"registrar um comando: {command * 1e6:.2f} µs")
+    print(f"registrar uma consulta: {query * 1e6:.2f} µs")
+    return command, query
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--commands', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--variant', choices=('on', 'off'))
+    args = parser.parse_args()
+
+    if args.variant:
+        prepare = disable_metrics if args.variant == 'off' else None
+        print(json.dumps(run_replay(synthetic_trace(args.commands), args.concurrency, prepare)))
+        return
+
+    command, query = micro()
+    results = run_variants('bench.metrics_overhead', ('off', 'on'),
+                           '--commands', args.commands, '--concurrency', args.concurrency, rounds=args.rounds)
+    print_table([{'variant': name, **result} for name, result in results.items()],
+                [('métricas', 'variant'), ('comandos/s', 'throughput'), ('p50 ms', 'p50_ms'),
+                 ('p99 ms', 'p99_ms'), ('erros', 'errors')])
+    # A diferença entre as duas rodadas costuma ficar dentro do ruído; a
+    # estimativa direta é o custo de registrar um comando com duas consultas
+    cost = command + 2 * query
+    print(f"custo estimado por comando: {cost * 1e6:.1f} µs ({cost * 1000 / results['on']['p50_ms']:.1%} do p50)")
+
+
+if __name__ == '__main__':
+    main()
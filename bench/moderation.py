@@ -0,0 +1,178 @@
+"""Banir 500 membros contra um HTTP do Discord falso.
+
+O stub fica no lugar da sessão aiohttp do discord.py, então as chamadas
+passam pelo HTTPClient de verdade, com o controle de rate limit dele. O
+servidor falso responde depois de --latency segundos e aplica um bucket
+de --limit requisições por --window segundos, com os mesmos headers
+X-RateLimit da API (e 429 para quem passar do limite).
+
+Compara o jeito antigo (um $ban por membro, um depois do outro, sem
+registro) com o moderate novo (em paralelo, com o registro em lotes num
+banco temporário).
+
+    python -m bench.moderation --members 500 --latency 0.05 --limit 50 --window 1
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from collections import Counter
+
+import discord
+
+from database import Database
+from migrations import migrate
+from moderation import AuditWriter, apply_to_members
+
+GUILD_ID = 1
+
+
+class StubResponse:
+    def __init__(self, status, headers, body=''):
+        self.status = status
+        self.headers = headers
+        self.reason = 'Too Many Requests' if status == 429 else 'OK'
+        self._body = body
+
+    async def text(self, encoding='utf-8'):
+        return self._body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+
+class StubSession:
+    """Servidor falso da API: latência fixa e um bucket por rota e servidor."""
+
+    def __init__(self, latency, limit, window):
+        self.latency = latency
+        self.limit = limit
+        self.window = window
+        self.calls = Counter()
+        self.rate_limited = 0
+        self._buckets = {}
+
+    def request(self, method, url, **kwargs):
+        return self._respond(method, url)
+
+    def _respond(self, method, url):
+        session = self
+
+        class Context:
+            async def __aenter__(self):
+                await asyncio.sleep(session.latency)
+                return session._answer(method, url)
+
+            async def __aexit__(self, *exc):
+                pass
+
+        return Context()
+
+    def _answer(self, method, url):
+        bucket = f"{method} {url.split('/bans/')[0]}"
+        now = time.monotonic()
+        reset, used = self._buckets.get(bucket, (now + self.window, 0))
+        if now >= reset:
+            reset, used = now + self.window, 0
+        headers = {
+            'X-Ratelimit-Bucket': 'bans',
+            'X-Ratelimit-Limit': str(self.limit),
+            'X-Ratelimit-Reset-After': f"{reset - now:.3f}",
+            'X-Ratelimit-Reset': f"{time.time() + reset - now:.3f}",
+        }
+        if used >= self.limit:
+            self.rate_limited += 1
+            headers.update({'X-Ratelimit-Remaining': '0', 'Retry-After': f"{reset - now:.3f}",
+                            'Via': '1.1 google', 'content-type': 'application/json'})
+            return StubResponse(429, headers, json.dumps({'retry_after': reset - now, 'global': False,
+                                                           'message': 'You are being rate limited.'}))
+        self._buckets[bucket] = (reset, used + 1)
+        self.calls[method] += 1
+        headers['X-Ratelimit-Remaining'] = str(self.limit - used - 1)
+        return StubResponse(204, headers)
+
+
+class StubMember:
+    """O suficiente de um discord.Member: ban/kick vão para o HTTPClient."""
+
+    def __init__(self, http, member_id):
+        self.http = http
+        self.id = member_id
+
+    def __str__(self):
+        return f'membro{self.id}'
+
+    async def ban(self, reason=None):
+        await self.http.ban(self.id, GUILD_ID, reason=reason)
+
+
+def client(args):
+    http = discord.http.HTTPClient(asyncio.get_running_loop())
+    http.token = 'token'
+    session = StubSession(args.latency, args.limit, args.window)
+    http._HTTPClient__session = session
+    # O static_login é quem cria estes dois; aqui não há login
+    http._global_over = asyncio.Event()
+    http._global_over.set()
+    return http, session
+
+
+async def serial(args, db):
+    http, session = client(args)
+    members = [StubMember(http, 10_000 + i) for i in range(args.members)]
+    start = time.perf_counter()
+    for member in members:
+        await member.ban(reason='raid')
+    return time.perf_counter() - start, session, 0
+
+
+async def concurrent(args, db):
+    http, session = client(args)
+    members = [StubMember(http, 20_000 + i) for i in range(args.members)]
+    audit = AuditWriter(db)
+    audit.start()
+    start = time.perf_counter()
+    results = await apply_to_members(members, lambda member: member.ban(reason='raid'))
+    for member, error in results:
+        audit.record(GUILD_ID, 1, member.id, 'ban', 'raid', error)
+    await audit.close()
+    seconds = time.perf_counter() - start
+    rows = await db.fetchone("SELECT COUNT(*) FROM moderation_log")
+    return seconds, session, rows[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--members', type=int, default=500)
+    parser.add_argument('--latency', type=float, default=0.05, help="segundos por resposta da API falsa")
+    parser.add_argument('--limit', type=int, default=50, help="requisições por janela do bucket")
+    parser.add_argument('--window', type=float, default=1.0, help="duração da janela do bucket em segundos")
+    args = parser.parse_args()
+
+    async def run():
+        with tempfile.TemporaryDirectory() as directory:
+            db = Database(os.path.join(directory, 'bench.db'))
+            await db.open()
+            await db.run(migrate)
+            try:
+                for name, scenario in (('um $ban por membro', serial), ('moderate em paralelo', concurrent)):
+                    seconds, session, audited = await scenario(args, db)
+                    print(f"{name}: {args.members} bans em {seconds:.2f}s "
+                          f"({args.members / seconds:.0f}/s), {sum(session.calls.values())} chamadas REST, "
+                          f"{session.rate_limited} respostas 429, {audited} linhas de auditoria")
+            finally:
+                db.close()
+
+    bound = args.members / args.limit * args.window
+    print(f"limite teórico do bucket: {bound:.1f}s; em série: {args.members * args.latency:.1f}s")
+    asyncio.run(run())
+
+
+if __name__ == '__main__':
+    main()
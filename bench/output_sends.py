@@ -0,0 +1,58 @@
+"""Mensagens enviadas por respostas grandes.
+
+Roda no bot, pelo replay, o `$dado 1000d99999999` e o `$listrotinas` com
+--routines rotinas no servidor, e conta quantas mensagens cada comando
+enviou. Para comparação, mostra quantas mensagens de até 2000 caracteres o
+mesmo texto precisaria sem o envio como anexo (antes, ia numa mensagem só,
+que o Discord recusava).
+
+    python -m bench.output_sends --routines 10000 --commands 200
+"""
+
+import argparse
+import datetime
+import random
+
+import output
+from bench.common import print_table, run_replay
+from dice import format_result, roll
+
+GUILD_ID = 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--routines', type=int, default=10_000)
+    parser.add_argument('--commands', type=int, default=200, help="execuções de cada comando")
+    parser.add_argument('--concurrency', type=int, default=20)
+    args = parser.parse_args()
+
+    async def add_routines(lass):
+        created = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        await lass.db.transaction(lambda conn: conn.executemany(
+            "INSERT INTO routines (guild_id, channel_id, time, timezone, message, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            ((GUILD_ID, 10_000 + i, f"{i % 24:02d}:{i % 60:02d}", 'America/Sao_Paulo',
+              f"Lembrete número {i} para o canal", created) for i in range(args.routines))))
+        # Texto que cada comando monta, para contar as mensagens sem o anexo
+        routines = await lass.routine_repo.for_guild(GUILD_ID)
+        texts['listrotinas'] = "**Rotinas Definidas:**\n" + "".join(
+            f"- **Horário:** {routine.time.isoformat(timespec='minutes')} ({routine.timezone}) | "
+            f"**Canal:** <#{routine.channel_id}> | **Mensagem:** {routine.message}\n" for routine in routines)
+
+    texts = {'dado': format_result(roll('1000d99999999', random.Random(0)))}
+    user = {'guild_id': GUILD_ID, 'user_id': 100, 'admin': True}
+    # Usuários diferentes no $dado, que só aceita uma rolagem por usuário de cada vez
+    entries = [{**user, 'user_id': 100 + i, 'content': '$dado 1000d99999999'} for i in range(args.commands)]
+    entries += [{**user, 'content': '$listrotinas'} for _ in range(args.commands)]
+    summary = run_replay(entries, args.concurrency, add_routines)
+
+    rows = [{'command': f'${name}', 'chars': len(text), 'split': len(output.split_message(text)),
+             'sends': summary['sends'].get(name, 0) / args.commands} for name, text in texts.items()]
+    print_table(rows, [('comando', 'command'), ('caracteres', 'chars'),
+                       ('mensagens sem anexo', 'split'), ('envios por comando', 'sends')])
+    print(f"p50 {summary['p50_ms']:.2f} ms, p99 {summary['p99_ms']:.2f} ms, "
+          f"{summary['failures']} falhas, {summary['errors']} erros")
+
+
+if __name__ == '__main__':
+    main()
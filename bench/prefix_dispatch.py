@@ -0,0 +1,81 @@
+"""Resolução de prefixo com 10 mil servidores configurados.
+
+Carrega o bot num banco temporário com --guilds prefixos próprios e mede
+quantas mensagens por segundo passam pelo bot.get_context (o primeiro
+passo de todo comando) com três resolvedores: o prefixo fixo de antes
+(sem prefixo por servidor), o dicionário em memória do PrefixRepository e
+um SELECT por mensagem, a alternativa óbvia de guardar o prefixo no banco.
+
+    python -m bench.prefix_dispatch --guilds 10000 --messages 50000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+import replay
+from bench.common import print_table
+from migrations import migrate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--guilds', type=int, default=10_000)
+    parser.add_argument('--messages', type=int, default=50_000)
+    args = parser.parse_args()
+
+    prefixes = {guild_id: random.Random(guild_id).choice(['!', '?', '>>', 'lass ', '%'])
+                for guild_id in range(1, args.guilds + 1)}
+
+    async def run(lass):
+        await lass.db.open()
+        await lass.db.run(migrate)
+        await lass.db.transaction(lambda conn: conn.executemany(
+            "INSERT INTO guild_prefixes (guild_id, prefix) VALUES (?, ?)", prefixes.items()))
+        await lass.prefix_repo.load()
+
+        lass.bot._connection.user = replay.FakeUser(replay.BOT_USER_ID)
+        generator = random.Random(0)
+        world = replay.World(lass.bot._connection)
+        guild_ids = [generator.randint(1, args.guilds) for _ in range(args.messages)]
+        messages = {
+            'fixo': [world.message({'guild_id': guild_id, 'content': '$roll cores'}) for guild_id in guild_ids],
+            'dicionário': [world.message({'guild_id': guild_id, 'content': f'{prefixes[guild_id]}roll cores'})
+                           for guild_id in guild_ids],
+        }
+        messages['SELECT'] = messages['dicionário']
+
+        async def select_prefix(bot, message):
+            row = await lass.db.fetchone("SELECT prefix FROM guild_prefixes WHERE guild_id = ?", (message.guild.id,))
+            return row[0] if row else lass.DEFAULT_PREFIX
+
+        resolvers = {'fixo': '$', 'dicionário': lass.get_prefix, 'SELECT': select_prefix}
+        rows = []
+        for name, resolver in resolvers.items():
+            lass.bot.command_prefix = resolver
+            start = time.perf_counter()
+            found = 0
+            for message in messages[name]:
+                ctx = await lass.bot.get_context(message)
+                found += ctx.command is not None
+            seconds = time.perf_counter() - start
+            rows.append({'resolver': name, 'throughput': len(messages[name]) / seconds,
+                         'us': seconds / len(messages[name]) * 1e6, 'found': found})
+        lass.bot.command_prefix = lass.get_prefix
+        return rows
+
+    with tempfile.TemporaryDirectory() as directory:
+        lass = replay.load_bot(os.path.join(directory, 'bench.db'))
+        try:
+            rows = asyncio.run(run(lass))
+        finally:
+            lass.db.close()
+    print_table(rows, [('prefixo', 'resolver'), ('mensagens/s', 'throughput'), ('µs por mensagem', 'us'),
+                       ('comandos achados', 'found')])
+
+
+if __name__ == '__main__':
+    main()
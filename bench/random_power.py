@@ -0,0 +1,76 @@
+"""Latência do $Prandom com 10 mil, 100 mil e 1 milhão de poderes.
+
+Para cada tamanho cria um banco temporário já migrado e compara o
+ORDER BY RANDOM() LIMIT 1 de antes com o PowerRepository.random (sorteio
+no RandomSampler + busca pelo id). A primeira chamada do sampler carrega
+os ids do servidor e é medida à parte.
+
+    python -m bench.random_power --sizes 10000 100000 1000000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from bench.common import print_table, timed_async
+from database import Database
+from migrations import migrate
+from repositories import PowerRepository
+
+GUILD_ID = 1
+
+
+def populate(path, rows):
+    conn = sqlite3.connect(path)
+    migrate(conn)
+    with conn:
+        conn.executemany(
+            "INSERT INTO powers (guild_id, name, description, advantage, disadvantage, creator_id) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            ((GUILD_ID, f"Poder {i}", "descrição", "vantagem", "desvantagem", i % 100) for i in range(rows)))
+    conn.close()
+
+
+async def measure(path, rows, repeat):
+    db = Database(path)
+    await db.open()
+    repo = PowerRepository(db)
+    rng = random.Random(0)
+    try:
+        order_by = await timed_async(lambda: db.fetchone(
+            "SELECT * FROM powers WHERE guild_id = ? ORDER BY RANDOM() LIMIT 1", (GUILD_ID,)),
+            max(3, 200_000 // rows)) * 1000
+        start = time.perf_counter()
+        await repo.random(GUILD_ID, rng=rng)
+        first = (time.perf_counter() - start) * 1000
+        sampler = await timed_async(lambda: repo.random(GUILD_ID, rng=rng), repeat) * 1000
+        creator = await timed_async(lambda: repo.random(GUILD_ID, 7, rng=rng), repeat) * 1000
+    finally:
+        db.close()
+    return {'rows': rows, 'order_by_ms': order_by, 'first_ms': first, 'sampler_ms': sampler,
+            'creator_ms': creator, 'speedup': order_by / sampler}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=2000)
+    args = parser.parse_args()
+
+    results = []
+    for rows in args.sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'bench.db')
+            populate(path, rows)
+            results.append(asyncio.run(measure(path, rows, args.repeat)))
+    print_table(results, [('poderes', 'rows'), ('ORDER BY RANDOM() ms', 'order_by_ms'),
+                          ('1ª chamada (carga) ms', 'first_ms'), ('sampler ms', 'sampler_ms'),
+                          ('sampler por criador ms', 'creator_ms'), ('x mais rápido', 'speedup')])
+
+
+if __name__ == '__main__':
+    main()
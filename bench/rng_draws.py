@@ -0,0 +1,106 @@
+"""Vazão de sorteios com comandos concorrentes.
+
+Roda a mesma mistura de comandos aleatórios ($roll x5, $choose, $humor,
+$dado pequeno no event loop e $dado grande numa thread) com o gerador
+global do módulo random, como era antes (com o random.seed do $humor), e
+com o RNGService.
+
+    python -m bench.rng_draws --commands 50000 --concurrency 100
+"""
+
+import argparse
+import asyncio
+import datetime
+import random
+import time
+
+from bench.common import print_table, timed
+from dice import roll as roll_dice
+from rng import RNGService
+from rolltables import AliasTable
+
+TABLE = AliasTable([('vermelho', 1), ('azul', 2), ('verde', 0.5), ('amarelo', 1)])
+OPTIONS = ['a', 'b', 'c', 'd']
+RESPONSES = ["Estou Feliz", "Estou rindo", "Não to Tankando", "To triste", "To com raiva", "Estou Maliciosa"]
+
+
+class GlobalRandom:
+    """O comportamento antigo: todo mundo no gerador global."""
+
+    def roll(self, count):
+        return TABLE.draw_many(count, random)
+
+    def choose(self):
+        return random.choice(OPTIONS)
+
+    def humor(self, user_id):
+        random.seed(user_id + datetime.datetime.now().day)
+        return random.choice(RESPONSES)
+
+    def dice(self, expression):
+        return roll_dice(expression, random)
+
+
+class Service:
+    def __init__(self):
+        self.rng = RNGService()
+
+    def roll(self, count):
+        return TABLE.draw_many(count, self.rng.fast)
+
+    def choose(self):
+        return self.rng.fast.choice(OPTIONS)
+
+    def humor(self, user_id):
+        return self.rng.daily(user_id).choice(RESPONSES)
+
+    def dice(self, expression):
+        return roll_dice(expression, self.rng.spawn())
+
+
+async def run(source, commands, concurrency, big_every):
+    semaphore = asyncio.Semaphore(concurrency)
+    generator = random.Random(0)
+    kinds = [generator.choice('rchd') for _ in range(commands)]
+
+    async def command(index, kind):
+        async with semaphore:
+            if kind == 'r':
+                source.roll(5)
+            elif kind == 'c':
+                source.choose()
+            elif kind == 'h':
+                source.humor(100 + index % 100)
+            elif index % big_every == 0:
+                await asyncio.to_thread(source.dice, '10000d20 sum')
+            else:
+                source.dice('4d6kh3+2')
+            # Como um comando de verdade, devolve o controle ao event loop
+            await asyncio.sleep(0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(command(index, kind) for index, kind in enumerate(kinds)))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--commands', type=int, default=50_000)
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--big-every', type=int, default=200, help="um $dado grande a cada N comandos de dado")
+    args = parser.parse_args()
+
+    service = RNGService()
+    print(f"daily(): {timed(lambda: service.daily(123), 100_000) * 1e6:.2f} µs por gerador")
+    print(f"spawn(): {timed(service.spawn, 100_000) * 1e6:.2f} µs por gerador")
+    print(f"fast.random(): {timed(service.fast.random, 1_000_000) * 1e9:.0f} ns por sorteio")
+
+    rows = []
+    for name, source in (('global', GlobalRandom()), ('RNGService', Service())):
+        seconds = asyncio.run(run(source, args.commands, args.concurrency, args.big_every))
+        rows.append({'name': name, 'throughput': args.commands / seconds, 'seconds': seconds})
+    print_table(rows, [('gerador', 'name'), ('comandos/s', 'throughput'), ('segundos', 'seconds')])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""Vazão do $roll com a AliasTable em cache contra o SELECT a cada chamada.
+
+Cria --rolls rolls de --options opções com pesos num banco temporário e
+faz --commands chamadas concorrentes de get_table + draw_many, escolhendo
+os rolls com uma distribuição Zipf (poucos rolls populares, muitos raros).
+"Sem cache" limpa o cache antes de cada chamada, então toda chamada faz o
+SELECT e monta a tabela de novo, como antes do cache.
+
+    python -m bench.roll_cache --rolls 1000 --options 20 --commands 20000 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from bench.common import percentile, print_table
+from database import Database
+from migrations import migrate
+from repositories import RollRepository
+from rng import RNGService
+
+GUILD_ID = 1
+
+
+async def populate(repo, rolls, options):
+    generator = random.Random(0)
+    for index in range(rolls):
+        await repo.create(GUILD_ID, f'roll{index}',
+                          [(f'opção {index}-{option}', generator.choice((1, 1, 2, 5))) for option in range(options)], 1)
+
+
+async def run(repo, names, draws, concurrency, cached):
+    rng = RNGService(seed=0)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def command(name):
+        async with semaphore:
+            start = time.perf_counter()
+            if not cached:
+                repo.clear_cache()
+            table = await repo.get_table(GUILD_ID, name)
+            ", ".join(table.draw_many(draws, rng.fast))
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(command(name) for name in names))
+    seconds = time.perf_counter() - start
+    latencies.sort()
+    return len(names) / seconds, percentile(latencies, 0.5), percentile(latencies, 0.99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rolls', type=int, default=1000)
+    parser.add_argument('--options', type=int, default=20)
+    parser.add_argument('--commands', type=int, default=20_000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    args = parser.parse_args()
+
+    generator = random.Random(1)
+    weights = [1 / (rank + 1) for rank in range(args.rolls)]
+    names = [f'roll{index}' for index in generator.choices(range(args.rolls), weights, k=args.commands)]
+
+    async def main_async(directory):
+        db = Database(os.path.join(directory, 'bench.db'))
+        await db.open()
+        await db.run(migrate)
+        repo = RollRepository(db)
+        rows = []
+        try:
+            await populate(repo, args.rolls, args.options)
+            for draws in (1, 100):
+                for label, cached in (('sem cache', False), ('cache', True)):
+                    repo.clear_cache()
+                    throughput, p50, p99 = await run(repo, names, draws, args.concurrency, cached)
+                    rows.append({'variant': f'{label}, x{draws}', 'throughput': throughput,
+                                 'p50_ms': p50 * 1000, 'p99_ms': p99 * 1000})
+        finally:
+            db.close()
+        print_table(rows, [('variante', 'variant'), ('comandos/s', 'throughput'),
+                           ('p50 ms', 'p50_ms'), ('p99 ms', 'p99_ms')])
+
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(main_async(directory))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""$searchpower com FTS5 contra LIKE em 100 mil poderes.
+
+Cria um banco temporário migrado com --rows poderes, divididos entre
+--guilds servidores, cujas palavras seguem uma distribuição Zipf (como
+texto de verdade) e compara a busca ranqueada do PowerRepository num dos
+servidores com a alternativa ingênua: LIKE '%palavra%' em todas as
+colunas de texto, sem ranking. O LIMIT é o mesmo nas duas; no LIKE uma
+palavra rara obriga a varrer todos os poderes do servidor, e no FTS uma
+palavra que aparece em quase todas as linhas obriga a ranquear todas as
+do servidor (as dos outros ficam fora pelo termo do servidor no MATCH).
+
+    python -m bench.search --rows 100000 --guilds 20
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+
+from bench.common import print_table, timed
+from migrations import migrate
+from repositories import _full_text_search
+
+GUILD_ID = 1
+COMMON = ('fogo gelo raio sombra luz veneno vento terra agua metal sangue tempo espaco mente alma '
+          'escudo lamina garra asa olho voz grito salto golpe corrente chama nevoa pedra trovao').split()
+COLUMNS = ('name', 'description', 'advantage', 'disadvantage')
+
+
+def populate(conn, rows, guilds):
+    migrate(conn)
+    generator = random.Random(0)
+    vocabulary = COMMON + [''.join(generator.choices('bcdfglmnprstv', k=3)) + ''.join(generator.choices('aeiou', k=2))
+                           + str(rank) for rank in range(5000)]
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+
+    def text(words):
+        return ' '.join(generator.choices(vocabulary, weights, k=words))
+
+    with conn:
+        conn.executemany(
+            "INSERT INTO powers (guild_id, name, description, advantage, disadvantage, creator_id) VALUES (?, ?, ?, ?, ?, ?)",
+            ((i % guilds + GUILD_ID, f"Poder {i} {text(2)}", text(30), text(8), text(8), 1) for i in range(rows)))
+        # Uma palavra que só aparece em poucos poderes
+        conn.execute("UPDATE powers SET description = description || ' obsidiana' WHERE id % 10000 = 1")
+
+
+def like_search(conn, text, limit=10):
+    words = text.lower().split()
+    where = ' AND '.join('(' + ' OR '.join(f"{column} LIKE ?" for column in COLUMNS) + ')' for _ in words)
+    params = [f'%{word}%' for word in words for _ in COLUMNS]
+    return conn.execute(f"SELECT name FROM powers WHERE guild_id = ? AND {where} LIMIT ?",
+                        (GUILD_ID, *params, limit)).fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--guilds', type=int, default=20, help="servidores entre os quais os poderes se dividem")
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    queries = {
+        'a mais comum': 'fogo',
+        'comum': 'trovao',
+        'duas palavras': 'trovao pedra',
+        'palavra rara': 'obsidiana',
+        'sem resultado': 'dragao',
+        'com erro de digitação': 'obsidiama',
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        conn = sqlite3.connect(os.path.join(directory, 'bench.db'))
+        populate(conn, args.rows, args.guilds)
+        rows = []
+        for name, query in queries.items():
+            def fts_search():
+                return _full_text_search(conn, 'powers', 't.name', '10.0, 1.0, 2.0, 2.0', GUILD_ID, query, 10)
+            matching = conn.execute("SELECT COUNT(*) FROM powers WHERE guild_id = ? AND id IN "
+                                    "(SELECT rowid FROM powers_fts WHERE powers_fts MATCH ?)",
+                                    (GUILD_ID, ' '.join(f'"{word}"' for word in query.split()))).fetchone()[0]
+            rows.append({'query': f'{name} ({query})', 'matching': matching,
+                         'fts_ms': timed(fts_search, args.repeat) * 1000, 'fts_results': len(fts_search()),
+                         'like_ms': timed(lambda: like_search(conn, query), args.repeat) * 1000,
+                         'like_results': len(like_search(conn, query))})
+        conn.close()
+    print_table(rows, [('busca', 'query'), ('linhas do servidor com os termos', 'matching'), ('FTS ms', 'fts_ms'),
+                       ('resultados FTS', 'fts_results'), ('LIKE ms', 'like_ms'), ('resultados LIKE', 'like_results')])
+
+
+if __name__ == '__main__':
+    main()
@@ -1,160 +1,352 @@
 import asyncio
 import discord
+from discord import app_commands
 from discord.ext import commands
-import sqlite3
 import datetime
-import random
+from functools import partial
+import logging
+import signal
 import validators
-import json
 import re
-import schedule
+import tempfile
+import time
 from dotenv import load_dotenv
 import os
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from cards import character_card, power_card
+from bulk import FORMATS as BULK_FORMATS, KINDS as BULK_KINDS, export_file, import_file
+from database import Database
+from metrics import Metrics, count_http_requests, serve as serve_metrics
+from dice import DiceError, format_result as format_dice_result, roll as roll_dice
+from lifecycle import InFlight
+from migrations import import_legacy_routines, migrate
+from moderation import AuditWriter, MentionedMember, apply_to_members
+from output import send_long
+from pagination import KeysetPager, Paginator
+from replay import TraceRecorder
+from repositories import (CharacterRepository, EasterEggRepository, PowerRepository, PrefixRepository,
+                          RollRepository, RoutineRepository)
+from rng import RNGService
+from rolltables import parse_options
+from scheduler import Scheduler
+
+# Início do processo, para medir quanto tempo o bot leva até ficar pronto
+STARTED_AT = time.perf_counter()
+log = logging.getLogger('lass')
 
 load_dotenv()
 TOKEN = os.getenv('DISCORD_TOKEN')
+# Fuso usado quando a rotina não especifica um (HH:MM@Fuso/Horario)
+DEFAULT_TIMEZONE = os.getenv('TIMEZONE', 'America/Sao_Paulo')
+# Porta local onde as métricas ficam disponíveis para o Prometheus (desligado se vazio)
+METRICS_PORT = os.getenv('METRICS_PORT')
+# Arquivo JSONL onde os comandos recebidos são gravados para o replay.py (desligado se vazio)
+TRACE_PATH = os.getenv('TRACE_PATH')
 
 intents = discord.Intents.default()
 intents.message_content = True
-bot = commands.Bot(command_prefix='$', intents=intents, case_insensitive=True)
-
-
-# Conectando ao banco de dados SQLite
-conn = sqlite3.connect('powers.db')
-c = conn.cursor()
-
-# Criando tabelas necessárias
-c.execute('''
-          CREATE TABLE IF NOT EXISTS powers
-          (id INTEGER PRIMARY KEY, 
-          name TEXT, 
-          description TEXT, 
-          advantage TEXT, 
-          disadvantage TEXT,
-          image TEXT,
-          creator_id INTEGER)
-          ''')
-c.execute('''
-          CREATE TABLE IF NOT EXISTS characters
-          (id INTEGER PRIMARY KEY, 
-          name TEXT, 
-          description TEXT, 
-          server TEXT, 
-          image TEXT,
-          creator_id INTEGER)
-          ''')
-c.execute('''
-          CREATE TABLE IF NOT EXISTS rolls
-          (id INTEGER PRIMARY KEY, 
-          server_id INTEGER, 
-          name TEXT, 
-          options TEXT, 
-          creator_id INTEGER)
-          ''')
-conn.commit()
+DEFAULT_PREFIX = '$'
+MAX_PREFIX_LENGTH = 10
+
+# O prefixo de cada servidor vem do dicionário em memória do prefix_repo
+def get_prefix(bot, message):
+    return prefix_repo.get(message.guild.id) if message.guild else DEFAULT_PREFIX
+
+bot_options = dict(command_prefix=get_prefix, intents=intents, case_insensitive=True)
+# Com SHARD_COUNT (ou AUTO_SHARD=1, que usa o número recomendado pelo Discord)
+# o bot abre várias conexões ao gateway; o cluster.py também define SHARD_IDS
+# para dividir os shards entre processos
+SHARD_COUNT = os.getenv('SHARD_COUNT')
+SHARD_IDS = os.getenv('SHARD_IDS')
+if SHARD_COUNT or os.getenv('AUTO_SHARD'):
+    bot = commands.AutoShardedBot(
+        shard_count=int(SHARD_COUNT) if SHARD_COUNT else None,
+        shard_ids=[int(shard_id) for shard_id in SHARD_IDS.split(',')] if SHARD_IDS else None,
+        **bot_options)
+else:
+    bot = commands.Bot(**bot_options)
+
+
+# Banco de dados SQLite (todo acesso roda numa thread separada); a conexão
+# só é aberta no setup_hook, então importar o módulo não toca no disco
+db = Database(os.getenv('DATABASE_PATH', 'powers.db'))
+
+power_repo = PowerRepository(db)
+character_repo = CharacterRepository(db)
+roll_repo = RollRepository(db)
+routine_repo = RoutineRepository(db)
+easter_egg_repo = EasterEggRepository(db)
+prefix_repo = PrefixRepository(db, DEFAULT_PREFIX)
+# Geradores aleatórios dos comandos; nenhum comando usa o random global
+rng = RNGService(DEFAULT_TIMEZONE)
+# Registro de bans e kicks, gravado em lotes por uma task em segundo plano
+audit = AuditWriter(db)
+
+# Métricas: latência de cada comando, de cada consulta ao banco e chamadas à API
+metrics = Metrics()
+metrics.describe('lass_commands_total', 'counter', 'Comandos executados, por comando e resultado')
+metrics.describe('lass_command_duration_seconds', 'histogram', 'Tempo de execução dos comandos')
+metrics.describe('lass_db_query_duration_seconds', 'histogram', 'Tempo das consultas ao SQLite, incluindo a fila')
+metrics.describe('lass_discord_http_requests_total', 'counter', 'Chamadas REST feitas à API do Discord')
+metrics.describe('lass_discord_http_request_duration_seconds', 'histogram', 'Tempo das chamadas REST à API do Discord')
+db.observer = lambda operation, seconds: metrics.observe('lass_db_query_duration_seconds', seconds, operation=operation)
+count_http_requests(bot.http, metrics)
+metrics_server = None
+trace_recorder = TraceRecorder(TRACE_PATH) if TRACE_PATH else None
+
+@bot.listen('on_command')
+async def record_trace(ctx):
+    # Comandos de barra não têm o texto da mensagem para reproduzir
+    if trace_recorder and ctx.interaction is None:
+        trace_recorder.record(ctx)
+
+# Comandos em execução, que o desligamento espera terminar
+in_flight = InFlight()
+
+@bot.before_invoke
+async def start_command_timer(ctx):
+    ctx.started_at = time.perf_counter()
+    ctx.in_flight = True
+    in_flight.start()
+
+# O after_invoke não roda quando um comando de barra falha (o discord.py só
+# chama os hooks de depois se o callback terminou), então o on_command_error
+# também encerra o comando; o atributo garante que isso acontece uma vez só
+def finish_command(ctx, failed):
+    if not getattr(ctx, 'in_flight', False):
+        return
+    ctx.in_flight = False
+    in_flight.finish()
+    command = ctx.command.qualified_name
+    metrics.inc('lass_commands_total', command=command, status='error' if failed else 'ok')
+    metrics.observe('lass_command_duration_seconds', time.perf_counter() - ctx.started_at, command=command)
+
+# Erros de uso (comando inexistente, argumento faltando, sem permissão...)
+# não indicam problema no bot e não vão para o log
+USER_ERRORS = (commands.CommandNotFound, commands.UserInputError, commands.CheckFailure,
+               commands.CommandOnCooldown, commands.MaxConcurrencyReached)
+
+# Com um listener de on_command_error o discord.py deixa de imprimir os erros
+# sozinho, então o log fica aqui
+@bot.listen('on_command_error')
+async def finish_failed_command(ctx, error):
+    finish_command(ctx, failed=True)
+    if ctx.command and ctx.command.has_error_handler() or ctx.cog and ctx.cog.has_error_handler():
+        return
+    if not isinstance(error, USER_ERRORS):
+        log.error("Erro no comando %s", ctx.command.qualified_name if ctx.command else ctx.invoked_with,
+                  exc_info=error)
+
+@bot.after_invoke
+async def record_command_metrics(ctx):
+    # Comandos de texto chegam aqui mesmo quando levantam uma exceção
+    finish_command(ctx, ctx.command_failed)
 
 # Verificar se o usuário é administrador
 def is_admin(ctx):
     return ctx.author.guild_permissions.administrator
 
-# Carrega as rotinas do arquivo JSON ao iniciar
-def load_rotinas():
+# Interpreta "HH:MM", "HH:MM:SS" e as mesmas formas com "@Fuso/Horario" no final
+def parse_horario(horario):
+    match = re.match(r"^(\d{2}:\d{2}(?::\d{2})?)(?:@(.+))?$", horario)
+    if not match:
+        return None
     try:
-        with open('rotinas.json', 'r') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return {}
+        datetime.time.fromisoformat(match.group(1))
+        timezone = match.group(2) or DEFAULT_TIMEZONE
+        ZoneInfo(timezone)
+    except (ValueError, ZoneInfoNotFoundError):
+        return None
+    return match.group(1), timezone
+
+# Um servidor pertence ao processo que tem o shard dele (fórmula do Discord)
+def owns_guild(guild_id):
+    shard_count = bot.shard_count or 1
+    if shard_count == 1:
+        return True
+    shard_ids = getattr(bot, 'shard_ids', None) or range(shard_count)
+    return (guild_id >> 22) % shard_count in shard_ids
+
+# Função para enviar a mensagem de uma rotina (chamada pelo agendador)
+async def send_rotina(routine):
+    # O agendador começa no setup_hook, antes do cache de canais existir
+    await bot.wait_until_ready()
+    # Marca a execução antes de enviar: se outro processo já marcou este
+    # horário, a mensagem não é enviada de novo
+    if not await routine_repo.claim(routine.key, routine.last_run):
+        return
+    channel = bot.get_channel(routine.channel_id)
+    if channel:
+        await channel.send(routine.message)
+
+scheduler = Scheduler(send_rotina)
+# Rotinas importadas do rotinas.json sem servidor; o on_ready descobre pelo canal
+unassigned_routines = []
+
+async def schedule_routines():
+    for routine in await routine_repo.all():
+        if routine.guild_id is None:
+            unassigned_routines.append(routine)
+        # Cada processo só agenda as rotinas dos servidores dos seus shards
+        elif owns_guild(routine.guild_id):
+            scheduler.add(routine)
 
-# Salva as rotinas no arquivo JSON
-def save_rotinas():
-    with open('rotinas.json', 'w') as f:
-        json.dump(rotinas, f, indent=4)
+@bot.event
+async def setup_hook():
+    # Roda uma vez, depois do login e antes de conectar ao gateway: tudo que
+    # precisa estar pronto antes da primeira mensagem acontece aqui
+    started = time.perf_counter()
+    await db.open()
+    await db.run(migrate)
+    await db.run(import_legacy_routines, DEFAULT_TIMEZONE)
+    # As cargas são independentes; entram juntas na fila da thread do banco e
+    # os índices são montados enquanto as próximas consultas rodam
+    await asyncio.gather(
+        prefix_repo.load(),
+        roll_repo.warm(owns_guild),
+        roll_repo.names.warm(owns_guild),
+        power_repo.names.warm(owns_guild),
+        character_repo.names.warm(owns_guild),
+        schedule_routines(),
+    )
+    scheduler.start()
+    audit.start()
 
-# Dicionário para armazenar as rotinas
-rotinas = load_rotinas()
+    global metrics_server, cache_sync_task
+    if METRICS_PORT and metrics_server is None:
+        metrics_server = await serve_metrics(metrics, int(METRICS_PORT))
+    cache_sync_task = asyncio.create_task(watch_external_writes())
+    log.info("Inicialização concluída em %.2fs (%d rotinas agendadas, %d prefixos)",
+             time.perf_counter() - started, len(scheduler), len(prefix_repo.prefixes))
 
 @bot.event
 async def on_ready():
-    print(f'Bot conectado como {bot.user}')
-    # Reagendar todas as rotinas ao iniciar o bot
-    for horario, info in rotinas.items():
-        schedule.every().day.at(horario).do(lambda: asyncio.run_coroutine_threadsafe(
-            send_message(info['chat_id'], info['mensagem']), bot.loop))
+    await bot.change_presence(activity=discord.Game(name='$help Mommy Lass'))
+    # on_ready roda de novo a cada reconexão
+    if unassigned_routines:
+        for routine in unassigned_routines:
+            channel = bot.get_channel(routine.channel_id)
+            if channel:
+                routine.guild_id = channel.guild.id
+                await routine_repo.set_guild(routine.key, routine.guild_id)
+                if owns_guild(routine.guild_id):
+                    scheduler.add(routine)
+        unassigned_routines.clear()
+    log.info("Bot conectado como %s; pronto %.2fs após iniciar", bot.user, time.perf_counter() - STARTED_AT)
+
+# Desligamento (SIGTERM/SIGINT): nenhum comando novo começa, os que estão
+# rodando terminam, o agendador para e só então o bot desconecta; o banco é
+# fechado (com checkpoint do WAL) pelo main
+SHUTDOWN_TIMEOUT = 30.0
+shutting_down = False
+
+@bot.event
+async def on_message(message):
+    if not shutting_down:
+        await bot.process_commands(message)
+
+# O mesmo para comandos de barra (e autocompletes)
+async def accepting_interactions(interaction):
+    return not shutting_down
 
-    check_rotinas.start()  # Inicia a verificação das rotinas
+bot.tree.interaction_check = accepting_interactions
+
+async def shutdown():
+    global shutting_down
+    if shutting_down:
+        return
+    shutting_down = True
+    log.info("Desligando; aguardando %d comandos em andamento", in_flight.count)
+    if not await in_flight.drain(SHUTDOWN_TIMEOUT):
+        log.warning("%d comandos não terminaram a tempo", in_flight.count)
+    await scheduler.stop(timeout=SHUTDOWN_TIMEOUT)
+    await audit.close()
+    if cache_sync_task:
+        cache_sync_task.cancel()
+    if metrics_server:
+        metrics_server.close()
+    if trace_recorder:
+        trace_recorder.close()
+    await bot.close()
+
+# Com vários processos no mesmo banco, os caches em memória de um processo não
+# sabem das escritas dos outros; o PRAGMA data_version muda quando isso acontece
+CACHE_SYNC_INTERVAL = 5.0
+cache_sync_task = None
+
+async def watch_external_writes():
+    version = await db.data_version()
+    while True:
+        await asyncio.sleep(CACHE_SYNC_INTERVAL)
+        current = await db.data_version()
+        if current != version:
+            version = current
+            for repo in (power_repo, character_repo, roll_repo, easter_egg_repo):
+                repo.clear_cache()
+            await prefix_repo.load()
 
 @bot.command()
+@commands.guild_only()
 @commands.check(is_admin)
 async def rotina(ctx, horario: str, chat: int, *, mensagem: str):
     try:
         # Valida o formato do horário
-        valid_format = re.match(r"^\d{2}:\d{2}(:\d{2})?$", horario)
-        if not valid_format:
-            await ctx.send("Formato de horário inválido. Use HH:MM ou HH:MM:SS.")
+        parsed = parse_horario(horario)
+        if not parsed:
+            await ctx.send("Formato de horário inválido. Use HH:MM ou HH:MM:SS, opcionalmente com @Fuso/Horario (ex.: 08:00@America/Sao_Paulo).")
+            return
+        horario, timezone = parsed
+
+        if ctx.guild.get_channel(chat) is None:
+            await ctx.send(f"O canal <#{chat}> não pertence a este servidor.")
             return
 
         def format_message(msg):
             return re.sub(r'(^\w|\s\w)', lambda m: m.group().upper(), msg)
 
         formatted_message = format_message(mensagem)
-        
-        # Verifica se o horário já existe no dicionário
-        if horario not in rotinas:
-            rotinas[horario] = {}
-
-        # Salva a rotina no dicionário, usando chat_id como chave secundária
-        rotinas[horario][chat] = {
-            'mensagem': formatted_message
-        }
-        save_rotinas()  # Salva as rotinas no arquivo JSON
-
-        # Função para enviar a mensagem
-        async def send_message(chat_id, message):
-            channel = bot.get_channel(chat_id)
-            if channel:
-                await channel.send(message)
 
-        # Agenda a rotina para o horário especificado
-        schedule.every().day.at(horario).do(lambda: asyncio.run_coroutine_threadsafe(
-            send_message(chat, formatted_message), bot.loop))
+        # Salva a rotina no banco (substitui a que existir no mesmo canal e horário) e agenda
+        routine = await routine_repo.save(ctx.guild.id, chat, horario, timezone, formatted_message)
+        scheduler.add(routine)
 
-        await ctx.send(f"Rotina definida: `{horario}` no canal <#{chat}> com a mensagem:")
+        await ctx.send(f"Rotina definida: `{horario}` ({timezone}) no canal <#{chat}> com a mensagem:")
         await ctx.send(formatted_message)
     
     except Exception as e:
         await ctx.send(f"Ocorreu um erro: {str(e)}")
         
 @bot.command()
+@commands.guild_only()
 @commands.check(is_admin)
 async def deleterotina(ctx, horario: str, chat: int):
-    if horario in rotinas:
-        # Verifica se existe uma rotina específica para o horário e canal fornecidos
-        if chat in rotinas[horario]:
-            # Remove a rotina do dicionário
-            del rotinas[horario][chat]
-            
-            # Se não houver mais rotinas para esse horário, remova a entrada de horário
-            if not rotinas[horario]:
-                del rotinas[horario]
-            
-            save_rotinas()  # Salva as mudanças no arquivo JSON
-
-            await ctx.send(f"Rotina das {horario} no canal <#{chat}> foi removida com sucesso.")
-        else:
-            await ctx.send(f"Não foi encontrada nenhuma rotina para o horário {horario} no canal <#{chat}>.")
+    # Aceita as mesmas formas do $rotina; o fuso não faz parte da chave da rotina
+    parsed = parse_horario(horario)
+    if not parsed:
+        await ctx.send("Formato de horário inválido. Use HH:MM ou HH:MM:SS, opcionalmente com @Fuso/Horario.")
+        return
+    horario = parsed[0]
+    routine_id = await routine_repo.delete(ctx.guild.id, chat, horario)
+    if routine_id is not None:
+        scheduler.remove(routine_id)
+        await ctx.send(f"Rotina das {horario} no canal <#{chat}> foi removida com sucesso.")
     else:
-        await ctx.send(f"Não foi encontrada nenhuma rotina para o horário {horario}.")
+        await ctx.send(f"Não foi encontrada nenhuma rotina para o horário {horario} no canal <#{chat}>.")
 
 @bot.command()
+@commands.guild_only()
 async def listrotinas(ctx):
-    if not rotinas:
+    guild_rotinas = await routine_repo.for_guild(ctx.guild.id)
+    if not guild_rotinas:
         await ctx.send("Nenhuma rotina definida no momento.")
     else:
         response = "**Rotinas Definidas:**\n"
-        for horario, canais in rotinas.items():
-            for chat_id, info in canais.items():
-                response += f"- **Horário:** {horario} | **Canal:** <#{chat_id}> | **Mensagem:** {info['mensagem']}\n"
-        await ctx.send(response)
+        for routine in guild_rotinas:
+            horario = routine.time.isoformat(timespec='seconds' if routine.time.second else 'minutes')
+            response += (f"- **Horário:** {horario} ({routine.timezone}) | **Canal:** <#{routine.channel_id}> | "
+                         f"**Mensagem:** {routine.message}\n")
+        await send_long(ctx, response, filename='rotinas.txt')
 
 
 # Função para traduzir textos
@@ -175,87 +367,82 @@ def translate(text, lang):
 
 # Comando para adicionar um novo poder (somente para administradores)
 @bot.command()
+@commands.guild_only()
 @commands.check(is_admin)
 async def addpower(ctx, name: str, description: str, advantage: str, disadvantage: str, image: str = None):
-    c.execute("INSERT INTO powers (name, description, advantage, disadvantage, image, creator_id) VALUES (?, ?, ?, ?, ?, ?)", 
-              (name, description, advantage, disadvantage, image, ctx.author.id))
-    conn.commit()
+    if await power_repo.add(ctx.guild.id, name, description, advantage, disadvantage, image, ctx.author.id) is None:
+        await ctx.send(f'Já existe um poder chamado "{name}" neste servidor.')
+        return
     await ctx.send(f'Poder "{name}" adicionado com sucesso!')
 
 # Comando para listar todos os poderes
 @bot.command()
+@commands.guild_only()
 async def listpowers(ctx):
-    c.execute("SELECT name, description, advantage, disadvantage, image FROM powers")
-    powers = c.fetchall()
-    if not powers:
+    # Só a página atual (e uma pequena janela ao redor) é buscada no banco
+    pager = KeysetPager(partial(power_repo.page_after, ctx.guild.id), partial(power_repo.page_before, ctx.guild.id),
+                        partial(power_repo.page_at, ctx.guild.id))
+    if not await Paginator(pager, power_card).start(ctx):
         await ctx.send(translate("No powers available.", "pt"))
-        return
-
-    pages = []
-    for power in powers:
-        embed = discord.Embed(title=power[0], description=power[1], color=discord.Color.blue())
-        embed.add_field(name="Vantagem", value=power[2], inline=False)
-        embed.add_field(name="Desvantagem", value=power[3], inline=False)
-        if power[4]:
-            embed.set_image(url=power[4])
-        pages.append(embed)
-
-    message = await ctx.send(embed=pages[0])
-
-    # Adiciona reações de navegação
-    await message.add_reaction('◀️')
-    await message.add_reaction('▶️')
-
-    # Função para manipular a paginação
-    def check(reaction, user):
-        return user == ctx.author and str(reaction.emoji) in ['◀️', '▶️']
-
-    current_page = 0
-    while True:
-        try:
-            reaction, user = await bot.wait_for('reaction_add', timeout=60.0, check=check)
-            if str(reaction.emoji) == '▶️':
-                current_page += 1
-                if current_page >= len(pages):
-                    current_page = 0
-                await message.edit(embed=pages[current_page])
-                await message.remove_reaction(reaction, user)
-            elif str(reaction.emoji) == '◀️':
-                current_page -= 1
-                if current_page < 0:
-                    current_page = len(pages) - 1
-                await message.edit(embed=pages[current_page])
-                await message.remove_reaction(reaction, user)
-        except asyncio.TimeoutError:
-            break
 
 # Comando para excluir um poder
 @bot.command()
+@commands.guild_only()
 async def deletepower(ctx, name: str):
-    c.execute("DELETE FROM powers WHERE name = ? AND creator_id = ?", (name, ctx.author.id))
-    conn.commit()
-    if c.rowcount:
+    if await power_repo.delete(ctx.guild.id, name, ctx.author.id) is not None:
         await ctx.send(f'Poder "{name}" excluído com sucesso!')
     else:
         await ctx.send(f'Você não possui um poder chamado "{name}" ou não tem permissão para excluí-lo.')
 
+# Autocomplete dos comandos de barra: responde do índice em memória, sem ir ao banco
+async def power_name_autocomplete(interaction, current):
+    if interaction.guild_id is None:
+        return []
+    names = await power_repo.names.complete(interaction.guild_id, current)
+    return [app_commands.Choice(name=name[:100], value=name) for name in names]
+
+async def character_name_autocomplete(interaction, current):
+    if interaction.guild_id is None:
+        return []
+    names = await character_repo.names.complete(interaction.guild_id, current)
+    return [app_commands.Choice(name=name[:100], value=name) for name in names]
+
+async def roll_name_autocomplete(interaction, current):
+    if interaction.guild_id is None:
+        return []
+    names = await roll_repo.names.complete(interaction.guild_id, current)
+    return [app_commands.Choice(name=name[:100], value=name) for name in names]
+
 # Comando para buscar um poder específico
-@bot.command()
+@bot.hybrid_command(description="Mostra os detalhes de um poder")
+@commands.guild_only()
+@app_commands.describe(name="Nome do poder")
+@app_commands.autocomplete(name=power_name_autocomplete)
 async def getpower(ctx, name: str):
-    c.execute("SELECT name, description, advantage, disadvantage, image FROM powers WHERE name = ?", (name,))
-    power = c.fetchone()
+    power = await power_repo.get(ctx.guild.id, name)
     if power:
-        embed = discord.Embed(title=power[0], description=power[1], color=discord.Color.green())
-        embed.add_field(name="Vantagem", value=power[2], inline=False)
-        embed.add_field(name="Desvantagem", value=power[3], inline=False)
-        if power[4]:
-            embed.set_image(url=power[4])
-        await ctx.send(embed=embed)
+        await ctx.send(embed=power_card(power))
     else:
         await ctx.send(f'Poder "{name}" não encontrado.')
 
-# Comando para editar um poder existente
+# Comando para buscar poderes por texto (nome, descrição, vantagem e desvantagem)
 @bot.command()
+@commands.guild_only()
+async def searchpower(ctx, *, text: str):
+    results = await power_repo.search(ctx.guild.id, text)
+    if not results:
+        await ctx.send(f'Nenhum poder encontrado para "{text}".')
+        return
+    response = f'**Poderes encontrados para "{text}":**\n'
+    response += "".join(f"{i}. **{name}** — {snippet}\n" for i, (name, snippet) in enumerate(results, start=1))
+    await send_long(ctx, response)
+
+# Comando para editar um poder existente
+@bot.hybrid_command(description="Edita um campo de um poder seu")
+@commands.guild_only()
+@app_commands.describe(name="Nome do poder", field="description, advantage, disadvantage ou image",
+                       value="Novo valor")
+@app_commands.autocomplete(name=power_name_autocomplete)
 async def editpower(ctx, name: str, field: str, value: str):
     valid_fields = ["description", "advantage", "disadvantage", "image"]
     field_translation = {
@@ -267,19 +454,68 @@ async def editpower(ctx, name: str, field: str, value: str):
     if field not in valid_fields:
         await ctx.send(translate("Invalid field. Valid fields are: description, advantage, disadvantage, image.", "pt"))
         return
-    query = f"UPDATE powers SET {field} = ? WHERE name = ? AND creator_id = ?"
-    c.execute(query, (value, name, ctx.author.id))
-    conn.commit()
-    if c.rowcount:
+    if await power_repo.update(ctx.guild.id, name, field, value, ctx.author.id):
         await ctx.send(f'{field_translation[field]} do poder "{name}" atualizada com sucesso!')
     else:
         await ctx.send(f'Você não possui um poder chamado "{name}" ou não tem permissão para editá-lo.')
 
-# Comando para editar o prefixo
+# Comando para editar o prefixo deste servidor (somente para administradores)
 @bot.command()
+@commands.guild_only()
+@commands.check(is_admin)
 async def editprefix(ctx, new_prefix: str):
-    bot.command_prefix = new_prefix
-    await ctx.send(f'Prefixo atualizado para "{new_prefix}"')
+    if len(new_prefix) > MAX_PREFIX_LENGTH:
+        await ctx.send(f"O prefixo pode ter no máximo {MAX_PREFIX_LENGTH} caracteres.")
+        return
+    await prefix_repo.set(ctx.guild.id, new_prefix)
+    await ctx.send(f'Prefixo deste servidor atualizado para "{new_prefix}"')
+
+# Comando para ver as estatísticas dos caches (somente para administradores)
+@bot.command()
+@commands.check(is_admin)
+async def cachestats(ctx):
+    response = "**Estatísticas dos caches:**\n"
+    for label, cache in (("Poderes", power_repo.cache), ("Personagens", character_repo.cache),
+                         ("Rolls", roll_repo.cache)):
+        stats = cache.stats()
+        response += (f"- **{label}:** {stats['size']}/{stats['maxsize']} itens | "
+                     f"acertos {stats['hits']} | erros {stats['misses']} | "
+                     f"remoções {stats['evictions']} | expirados {stats['expirations']} | "
+                     f"taxa de acerto {stats['hit_rate']:.1%}\n")
+    await send_long(ctx, response)
+
+# Comando para registrar os comandos de barra no Discord (somente para administradores)
+@bot.command()
+@commands.check(is_admin)
+async def sync(ctx):
+    synced = await bot.tree.sync()
+    await ctx.send(f"{len(synced)} comandos de barra sincronizados.")
+
+# Comando para ver a latência dos comandos, do banco e da API (somente para administradores)
+@bot.command()
+@commands.check(is_admin)
+async def stats(ctx):
+    def latency(histogram):
+        p50, p95, p99 = (histogram.quantile(q) * 1000 for q in (0.5, 0.95, 0.99))
+        return f"p50 {p50:.1f}ms | p95 {p95:.1f}ms | p99 {p99:.1f}ms"
+
+    results = metrics.counters('lass_commands_total')
+    response = "**Comandos:**\n"
+    for labels, histogram in sorted(metrics.histograms('lass_command_duration_seconds').items(),
+                                    key=lambda item: -item[1].count):
+        command = labels[0][1]
+        errors = results.get((('command', command), ('status', 'error')), 0)
+        response += f"- **{command}:** {histogram.count} usos | {errors} erros | {latency(histogram)}\n"
+    response += "**Banco de dados:**\n"
+    for labels, histogram in sorted(metrics.histograms('lass_db_query_duration_seconds').items(),
+                                    key=lambda item: -item[1].count):
+        response += f"- **{labels[0][1]}:** {histogram.count} consultas | {latency(histogram)}\n"
+    requests = metrics.counters('lass_discord_http_requests_total')
+    response += f"**API do Discord:** {sum(requests.values())} chamadas REST\n"
+    for labels, count in sorted(requests.items(), key=lambda item: -item[1])[:10]:
+        method, route = labels[0][1], labels[1][1]
+        response += f"- `{method} {route}`: {count}\n"
+    await send_long(ctx, response, filename='stats.txt')
 
 # Remover o comando help padrão e adicionar o personalizado
 bot.remove_command('help')
@@ -289,38 +525,42 @@ async def custom_help(ctx):
     response = (
         "**Comandos Disponíveis:**\n"
         "`$addpower <nome> <descrição> <vantagem> <desvantagem> [imagem]` - Adiciona um novo poder (somente administradores)\n"
-        "`$listpowers` - Lista todos os poderes\n"
+        "`$listpowers` - Lista todos os poderes deste servidor\n"
         "`$deletepower <nome>` - Exclui um poder\n"
         "`$getpower <nome>` - Exibe os detalhes de um poder específico\n"
+        "`$searchpower <termos>` - Busca poderes pelo nome ou pelo texto\n"
         "`$editpower <nome> <campo> <valor>` - Edita um campo de um poder específico\n"
-        "`$editprefix <novo_prefixo>` - Edita o prefixo dos comandos do bot\n"
-        "`$Prandom` - Mostra um poder aleatório\n"
+        "`$editprefix <novo_prefixo>` - Edita o prefixo dos comandos neste servidor (somente administradores)\n"
+        "`$sync` - Registra os comandos de barra (/getpower, /editpower, /getcharacter, /roll) no Discord (somente administradores)\n"
+        "`$stats` - Mostra a latência dos comandos, do banco e da API (somente administradores)\n"
+        "`$cachestats` - Mostra as estatísticas dos caches (somente administradores)\n"
+        "`$Prandom [@criador]` - Mostra um poder aleatório (opcionalmente só de um criador)\n"
         "`$pergunta <pergunta>` - Responde uma pergunta com respostas pré-definidas\n"
+        "`$addeaster <gatilho> <resposta>` - Adiciona um easter egg ao $pergunta neste servidor (somente administradores)\n"
+        "`$deleteeaster <gatilho>` - Exclui um easter egg deste servidor (somente administradores)\n"
+        "`$listeaster` - Lista os easter eggs deste servidor\n"
         "`$addcharacter <nome> <descrição> <servidor> [imagem]` - Adiciona um novo personagem\n"
-        "`$listcharacters` - Lista todos os personagens\n"
+        "`$listcharacters` - Lista todos os personagens deste servidor\n"
         "`$deletecharacter <nome>` - Exclui um personagem\n"
         "`$getcharacter <nome>` - Exibe os detalhes de um personagem específico\n"
+        "`$searchcharacter <termos>` - Busca personagens pelo nome ou pela descrição\n"
         "`$editcharacter <nome> <campo> <valor>` - Edita um campo de um personagem específico\n"
+        "`$import <powers|characters|rolls>` - Importa itens de um arquivo .json, .jsonl ou .csv anexado (somente administradores)\n"
+        "`$export <powers|characters|rolls> [json|jsonl|csv]` - Exporta os itens deste servidor como arquivo (somente administradores)\n"
         "`$avatar [@usuario|ID]` - Mostra o avatar do usuário ou do usuário especificado\n"
-        "`$rollcreate <nome> <opções>` - Cria um novo roll (somente administradores)\n"
+        "`$rollcreate <nome> <opções>` - Cria um novo roll; use `opção:peso` para pesos (somente administradores)\n"
         "`$rolldelete <nome>` - Exclui um roll (somente administradores)\n"
-        "`$roll <nome>` - Escolhe uma opção aleatória de um roll\n"
+        "`$roll <nome> [xN]` - Escolhe uma (ou N) opções aleatórias de um roll\n"
         "`$choose <opções>` - Escolhe uma opção aleatória das opções fornecidas\n"    
-        "`$dado xdy` - Rola um dado com x dados de y lados\n"
+        "`$dado <expressão>` - Rola dados (ex.: `2d6`, `4d6kh3+2`, `3d6!`, `100000d20 sum`)\n"
         "`$convertimage` - Converte uma imagem para link.\n" 
-        "`$ban <usuário> [motivo]` - Bane um usuário do servidor (requer permissões de banir membros)\n"
-        "`$kick <usuário> [motivo]` - Expulsa um usuário do servidor (requer permissões de expulsar membros)\n"
-        "`$rotina <horário> <ID do Chat> <mensagem>` - Define uma rotina diária no horário especificado\n"
+        "`$ban <usuário> [usuário...] [motivo]` - Bane um ou mais usuários do servidor (requer permissões de banir membros)\n"
+        "`$kick <usuário> [usuário...] [motivo]` - Expulsa um ou mais usuários do servidor (requer permissões de expulsar membros)\n"
+        "`$rotina <horário[@fuso]> <ID do Chat> <mensagem>` - Define uma rotina diária no horário especificado\n"
         "`$listrotinas` - Lista todas as rotinas definidas\n"
         "`$deleterotina <horário> <ID do Chat>` - Remove uma rotina no horário especificado\n"
     )
-    await ctx.send(response)
-
-
-@bot.event
-async def on_ready():
-    await bot.change_presence(activity=discord.Game(name='$help Mommy Lass'))
-    print(f'Bot conectado como {bot.user}')
+    await send_long(ctx, response)
 
 
 # Comando para exibir o avatar do usuário ou de um usuário especificado
@@ -331,20 +571,13 @@ async def avatar(ctx, user: discord.User = None):
 
 # Comando para exibir um poder aleatório
 @bot.command()
-async def Prandom(ctx):
-    c.execute("SELECT name, description, advantage, disadvantage, image FROM powers ORDER BY RANDOM() LIMIT 1")
-    power = c.fetchone()
+@commands.guild_only()
+async def Prandom(ctx, creator: discord.User = None):
+    # Sorteio em O(1) sobre o índice de ids em memória; opcionalmente só
+    # entre os poderes criados por um usuário
+    power = await power_repo.random(ctx.guild.id, creator.id if creator else None, rng=rng.fast)
     if power:
-        embed = discord.Embed(
-            title=power[0],
-            description=power[1],
-            color=discord.Color.blue()  # Escolha uma cor para o embed
-        )
-        embed.add_field(name="Vantagem", value=power[2], inline=False)
-        embed.add_field(name="Desvantagem", value=power[3], inline=False)
-        if power[4]:
-            embed.set_image(url=power[4])
-        await ctx.send(embed=embed)
+        await ctx.send(embed=power_card(power))
     else:
         await ctx.send(translate("No powers available.", "pt"))
 
@@ -355,28 +588,10 @@ async def pergunta(ctx, *, question: str):
         "Sim", "Não", "Com certeza", "Nem ferrando", "Tem duvidas?", 
         "Tenho minhas duvidas", "Talvez", "Pergunta pro Carlim", "Capaz", "Se quiser sim mano"
     ]
-    easter_eggs = {
-        "Yandere Lotus": "Não me envolvo com essas parada.",
-        "Vou te nerfar": f"Eu te nerfo antes! **Nerfa {ctx.author.mention}**",
-        "Mediador": "O metavekh... Como é lindo os mistérios dessa praga... Não vou te contar nada.",
-        "Mergulhadores": "Ei... Eles não estão por perto né?",
-        "Observadores": "Como esse cara são irritantes... **Despawna um observador aleatorio**",
-        "Tia do Gusta": "AUREA? CADE? ONDE?",
-        "conte sua lore": "Ah sim, então você quer saber minha história? Eu sou a líder dos mergulhadores... Não posso te contar mais sobre isso.",
-        "Yin": "Ah sim, a gentil Yin... Preciso fazer uma visita a ela.",
-        "Emissor": "Emissor? Odeio quando ele me ignora.",
-        "Mandy": "A cópia bem feita dos mergulhadores? Hehe.",
-        "Bruxa": "A bruxa... Sabia que seu nome é %ßðßðéþ©?",
-        "Kaitostem": "A velha bruxa é uma mediadora de verdade?",
-        "ʞɔ Lu ЯΛ Rakku KKЦ ck n˥": "Mano... Primeiramente, como você digitou isso certo? Segundamente, não fale com esse cara.",
-        "Lass... E aquilo?": "https://tenor.com/view/peter-parker-peter-parker-tempted-tempted-gif-23970167",
-        "2015": "https://tenor.com/view/jujutsu-kaisen-jujutsu-kaisen-yuuji-itadori-itadori-gif-19729870",
-        "Yui": "Não falamos da Yui... **Sai do Local antes que ela nerfe minha versão com o Emissor**",
-        "Ashley": "Talvez eu tenha a julgado mal...",
-        "Lotus": "Lotus tem mais é que se fuder mesmo!"
-    }
-
-    triggered_eggs = [response for trigger, response in easter_eggs.items() if trigger.lower() in question.lower()]
+    # Os easter eggs ficam no banco e são compilados num autômato por servidor;
+    # basta achar dois distintos para saber que é o caso da "neblina"
+    matcher = await easter_egg_repo.matcher(ctx.guild.id if ctx.guild else None)
+    triggered_eggs = matcher.match(question, limit=2)
     if triggered_eggs:
         if len(triggered_eggs) > 1:
             await ctx.send(
@@ -387,104 +602,107 @@ async def pergunta(ctx, *, question: str):
                 "Não importa em que galáxia você viva, ao olhar para o universo"
             )
         else:
-            await ctx.send(triggered_eggs[0])
+            await ctx.send(triggered_eggs[0].replace("{mention}", ctx.author.mention))
+    else:
+        await ctx.send(rng.fast.choice(responses))
+
+# Comando para adicionar um easter egg do $pergunta neste servidor (somente para administradores)
+@bot.command()
+@commands.guild_only()
+@commands.check(is_admin)
+async def addeaster(ctx, trigger: str, *, response: str):
+    if await easter_egg_repo.add(ctx.guild.id, trigger, response, ctx.author.id) is None:
+        await ctx.send(f'Já existe um easter egg com o gatilho "{trigger}" neste servidor.')
+        return
+    await ctx.send(f'Easter egg "{trigger}" adicionado com sucesso!')
+
+# Comando para excluir um easter egg deste servidor (somente para administradores)
+@bot.command()
+@commands.guild_only()
+@commands.check(is_admin)
+async def deleteeaster(ctx, *, trigger: str):
+    if await easter_egg_repo.delete(ctx.guild.id, trigger):
+        await ctx.send(f'Easter egg "{trigger}" excluído com sucesso!')
     else:
-        await ctx.send(random.choice(responses))
+        await ctx.send(f'Não existe um easter egg com o gatilho "{trigger}" neste servidor.')
+
+# Comando para listar os easter eggs deste servidor
+@bot.command()
+@commands.guild_only()
+async def listeaster(ctx):
+    eggs = await easter_egg_repo.for_guild(ctx.guild.id)
+    if not eggs:
+        await ctx.send("Nenhum easter egg próprio deste servidor.")
+        return
+    response = "**Easter eggs do servidor:**\n" + "".join(f"- **{trigger}:** {egg}\n" for trigger, egg in eggs)
+    await send_long(ctx, response, filename='easter_eggs.txt')
 
 
 # Comando para adicionar um novo personagem
 @bot.command()
+@commands.guild_only()
 async def addcharacter(ctx, name: str, description: str, server: str, image: str = None):
     # Verifica se a URL da imagem é válida antes de inserir no banco de dados
     if image and not validators.url(image):
         await ctx.send("URL da imagem inválida. Certifique-se de fornecer uma URL válida começando com http:// ou https://.")
         return
     
-    c.execute("INSERT INTO characters (name, description, server, image, creator_id) VALUES (?, ?, ?, ?, ?)",
-              (name, description, server, image, ctx.author.id))
-    conn.commit()
+    if await character_repo.add(ctx.guild.id, name, description, server, image, ctx.author.id) is None:
+        await ctx.send(f'Você já possui um personagem chamado "{name}".')
+        return
     await ctx.send("Personagem adicionado com sucesso!")
 
 @bot.command()
+@commands.guild_only()
 async def listcharacters(ctx):
-    c.execute("SELECT name, description, server, image FROM characters")
-    characters = c.fetchall()
-    
-    if not characters:
+    pager = KeysetPager(partial(character_repo.page_after, ctx.guild.id), partial(character_repo.page_before, ctx.guild.id),
+                        partial(character_repo.page_at, ctx.guild.id))
+    if not await Paginator(pager, character_card).start(ctx):
         await ctx.send("Não há personagens disponíveis no momento.")
-        return
-    
-    index = 0
-    embed = create_character_embed(characters[index])
-    message = await ctx.send(embed=embed)
-    
-    # Adicionar botões de avançar e voltar
-    await message.add_reaction('⬅️')
-    await message.add_reaction('➡️')
-    
-    def check(reaction, user):
-        return user == ctx.author and str(reaction.emoji) in ['⬅️', '➡️'] and reaction.message == message
-    
-    while True:
-        try:
-            reaction, user = await bot.wait_for('reaction_add', timeout=60.0, check=check)
-            
-            if str(reaction.emoji) == '➡️' and index < len(characters) - 1:
-                index += 1
-            elif str(reaction.emoji) == '⬅️' and index > 0:
-                index -= 1
-            
-            embed = create_character_embed(characters[index])
-            await message.edit(embed=embed)
-            
-            # Limpar todas as reações antes de adicionar novas
-            await message.clear_reactions()
-            await message.add_reaction('⬅️')
-            await message.add_reaction('➡️')
-        
-        except asyncio.TimeoutError:
-            break
 
 # Comando para excluir um personagem
 @bot.command()
+@commands.guild_only()
 async def deletecharacter(ctx, name: str):
-    c.execute("DELETE FROM characters WHERE name = ? AND creator_id = ?", (name, ctx.author.id))
-    conn.commit()
-    if c.rowcount:
+    if await character_repo.delete(ctx.guild.id, name, ctx.author.id) is not None:
         await ctx.send(translate("Character deleted successfully!", "pt"))
     else:
         await ctx.send(translate("Character not found.", "pt"))
 
 # Comando para exibir
-@bot.command()
+@bot.hybrid_command(description="Mostra os detalhes de um personagem")
+@commands.guild_only()
+@app_commands.describe(name="Nome do personagem")
+@app_commands.autocomplete(name=character_name_autocomplete)
 async def getcharacter(ctx, name: str):
-    c.execute("SELECT name, description, server, image FROM characters WHERE name = ?", (name,))
-    character = c.fetchone()
+    character = await character_repo.get(ctx.guild.id, name)
     
     if not character:
         await ctx.send("Personagem não encontrado.")
         return
     
-    embed = create_character_embed(character)
-    await ctx.send(embed=embed)
+    await ctx.send(embed=character_card(character))
 
-def create_character_embed(character):
-    embed = discord.Embed(title=character[0], description=character[1], color=discord.Color.blue())
-    embed.add_field(name="Servidor", value=character[2], inline=False)
-    if character[3]:
-        embed.set_image(url=character[3])
-    return embed
+# Comando para buscar personagens por texto (nome e descrição)
+@bot.command()
+@commands.guild_only()
+async def searchcharacter(ctx, *, text: str):
+    results = await character_repo.search(ctx.guild.id, text)
+    if not results:
+        await ctx.send(f'Nenhum personagem encontrado para "{text}".')
+        return
+    response = f'**Personagens encontrados para "{text}":**\n'
+    response += "".join(f"{i}. **{name}** — {snippet}\n" for i, (name, snippet) in enumerate(results, start=1))
+    await send_long(ctx, response)
 
 # Comando para editar um personagem existente
 @bot.command()
+@commands.guild_only()
 async def editcharacter(ctx, name: str, field: str, value: str):
     if field not in ["description", "server", "image"]:
         await ctx.send(translate("Invalid field. Valid fields are: description, server, image.", "pt"))
         return
-    query = f"UPDATE characters SET {field} = ? WHERE name = ? AND creator_id = ?"
-    c.execute(query, (value, name, ctx.author.id))
-    conn.commit()
-    if c.rowcount:
+    if await character_repo.update(ctx.guild.id, name, field, value, ctx.author.id):
         await ctx.send(translate("Character updated successfully!", "pt"))
     else:
         await ctx.send(translate("Character not found.", "pt"))
@@ -494,11 +712,14 @@ async def editcharacter(ctx, name: str, field: str, value: str):
 @commands.check(is_admin)
 async def rollcreate(ctx, name: str, *, options: str):
     name = name.lower()
-    options = options.lower()
+    options = parse_options(options.lower())
+    if not options:
+        await ctx.send("Informe pelo menos uma opção, separadas por vírgula (ex.: `a, b:3, c`).")
+        return
 
-    c.execute("INSERT INTO rolls (server_id, name, options, creator_id) VALUES (?, ?, ?, ?)",
-              (ctx.guild.id, name, options, ctx.author.id))
-    conn.commit()
+    if await roll_repo.create(ctx.guild.id, name, options, ctx.author.id) is None:
+        await ctx.send(f'Já existe um roll chamado "{name}" neste servidor.')
+        return
     await ctx.send(translate("Roll created successfully!", "pt"))
 
 # Comando para excluir um roll (somente para administradores)
@@ -506,53 +727,109 @@ async def rollcreate(ctx, name: str, *, options: str):
 @commands.check(is_admin)
 async def rolldelete(ctx, name: str):
     name = name.lower()  # Convertendo o nome para minúsculas
-    c.execute("DELETE FROM rolls WHERE server_id = ? AND name = ?", (ctx.guild.id, name))
-    conn.commit()
-    if c.rowcount:
+    if await roll_repo.delete(ctx.guild.id, name):
         await ctx.send(translate("Roll deleted successfully!", "pt"))
     else:
         await ctx.send(translate("Roll not found.", "pt"))
 
-# Comando para usar um roll
-@bot.command()
-async def roll(ctx, name: str):
+# Comando para usar um roll (com `xN` sorteia N vezes de uma vez)
+MAX_ROLL_DRAWS = 100
+
+@bot.hybrid_command(description="Sorteia uma opção de um roll deste servidor")
+@commands.guild_only()
+@app_commands.describe(name="Nome do roll", quantity=f"Quantas vezes sortear, ex.: x3 (até x{MAX_ROLL_DRAWS})")
+@app_commands.autocomplete(name=roll_name_autocomplete)
+async def roll(ctx, name: str, quantity: str = None):
     name = name.lower()  # Convertendo o nome para minúsculas
-    c.execute("SELECT options FROM rolls WHERE server_id = ? AND name = ?", (ctx.guild.id, name))
-    roll = c.fetchone()
-    if roll:
-        options = roll[0].split(',')
-        await ctx.send(random.choice(options))
+    count = 1
+    if quantity is not None:
+        match = re.fullmatch(r"x(\d+)", quantity.lower())
+        if not match or not 1 <= int(match.group(1)) <= MAX_ROLL_DRAWS:
+            await ctx.send(f"Quantidade inválida. Use `x<N>` com N entre 1 e {MAX_ROLL_DRAWS}.")
+            return
+        count = int(match.group(1))
+
+    table = await roll_repo.get_table(ctx.guild.id, name)
+    if table:
+        await send_long(ctx, ", ".join(table.draw_many(count, rng.fast)), filename=f"{name}.txt")
     else:
         await ctx.send(translate("Roll not found.", "pt"))
 
+# Comando para importar poderes, personagens ou rolls de um arquivo anexado (somente para administradores)
+@bot.command(name='import')
+@commands.guild_only()
+@commands.check(is_admin)
+async def import_command(ctx, kind: str):
+    kind = kind.lower()
+    if kind not in BULK_KINDS or not ctx.message.attachments:
+        await ctx.send(f"Use `$import <{'|'.join(BULK_KINDS)}>` com um arquivo .json, .jsonl ou .csv anexado.")
+        return
+
+    attachment = ctx.message.attachments[0]
+    extension = os.path.splitext(attachment.filename)[1].lower()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, f'import{extension}')
+        await attachment.save(path)
+        try:
+            # Tudo numa transação só: um erro no meio do arquivo não deixa nada pela metade
+            imported, ignored = await db.transaction(import_file, kind, path, ctx.guild.id, ctx.author.id)
+        except ValueError as e:
+            await ctx.send(f"Não foi possível importar o arquivo: {e}")
+            return
+
+    {'powers': power_repo, 'characters': character_repo, 'rolls': roll_repo}[kind].clear_cache()
+    await ctx.send(f"{imported} itens importados, {ignored} ignorados (inválidos ou com nome repetido).")
+
+# Comando para exportar poderes, personagens ou rolls deste servidor como arquivo (somente para administradores)
+@bot.command(name='export')
+@commands.guild_only()
+@commands.check(is_admin)
+async def export_command(ctx, kind: str, fmt: str = 'json'):
+    kind, fmt = kind.lower(), fmt.lower()
+    if kind not in BULK_KINDS or fmt not in BULK_FORMATS:
+        await ctx.send(f"Use `$export <{'|'.join(BULK_KINDS)}> [{'|'.join(BULK_FORMATS)}]`.")
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, f'{kind}.{fmt}')
+        count = await export_file(db, kind, fmt, ctx.guild.id, path)
+        if os.path.getsize(path) > ctx.guild.filesize_limit:
+            await ctx.send("O arquivo exportado passou do limite de upload do servidor.")
+            return
+        await ctx.send(f"{count} itens exportados.", file=discord.File(path))
+
 # Comando para escolher uma opção aleatória
 @bot.command()
 async def choose(ctx, *, options: str):
     options_list = options.split(',')
-    await ctx.send(random.choice(options_list))
+    await ctx.send(rng.fast.choice(options_list))
 
 @bot.command()
-async def dado(ctx, dice: str):
+# Uma rolagem por usuário de cada vez: as grandes ocupam uma thread por segundos
+@commands.max_concurrency(1, per=commands.BucketType.user)
+async def dado(ctx, *, dice: str):
+    # Rolagens grandes rodam numa thread para não travar o event loop, com um gerador só delas
     try:
-        rolls, sides = map(int, dice.lower().split('d'))
-    except Exception as e:
-        await ctx.send("Formato inválido. Use o formato xdy onde x é o número de dados e y é o número de lados.")
+        result = await asyncio.to_thread(roll_dice, dice, rng.spawn())
+    except DiceError as e:
+        await ctx.send(f"{e} Exemplos: `2d6`, `4d6kh3+2`, `3d6!`, `100000d20 sum`.")
         return
 
-    if rolls < 1 or rolls > 1000 or sides < 2 or sides > 99999999:
-        await ctx.send("Por favor, mantenha o número de dados entre 1 e 1000 e o número de lados entre 2 e 99999999.")
-        return
+    await send_long(ctx, format_dice_result(result), filename='dados.txt')
 
-    results = [random.randint(1, sides) for _ in range(rolls)]
-    await ctx.send(f"Resultados do dado {dice}: {', '.join(map(str, results))}")
+@dado.error
+async def dado_error(ctx, error):
+    if isinstance(error, commands.MaxConcurrencyReached):
+        await ctx.send("Espere a sua rolagem anterior terminar antes de rolar de novo.")
+    else:
+        log.error("Erro no $dado", exc_info=error)
 
 # Comando de humor
 @bot.command()
 async def humor(ctx):
     user_id = ctx.author.id
-    # Verificar o dia atual para determinar a resposta
-    current_day = datetime.datetime.now().day
-    random.seed(user_id + current_day)  # Seed para garantir a mesma resposta no mesmo dia
+    # Gerador do usuário no dia, para garantir a mesma resposta o dia todo
+    daily = rng.daily(user_id)
 
     # Respostas padrão
     responses = [
@@ -573,7 +850,7 @@ async def humor(ctx):
     if user_id in custom_responses:
         await ctx.send(custom_responses[user_id])
     else:
-        await ctx.send(random.choice(responses))
+        await ctx.send(daily.choice(responses))
 
 @bot.command()
 async def convertimage(ctx):
@@ -584,32 +861,69 @@ async def convertimage(ctx):
     image_urls = [attachment.url for attachment in ctx.message.attachments]
 
     if image_urls:
-        await ctx.send("Links das imagens anexadas:\n" + "\n".join([f"```{url}```" for url in image_urls]))
+        await send_long(ctx, "Links das imagens anexadas:\n" + "\n".join([f"```{url}```" for url in image_urls]))
     else:
         await ctx.send("Nenhuma imagem anexada encontrada.")
 
+# Aplica o ban/kick a todos os membros em paralelo, registra cada resultado
+# na auditoria e responde com um resumo (numa raid podem ser centenas)
+MODERATION_ACTIONS = {
+    'ban': ("banido", "banir"),
+    'kick': ("expulso", "expulsar"),
+}
+
+async def moderate(ctx, action, members, reason):
+    if not members:
+        await ctx.send(f"Mencione ao menos um membro: `{ctx.clean_prefix}{action} <usuário> [usuário...] [motivo]`.")
+        return
+    done, verb = MODERATION_ACTIONS[action]
+    # Sem repetir quem foi mencionado duas vezes
+    members = list({member.id: member for member in members}.values())
+    results = await apply_to_members(members, lambda member: getattr(member, action)(reason=reason))
+    lines = []
+    for member, error in results:
+        audit.record(ctx.guild.id, ctx.author.id, member.id, action, reason, error)
+        lines.append(f'Usuário {member} foi {done} por {reason}.' if error is None else f'Erro ao {verb} {member}: {error}')
+    await send_long(ctx, "\n".join(lines), filename=f'{action}.txt')
+
 @bot.command()
+@commands.guild_only()
 @commands.has_permissions(ban_members=True)
-async def ban(ctx, member: discord.Member, *, reason=None):
-    try:
-        await member.ban(reason=reason)
-        await ctx.send(f'Usuário {member} foi banido por {reason}.')
-    except Exception as e:
-        await ctx.send(f'Erro ao banir {member}: {str(e)}')
+async def ban(ctx, members: commands.Greedy[MentionedMember], *, reason=None):
+    await moderate(ctx, 'ban', members, reason)
 
 @bot.command()
+@commands.guild_only()
 @commands.has_permissions(kick_members=True)
-async def kick(ctx, member: discord.Member, *, reason=None):
-    try:
-        await member.kick(reason=reason)
-        await ctx.send(f'Usuário {member} foi expulso por {reason}.')
-    except Exception as e:
-        await ctx.send(f'Erro ao expulsar {member}: {str(e)}')
+async def kick(ctx, members: commands.Greedy[MentionedMember], *, reason=None):
+    await moderate(ctx, 'kick', members, reason)
 
 # Comando que apenas mostra o status personalizado e não pode ser executado
 @bot.command()
 async def status(ctx):
     await ctx.send('Este comando é apenas para mostrar o status personalizado do bot.')
 
-# Inicializando o bot com o token
-bot.run(TOKEN)
\ No newline at end of file
+async def main():
+    discord.utils.setup_logging()
+    loop = asyncio.get_running_loop()
+    shutdown_task = None
+
+    def on_signal():
+        nonlocal shutdown_task
+        shutdown_task = shutdown_task or asyncio.create_task(shutdown())
+
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(signum, on_signal)
+        except NotImplementedError:
+            pass  # Windows: Ctrl+C ainda encerra, mas sem esperar os comandos
+    try:
+        async with bot:
+            await bot.start(TOKEN)
+    finally:
+        await asyncio.to_thread(db.close)
+        log.info("Banco fechado")
+
+# Inicializando o bot com o token (importar o módulo, como faz o replay.py, não conecta)
+if __name__ == '__main__':
+    asyncio.run(main())
\ No newline at end of file
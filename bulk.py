@@ -0,0 +1,216 @@
+"""Importação e exportação em massa de poderes, personagens e rolls.
+
+A importação lê o arquivo aos poucos e insere tudo com executemany numa
+única transação: ou o arquivo inteiro entra, ou nada entra. Linhas sem
+algum campo obrigatório (os mesmos que o $addpower/$addcharacter pedem),
+com URL de imagem inválida ou cujo nome já existe no servidor são ignoradas.
+
+A exportação escreve o arquivo em blocos de EXPORT_CHUNK linhas (keyset
+pagination no id), então nem a tabela nem o arquivo ficam inteiros em
+memória, e outras consultas do bot rodam entre um bloco e outro.
+
+Formatos: CSV com cabeçalho, JSON (uma lista de objetos) e JSON Lines.
+Nos rolls, `options` usa a mesma sintaxe do $rollcreate ("a, b:3, c"); no
+JSON também pode ser uma lista de opções ou de pares [opção, peso].
+"""
+
+import csv
+import json
+import os
+
+import validators
+
+from rolltables import parse_options
+
+EXPORT_CHUNK = 1000
+FORMATS = ('json', 'jsonl', 'csv')
+
+# Colunas de cada tipo, na ordem do arquivo exportado
+KINDS = {
+    'powers': ('name', 'description', 'advantage', 'disadvantage', 'image', 'creator_id'),
+    'characters': ('name', 'description', 'server', 'image', 'creator_id'),
+    'rolls': ('name', 'options', 'creator_id'),
+}
+# Colunas que não podem faltar nem ficar vazias
+REQUIRED = {
+    'powers': ('name', 'description', 'advantage', 'disadvantage'),
+    'characters': ('name', 'description', 'server'),
+    'rolls': ('name', 'options'),
+}
+
+
+class BulkError(ValueError):
+    pass
+
+
+def read_records(path):
+    """Gera os registros (dicionários) do arquivo, conforme a extensão."""
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        if extension == '.csv':
+            try:
+                yield from csv.DictReader(f)
+            except csv.Error as e:
+                raise BulkError(f"CSV inválido: {e}.") from None
+            return
+        if extension not in ('.json', '.jsonl'):
+            raise BulkError("Formato não suportado. Use um arquivo .json, .jsonl ou .csv.")
+        first = f.read(1)
+        while first.isspace():
+            first = f.read(1)
+        if first == '[':
+            # Uma lista JSON precisa ser lida inteira; JSON Lines é lido linha a linha
+            f.seek(0)
+            records = json.load(f)
+            yield from records
+            return
+        f.seek(0)
+        for number, line in enumerate(f, start=1):
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    raise BulkError(f"JSON inválido na linha {number}.") from None
+
+
+def _text(value):
+    if value is None:
+        return None
+    return str(value).strip()
+
+
+def _value(record, column):
+    value = _text(record.get(column))
+    # Imagem vazia no CSV significa "sem imagem"
+    return value or None if column == 'image' else value
+
+
+def _creator(record, default):
+    try:
+        return int(record.get('creator_id') or default)
+    except (TypeError, ValueError):
+        return default
+
+
+def _valid(record, kind):
+    if not isinstance(record, dict):
+        return False
+    if not all(_text(record.get(column)) for column in REQUIRED[kind]):
+        return False
+    image = _value(record, 'image')
+    return not image or bool(validators.url(image))
+
+
+def _roll_options(value):
+    if isinstance(value, list):
+        value = ', '.join(f"{item[0]}:{item[1]}" if isinstance(item, (list, tuple)) else str(item) for item in value)
+    return parse_options((value or '').lower())
+
+
+def import_file(conn, kind, path, guild_id, creator_id):
+    """Importa o arquivo para o servidor; retorna (importados, ignorados).
+
+    Deve rodar dentro de uma transação (Database.transaction).
+    """
+    total = 0
+
+    def records():
+        nonlocal total
+        for record in read_records(path):
+            total += 1
+            if _valid(record, kind):
+                yield record
+
+    if kind == 'rolls':
+        imported = 0
+        for record in records():
+            options = _roll_options(record.get('options'))
+            if not options:
+                continue
+            cursor = conn.execute(
+                "INSERT INTO rolls (server_id, name, creator_id) VALUES (?, ?, ?) ON CONFLICT DO NOTHING",
+                (guild_id, _text(record['name']).lower(), _creator(record, creator_id)))
+            if cursor.rowcount:
+                conn.executemany(
+                    "INSERT INTO roll_options (roll_id, option, weight) VALUES (?, ?, ?)",
+                    [(cursor.lastrowid, option, weight) for option, weight in options])
+                imported += 1
+        return imported, total - imported
+
+    columns = KINDS[kind][:-1]
+    rows = ((guild_id, _creator(record, creator_id), *(_value(record, column) for column in columns))
+            for record in records())
+    cursor = conn.executemany(
+        f"INSERT INTO {kind} (guild_id, creator_id, {', '.join(columns)}) "
+        f"VALUES (?, ?, {', '.join('?' * len(columns))}) ON CONFLICT DO NOTHING", rows)
+    return cursor.rowcount, total - cursor.rowcount
+
+
+class _JsonWriter:
+    def __init__(self, file, lines):
+        self.file = file
+        self.lines = lines
+        self.count = 0
+        if not lines:
+            file.write('[')
+
+    def write(self, record):
+        line = json.dumps(record, ensure_ascii=False)
+        if self.lines:
+            self.file.write(line + '\n')
+        else:
+            self.file.write(('\n' if not self.count else ',\n') + line)
+        self.count += 1
+
+    def close(self):
+        if not self.lines:
+            self.file.write('\n]\n')
+
+
+class _CsvWriter:
+    def __init__(self, file, columns):
+        self.writer = csv.DictWriter(file, fieldnames=columns)
+        self.writer.writeheader()
+        self.count = 0
+
+    def write(self, record):
+        self.writer.writerow(record)
+        self.count += 1
+
+    def close(self):
+        pass
+
+
+def _export_chunk(conn, kind, guild_id, after_id, writer):
+    """Escreve o próximo bloco de linhas; retorna o último id, ou None no fim."""
+    if kind == 'rolls':
+        rows = conn.execute(
+            "SELECT id, name, creator_id FROM rolls WHERE server_id = ? AND id > ? ORDER BY id LIMIT ?",
+            (guild_id, after_id, EXPORT_CHUNK)).fetchall()
+        options = {}
+        if rows:
+            for roll_id, option, weight in conn.execute(
+                    f"SELECT roll_id, option, weight FROM roll_options WHERE roll_id IN ({', '.join('?' * len(rows))}) "
+                    f"ORDER BY id", [row[0] for row in rows]):
+                options.setdefault(roll_id, []).append(option if weight == 1 else f"{option}:{weight:g}")
+        for roll_id, name, creator_id in rows:
+            writer.write({'name': name, 'options': ', '.join(options.get(roll_id, ())), 'creator_id': creator_id})
+    else:
+        columns = KINDS[kind]
+        rows = conn.execute(
+            f"SELECT id, {', '.join(columns)} FROM {kind} WHERE guild_id = ? AND id > ? ORDER BY id LIMIT ?",
+            (guild_id, after_id, EXPORT_CHUNK)).fetchall()
+        for row in rows:
+            writer.write(dict(zip(columns, row[1:])))
+    return rows[-1][0] if rows else None
+
+
+async def export_file(db, kind, fmt, guild_id, path):
+    """Exporta as linhas do servidor para `path`; retorna quantas foram escritas."""
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = _CsvWriter(f, KINDS[kind]) if fmt == 'csv' else _JsonWriter(f, lines=fmt == 'jsonl')
+        after_id = 0
+        while after_id is not None:
+            after_id = await db.run(_export_chunk, kind, guild_id, after_id, writer)
+        writer.close()
+    return writer.count
@@ -0,0 +1,27 @@
+import discord
+
+
+def power_embed(name, description, advantage, disadvantage, image):
+    embed = discord.Embed(title=name, description=description, color=discord.Color.blue())
+    embed.add_field(name="Vantagem", value=advantage, inline=False)
+    embed.add_field(name="Desvantagem", value=disadvantage, inline=False)
+    if image:
+        embed.set_image(url=image)
+    return embed
+
+
+def character_embed(name, description, server, image):
+    embed = discord.Embed(title=name, description=description, color=discord.Color.blue())
+    embed.add_field(name="Servidor", value=server, inline=False)
+    if image:
+        embed.set_image(url=image)
+    return embed
+
+
+# As linhas dos repositórios vêm com o id na frente, que o card não mostra
+def power_card(row):
+    return power_embed(*row[1:])
+
+
+def character_card(row):
+    return character_embed(*row[1:])
@@ -0,0 +1,104 @@
+"""Roda o bot em vários processos, cada um com uma fatia dos shards.
+
+Uso:
+    python cluster.py --processes 4              # número de shards recomendado pelo Discord
+    python cluster.py --processes 2 --shards 8
+
+O processo principal aplica as migrações uma única vez, divide os shards
+entre os workers (via SHARD_COUNT/SHARD_IDS) e reinicia quem cair. Todos
+usam o mesmo powers.db em modo WAL; as rotinas de cada servidor só são
+agendadas pelo processo que tem o shard dele, e cada disparo é marcado no
+banco antes do envio, então uma rotina nunca é enviada duas vezes.
+"""
+
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+
+from dotenv import load_dotenv
+
+from database import Database
+from migrations import import_legacy_routines, migrate
+
+# Um worker que cair logo depois de iniciar espera esse tempo antes de voltar
+RESTART_DELAY = 10.0
+
+
+def recommended_shards(token):
+    """Número de shards que o Discord recomenda para o bot."""
+    request = urllib.request.Request('https://discord.com/api/v10/gateway/bot', headers={
+        'Authorization': f'Bot {token}',
+        'User-Agent': 'DiscordBot (https://github.com/Rapptz/discord.py, 2)',
+    })
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return json.load(response)['shards']
+
+
+def split_shards(shard_count, processes):
+    """Divide os shards entre os processos, o mais igual possível."""
+    groups = [list(range(index, shard_count, processes)) for index in range(processes)]
+    return [group for group in groups if group]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1, help="número de processos")
+    parser.add_argument('--shards', type=int, help="número total de shards (padrão: o recomendado pelo Discord)")
+    parser.add_argument('--script', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bot.py'),
+                        help="script de cada worker")
+    args = parser.parse_args()
+    load_dotenv()
+
+    # Migra antes de subir os workers, para eles não disputarem o esquema
+    db = Database(os.getenv('DATABASE_PATH', 'powers.db'))
+    db.open_sync()
+    db.run_sync(migrate)
+    db.run_sync(import_legacy_routines, os.getenv('TIMEZONE', 'America/Sao_Paulo'))
+    db.close()
+
+    shard_count = args.shards or recommended_shards(os.getenv('DISCORD_TOKEN'))
+    groups = split_shards(shard_count, args.processes)
+
+    def start(group):
+        env = dict(os.environ, SHARD_COUNT=str(shard_count), SHARD_IDS=','.join(map(str, group)))
+        print(f"Iniciando worker com os shards {group} de {shard_count}", flush=True)
+        return subprocess.Popen([sys.executable, args.script], env=env), time.monotonic()
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    workers = [start(group) for group in groups]
+    try:
+        while not stopping:
+            time.sleep(1)
+            for index, (process, started) in enumerate(workers):
+                if stopping or process.poll() is None:
+                    continue
+                print(f"Worker dos shards {groups[index]} saiu com código {process.returncode}", flush=True)
+                if time.monotonic() - started < RESTART_DELAY:
+                    time.sleep(RESTART_DELAY)
+                workers[index] = start(groups[index])
+    finally:
+        for process, _ in workers:
+            if process.poll() is None:
+                process.send_signal(signal.SIGTERM)
+        for process, _ in workers:
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+if __name__ == '__main__':
+    main()
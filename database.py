@@ -0,0 +1,111 @@
+import asyncio
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Database:
+    """Conexão SQLite que roda numa thread dedicada, fora do event loop.
+
+    Todas as consultas passam por um executor de uma única thread, então a
+    conexão nunca é compartilhada entre threads e as escritas ficam
+    serializadas, enquanto o event loop do discord.py continua livre.
+
+    Se `observer` for definido, é chamado como observer(operação, segundos)
+    após cada consulta assíncrona, com o tempo total visto pelo comando
+    (incluindo a espera na fila da thread).
+    """
+
+    def __init__(self, path, busy_timeout=5000):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self.observer = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='lass-db')
+        self._conn = None
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path)
+        # WAL permite leituras enquanto uma escrita está em andamento e
+        # reduz o custo de cada commit
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA foreign_keys=ON')
+        # Com vários processos usando o mesmo arquivo, uma escrita espera a
+        # outra terminar em vez de falhar na hora com "database is locked"
+        conn.execute(f'PRAGMA busy_timeout={self.busy_timeout}')
+        self._conn = conn
+
+    async def open(self):
+        """Abre a conexão na thread do banco; deve vir antes de qualquer consulta."""
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._connect)
+
+    def open_sync(self):
+        """Como open, para scripts fora do event loop."""
+        self._executor.submit(self._connect).result()
+
+    def run_sync(self, fn, *args):
+        """Executa fn(conn, *args) na thread do banco e bloqueia até terminar.
+
+        Só deve ser usado fora do event loop (por exemplo, na inicialização).
+        """
+        return self._executor.submit(lambda: fn(self._conn, *args)).result()
+
+    async def run(self, fn, *args, operation=None):
+        """Executa fn(conn, *args) na thread do banco sem bloquear o event loop."""
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        try:
+            return await loop.run_in_executor(self._executor, lambda: fn(self._conn, *args))
+        finally:
+            if self.observer is not None:
+                self.observer(operation or fn.__name__, time.perf_counter() - start)
+
+    async def execute(self, sql, params=()):
+        """Executa uma escrita e retorna o número de linhas afetadas."""
+        def _execute(conn):
+            with conn:
+                return conn.execute(sql, params).rowcount
+        return await self.run(_execute, operation='execute')
+
+    async def insert(self, sql, params=()):
+        """Executa um INSERT e retorna o id da linha criada.
+
+        Retorna None se a linha violar uma constraint de unicidade.
+        """
+        def _insert(conn):
+            try:
+                with conn:
+                    return conn.execute(sql, params).lastrowid
+            except sqlite3.IntegrityError:
+                return None
+        return await self.run(_insert, operation='insert')
+
+    async def fetchone(self, sql, params=()):
+        return await self.run(lambda conn: conn.execute(sql, params).fetchone(), operation='fetchone')
+
+    async def fetchall(self, sql, params=()):
+        return await self.run(lambda conn: conn.execute(sql, params).fetchall(), operation='fetchall')
+
+    async def data_version(self):
+        """Número que muda sempre que outro processo grava no banco."""
+        return await self.run(lambda conn: conn.execute('PRAGMA data_version').fetchone()[0], operation='data_version')
+
+    async def transaction(self, fn, *args):
+        """Executa fn(conn, *args) dentro de uma única transação."""
+        def _transaction(conn):
+            with conn:
+                return fn(conn, *args)
+        return await self.run(_transaction, operation=f'transaction:{fn.__name__}')
+
+    def close(self):
+        """Passa o WAL para o arquivo principal e fecha a conexão."""
+        if self._conn is not None:
+            self._executor.submit(self._close).result()
+        self._executor.shutdown()
+
+    def _close(self):
+        # Com o WAL vazio o arquivo do banco fica completo sozinho (ex.: para backup)
+        self._conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        self._conn.close()
+        self._conn = None
+
@@ -0,0 +1,27 @@
+import asyncio
+
+
+class InFlight:
+    """Conta os comandos em execução, para o desligamento esperar por eles."""
+
+    def __init__(self):
+        self.count = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    def start(self):
+        self.count += 1
+        self._idle.clear()
+
+    def finish(self):
+        self.count -= 1
+        if not self.count:
+            self._idle.set()
+
+    async def drain(self, timeout=None):
+        """Espera os comandos terminarem; retorna False se o timeout acabar antes."""
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
@@ -0,0 +1,80 @@
+from collections import deque
+
+
+class AhoCorasick:
+    """Autômato de Aho–Corasick para achar vários gatilhos num texto de uma vez.
+
+    A busca percorre o texto uma única vez, então o custo depende só do
+    tamanho do texto e do número de ocorrências, não de quantos gatilhos
+    existem. Ocorrências sobrepostas (por exemplo "Lotus" dentro de
+    "Yandere Lotus") também são encontradas.
+    """
+
+    def __init__(self, patterns):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [()]
+        for index, pattern in enumerate(patterns):
+            if not pattern:
+                continue
+            state = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(())
+                state = next_state
+            self._output[state] += (index,)
+
+        # Links de falha em largura: cada estado herda as saídas do seu sufixo
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state] += self._output[self._fail[next_state]]
+
+    def find(self, text, limit=None):
+        """Retorna os índices (distintos, em ordem de ocorrência) dos padrões achados.
+
+        Com limit, para assim que encontrar essa quantidade de padrões distintos.
+        """
+        found = {}
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for index in output[state]:
+                found.setdefault(index)
+                if limit is not None and len(found) >= limit:
+                    return list(found)
+        return list(found)
+
+
+class TriggerMatcher:
+    """Gatilhos de easter egg (sem diferenciar maiúsculas) e suas respostas."""
+
+    def __init__(self, eggs):
+        triggers = {}
+        for trigger, response in eggs:
+            # Um gatilho repetido fica com a última resposta (a do servidor
+            # vem depois das globais e as substitui)
+            triggers[trigger.lower()] = response
+        self._responses = list(triggers.values())
+        self._automaton = AhoCorasick(list(triggers))
+
+    def __len__(self):
+        return len(self._responses)
+
+    def match(self, text, limit=None):
+        return [self._responses[index] for index in self._automaton.find(text.lower(), limit)]
@@ -0,0 +1,142 @@
+"""Métricas do bot (contadores e histogramas) no formato texto do Prometheus.
+
+Tudo fica em memória e é atualizado no event loop, sem locks: registrar um
+valor custa uma busca num dicionário e um bisect, então dá para medir cada
+comando e cada consulta sem pesar no bot.
+"""
+
+import asyncio
+import bisect
+import time
+
+# Limites (em segundos) dos buckets dos histogramas de latência
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        # Um contador por bucket e um a mais para os valores acima do último
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Estimativa do quantil q (0 a 1), interpolando dentro do bucket."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                lower = self.buckets[index - 1] if index else 0.0
+                if index == len(self.buckets):
+                    return lower
+                return lower + (self.buckets[index] - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+
+class Metrics:
+    """Registro de métricas identificadas por nome e labels."""
+
+    def __init__(self):
+        self._help = {}
+        self._types = {}
+        self._counters = {}
+        self._histograms = {}
+
+    def describe(self, name, kind, text):
+        self._types[name] = kind
+        self._help[name] = text
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(labels.items()))
+        self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(labels.items()))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = Histogram()
+        histogram.observe(value)
+
+    def counters(self, name):
+        """Retorna {labels: valor} de um contador."""
+        return {labels: value for (metric, labels), value in self._counters.items() if metric == name}
+
+    def histograms(self, name):
+        """Retorna {labels: Histogram} de um histograma."""
+        return {labels: histogram for (metric, labels), histogram in self._histograms.items() if metric == name}
+
+    def render(self):
+        """Exporta tudo no formato texto do Prometheus (versão 0.0.4)."""
+        lines = []
+        for name in sorted({metric for metric, _ in self._counters} | {metric for metric, _ in self._histograms}):
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} {self._types[name]}")
+            for labels, value in sorted(self.counters(name).items()):
+                lines.append(f"{name}{_labels(labels)} {value}")
+            for labels, histogram in sorted(self.histograms(name).items()):
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', repr(bound)),))} {cumulative}")
+                lines.append(f"{name}_bucket{_labels(labels + (('le', '+Inf'),))} {histogram.count}")
+                lines.append(f"{name}_sum{_labels(labels)} {histogram.sum}")
+                lines.append(f"{name}_count{_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + '}'
+
+
+def count_http_requests(http, metrics):
+    """Conta as chamadas REST feitas pelo discord.py, por método e rota.
+
+    A rota é o caminho sem os ids (ex.: /channels/{channel_id}/messages),
+    então o número de séries não cresce com o número de canais.
+    """
+    request = http.request
+
+    async def counted_request(route, **kwargs):
+        metrics.inc('lass_discord_http_requests_total', method=route.method, route=route.path)
+        start = time.perf_counter()
+        try:
+            return await request(route, **kwargs)
+        finally:
+            metrics.observe('lass_discord_http_request_duration_seconds', time.perf_counter() - start,
+                            method=route.method, route=route.path)
+
+    http.request = counted_request
+
+
+async def serve(metrics, port, host='127.0.0.1'):
+    """Servidor HTTP mínimo que responde qualquer GET com as métricas."""
+    async def handle(reader, writer):
+        try:
+            # Só a linha de requisição e os headers importam; o corpo é ignorado
+            while (await reader.readline()).strip():
+                pass
+            body = metrics.render().encode('utf-8')
+            writer.write(b"HTTP/1.1 200 OK\r\n"
+                         b"Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                         b"Content-Length: " + str(len(body)).encode() + b"\r\n"
+                         b"Connection: close\r\n\r\n" + body)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
@@ -0,0 +1,402 @@
+"""Migrações versionadas do powers.db.
+
+A versão do esquema fica em PRAGMA user_version. Cada migração roda numa
+transação própria junto com a atualização da versão, então um banco nunca
+fica "meio migrado". Para alterar o esquema, adicione uma função ao final de
+MIGRATIONS — nunca edite uma migração que já foi publicada.
+"""
+
+import datetime
+import json
+import logging
+import os
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+log = logging.getLogger(__name__)
+
+
+def _rebuild_table(conn, table, create_sql, columns):
+    # SQLite não permite alterar a collation/constraints de uma coluna,
+    # então a tabela é recriada e os dados copiados
+    conn.execute(f"ALTER TABLE {table} RENAME TO {table}_old")
+    conn.execute(create_sql)
+    conn.execute(f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {table}_old")
+    conn.execute(f"DROP TABLE {table}_old")
+
+
+def _rename_duplicates(conn, table, group_by, keep='id'):
+    # Nada é apagado: em cada grupo de nomes repetidos a primeira linha na
+    # ordem de `keep` (por padrão a mais antiga) mantém o nome e as outras
+    # viram "nome (id)"
+    rows = conn.execute(f'''
+              SELECT id, name FROM
+              (SELECT id, name, ROW_NUMBER() OVER (PARTITION BY {group_by} ORDER BY {keep}) AS position
+               FROM {table})
+              WHERE position > 1
+              ''').fetchall()
+    conn.executemany(f"UPDATE {table} SET name = ? WHERE id = ?",
+                     [(f"{name} ({row_id})", row_id) for row_id, name in rows])
+    for row_id, name in rows:
+        log.warning("%s: nome repetido %r (id %d) renomeado para %r", table, name, row_id, f"{name} ({row_id})")
+
+
+def _initial_schema(conn):
+    conn.execute('''
+              CREATE TABLE IF NOT EXISTS powers
+              (id INTEGER PRIMARY KEY,
+              name TEXT,
+              description TEXT,
+              advantage TEXT,
+              disadvantage TEXT,
+              image TEXT,
+              creator_id INTEGER)
+              ''')
+    conn.execute('''
+              CREATE TABLE IF NOT EXISTS characters
+              (id INTEGER PRIMARY KEY,
+              name TEXT,
+              description TEXT,
+              server TEXT,
+              image TEXT,
+              creator_id INTEGER)
+              ''')
+    conn.execute('''
+              CREATE TABLE IF NOT EXISTS rolls
+              (id INTEGER PRIMARY KEY,
+              server_id INTEGER,
+              name TEXT,
+              options TEXT,
+              creator_id INTEGER)
+              ''')
+
+
+def _nocase_names_and_indexes(conn):
+    # Nomes repetidos (ignorando maiúsculas) impediriam os índices únicos abaixo
+    _rename_duplicates(conn, 'powers', 'name COLLATE NOCASE')
+    _rename_duplicates(conn, 'characters', 'name COLLATE NOCASE, creator_id')
+    # O $roll antigo sempre buscava o nome em minúsculas, então a linha que os
+    # usuários de fato alcançavam é a minúscula; é ela que fica com o nome
+    _rename_duplicates(conn, 'rolls', 'server_id, name COLLATE NOCASE', keep='name = lower(name) DESC, id')
+
+    _rebuild_table(conn, 'powers', '''
+              CREATE TABLE powers
+              (id INTEGER PRIMARY KEY,
+              name TEXT NOT NULL COLLATE NOCASE,
+              description TEXT,
+              advantage TEXT,
+              disadvantage TEXT,
+              image TEXT,
+              creator_id INTEGER)
+              ''', 'id, name, description, advantage, disadvantage, image, creator_id')
+    _rebuild_table(conn, 'characters', '''
+              CREATE TABLE characters
+              (id INTEGER PRIMARY KEY,
+              name TEXT NOT NULL COLLATE NOCASE,
+              description TEXT,
+              server TEXT,
+              image TEXT,
+              creator_id INTEGER)
+              ''', 'id, name, description, server, image, creator_id')
+    _rebuild_table(conn, 'rolls', '''
+              CREATE TABLE rolls
+              (id INTEGER PRIMARY KEY,
+              server_id INTEGER NOT NULL,
+              name TEXT NOT NULL COLLATE NOCASE,
+              options TEXT,
+              creator_id INTEGER)
+              ''', 'id, server_id, name, options, creator_id')
+
+    conn.execute("CREATE UNIQUE INDEX idx_powers_name ON powers (name)")
+    conn.execute("CREATE UNIQUE INDEX idx_characters_name_creator ON characters (name, creator_id)")
+    conn.execute("CREATE UNIQUE INDEX idx_rolls_server_name ON rolls (server_id, name)")
+
+
+def _roll_options_table(conn):
+    # As opções deixam de ser uma string separada por vírgulas e passam a ser
+    # uma linha cada, com peso. A tabela rolls é recriada antes de existir a
+    # chave estrangeira, senão o RENAME também renomearia a referência.
+    legacy = conn.execute("SELECT id, options FROM rolls").fetchall()
+    _rebuild_table(conn, 'rolls', '''
+              CREATE TABLE rolls
+              (id INTEGER PRIMARY KEY,
+              server_id INTEGER NOT NULL,
+              name TEXT NOT NULL COLLATE NOCASE,
+              creator_id INTEGER)
+              ''', 'id, server_id, name, creator_id')
+    conn.execute("CREATE UNIQUE INDEX idx_rolls_server_name ON rolls (server_id, name)")
+    conn.execute('''
+              CREATE TABLE roll_options
+              (id INTEGER PRIMARY KEY,
+              roll_id INTEGER NOT NULL REFERENCES rolls (id) ON DELETE CASCADE,
+              option TEXT NOT NULL,
+              weight REAL NOT NULL DEFAULT 1,
+              UNIQUE (roll_id, option))
+              ''')
+    # O texto antigo não tinha pesos: só remove espaços, vazias e repetidas
+    conn.executemany(
+        "INSERT INTO roll_options (roll_id, option) VALUES (?, ?)",
+        ((roll_id, option)
+         for roll_id, options in legacy
+         for option in dict.fromkeys(o.strip() for o in (options or '').split(','))
+         if option))
+
+
+def _routines_table(conn):
+    # guild_id pode ficar nulo para rotinas importadas do rotinas.json antigo,
+    # que não guardava o servidor; ele é preenchido quando o bot conecta
+    conn.execute('''
+              CREATE TABLE routines
+              (id INTEGER PRIMARY KEY,
+              guild_id INTEGER,
+              channel_id INTEGER NOT NULL,
+              time TEXT NOT NULL,
+              timezone TEXT NOT NULL,
+              message TEXT NOT NULL,
+              created_at TEXT NOT NULL,
+              last_run TEXT,
+              UNIQUE (channel_id, time))
+              ''')
+    conn.execute("CREATE INDEX idx_routines_guild_time ON routines (guild_id, time)")
+
+
+# Easter eggs que antes ficavam fixos no comando $pergunta; {mention} é
+# substituído pela menção de quem perguntou
+_BUILTIN_EASTER_EGGS = [
+    ("Yandere Lotus", "Não me envolvo com essas parada."),
+    ("Vou te nerfar", "Eu te nerfo antes! **Nerfa {mention}**"),
+    ("Mediador", "O metavekh... Como é lindo os mistérios dessa praga... Não vou te contar nada."),
+    ("Mergulhadores", "Ei... Eles não estão por perto né?"),
+    ("Observadores", "Como esse cara são irritantes... **Despawna um observador aleatorio**"),
+    ("Tia do Gusta", "AUREA? CADE? ONDE?"),
+    ("conte sua lore", "Ah sim, então você quer saber minha história? Eu sou a líder dos mergulhadores... Não posso te contar mais sobre isso."),
+    ("Yin", "Ah sim, a gentil Yin... Preciso fazer uma visita a ela."),
+    ("Emissor", "Emissor? Odeio quando ele me ignora."),
+    ("Mandy", "A cópia bem feita dos mergulhadores? Hehe."),
+    ("Bruxa", "A bruxa... Sabia que seu nome é %ßðßðéþ©?"),
+    ("Kaitostem", "A velha bruxa é uma mediadora de verdade?"),
+    ("ʞɔ Lu ЯΛ Rakku KKЦ ck n˥", "Mano... Primeiramente, como você digitou isso certo? Segundamente, não fale com esse cara."),
+    ("Lass... E aquilo?", "https://tenor.com/view/peter-parker-peter-parker-tempted-tempted-gif-23970167"),
+    ("2015", "https://tenor.com/view/jujutsu-kaisen-jujutsu-kaisen-yuuji-itadori-itadori-gif-19729870"),
+    ("Yui", "Não falamos da Yui... **Sai do Local antes que ela nerfe minha versão com o Emissor**"),
+    ("Ashley", "Talvez eu tenha a julgado mal..."),
+    ("Lotus", "Lotus tem mais é que se fuder mesmo!"),
+]
+
+
+def _easter_eggs_table(conn):
+    # guild_id 0 = easter egg global, vale para todos os servidores
+    conn.execute('''
+              CREATE TABLE easter_eggs
+              (id INTEGER PRIMARY KEY,
+              guild_id INTEGER NOT NULL DEFAULT 0,
+              trigger TEXT NOT NULL COLLATE NOCASE,
+              response TEXT NOT NULL,
+              creator_id INTEGER,
+              UNIQUE (guild_id, trigger))
+              ''')
+    conn.executemany("INSERT INTO easter_eggs (guild_id, trigger, response) VALUES (0, ?, ?)", _BUILTIN_EASTER_EGGS)
+
+
+def _full_text_search(conn):
+    # Índices FTS5 com conteúdo externo: o texto continua só nas tabelas
+    # originais e os triggers mantêm o índice sincronizado
+    for table, columns in (('powers', ('name', 'description', 'advantage', 'disadvantage')),
+                           ('characters', ('name', 'description'))):
+        column_list = ', '.join(columns)
+        new_values = ', '.join(f'new.{column}' for column in columns)
+        old_values = ', '.join(f'old.{column}' for column in columns)
+        conn.execute(f'''
+                  CREATE VIRTUAL TABLE {table}_fts USING fts5
+                  ({column_list}, content='{table}', content_rowid='id',
+                  tokenize='unicode61 remove_diacritics 2')
+                  ''')
+        # Vocabulário do índice, usado para sugerir termos parecidos
+        conn.execute(f"CREATE VIRTUAL TABLE {table}_fts_vocab USING fts5vocab({table}_fts, row)")
+        conn.execute(f'''
+                  CREATE TRIGGER {table}_fts_insert AFTER INSERT ON {table} BEGIN
+                      INSERT INTO {table}_fts (rowid, {column_list}) VALUES (new.id, {new_values});
+                  END
+                  ''')
+        conn.execute(f'''
+                  CREATE TRIGGER {table}_fts_delete AFTER DELETE ON {table} BEGIN
+                      INSERT INTO {table}_fts ({table}_fts, rowid, {column_list}) VALUES ('delete', old.id, {old_values});
+                  END
+                  ''')
+        conn.execute(f'''
+                  CREATE TRIGGER {table}_fts_update AFTER UPDATE ON {table} BEGIN
+                      INSERT INTO {table}_fts ({table}_fts, rowid, {column_list}) VALUES ('delete', old.id, {old_values});
+                      INSERT INTO {table}_fts (rowid, {column_list}) VALUES (new.id, {new_values});
+                  END
+                  ''')
+        conn.execute(f"INSERT INTO {table}_fts ({table}_fts) VALUES ('rebuild')")
+
+
+def _legacy_guild_id(conn):
+    # Antes desta migração o bot só era usado num servidor; LEGACY_GUILD_ID
+    # diz qual é, senão usa o servidor que mais aparece nos rolls e rotinas
+    if os.getenv('LEGACY_GUILD_ID'):
+        return int(os.environ['LEGACY_GUILD_ID'])
+    row = conn.execute('''
+              SELECT guild_id FROM
+              (SELECT server_id AS guild_id FROM rolls
+               UNION ALL SELECT guild_id FROM routines WHERE guild_id IS NOT NULL)
+              GROUP BY guild_id ORDER BY COUNT(*) DESC LIMIT 1
+              ''').fetchone()
+    return row[0] if row else 0
+
+
+def _guild_partitioning(conn):
+    # Poderes e personagens passam a pertencer a um servidor. Os nomes só
+    # precisam ser únicos dentro do servidor, e toda consulta começa pelo
+    # guild_id, então os índices compostos começam por ele
+    guild_id = _legacy_guild_id(conn)
+    for table in ('powers', 'characters'):
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN guild_id INTEGER NOT NULL DEFAULT 0")
+        conn.execute(f"UPDATE {table} SET guild_id = ?", (guild_id,))
+        conn.execute(f"CREATE INDEX idx_{table}_guild ON {table} (guild_id)")
+    conn.execute("DROP INDEX idx_powers_name")
+    conn.execute("DROP INDEX idx_characters_name_creator")
+    conn.execute("CREATE UNIQUE INDEX idx_powers_guild_name ON powers (guild_id, name)")
+    conn.execute("CREATE UNIQUE INDEX idx_characters_guild_name_creator ON characters (guild_id, name, creator_id)")
+
+
+def _guild_prefixes_table(conn):
+    # Só servidores que mudaram o prefixo têm linha; os outros usam o padrão
+    conn.execute('''
+              CREATE TABLE guild_prefixes
+              (guild_id INTEGER PRIMARY KEY,
+              prefix TEXT NOT NULL)
+              ''')
+
+
+def _moderation_log_table(conn):
+    # Registro de cada ban/kick, inclusive os que falharam
+    conn.execute('''
+              CREATE TABLE moderation_log
+              (id INTEGER PRIMARY KEY,
+              guild_id INTEGER NOT NULL,
+              moderator_id INTEGER NOT NULL,
+              target_id INTEGER NOT NULL,
+              action TEXT NOT NULL,
+              reason TEXT,
+              success INTEGER NOT NULL,
+              error TEXT,
+              created_at TEXT NOT NULL)
+              ''')
+    conn.execute("CREATE INDEX idx_moderation_log_guild ON moderation_log (guild_id, created_at)")
+
+
+def _guild_search_index(conn):
+    # O servidor entra no índice FTS como um termo (g<guild_id>) na coluna
+    # guild, e a busca exige esse termo junto com as palavras: o bm25 só
+    # ranqueia as linhas do servidor, em vez das de todos os servidores. O
+    # conteúdo vem de uma view, já que o termo não existe nas tabelas
+    for table, columns in (('powers', ('name', 'description', 'advantage', 'disadvantage')),
+                           ('characters', ('name', 'description'))):
+        for trigger in ('insert', 'delete', 'update'):
+            conn.execute(f"DROP TRIGGER {table}_fts_{trigger}")
+        conn.execute(f"DROP TABLE {table}_fts_vocab")
+        conn.execute(f"DROP TABLE {table}_fts")
+        column_list = ', '.join(columns)
+        new_values = ', '.join(f'new.{column}' for column in columns)
+        old_values = ', '.join(f'old.{column}' for column in columns)
+        conn.execute(f"CREATE VIEW {table}_search AS SELECT id, {column_list}, 'g' || guild_id AS guild FROM {table}")
+        conn.execute(f'''
+                  CREATE VIRTUAL TABLE {table}_fts USING fts5
+                  ({column_list}, guild, content='{table}_search', content_rowid='id',
+                  tokenize='unicode61 remove_diacritics 2')
+                  ''')
+        # Por coluna, para as sugestões de termos ignorarem os termos dos servidores
+        conn.execute(f"CREATE VIRTUAL TABLE {table}_fts_vocab USING fts5vocab({table}_fts, col)")
+        conn.execute(f'''
+                  CREATE TRIGGER {table}_fts_insert AFTER INSERT ON {table} BEGIN
+                      INSERT INTO {table}_fts (rowid, {column_list}, guild) VALUES (new.id, {new_values}, 'g' || new.guild_id);
+                  END
+                  ''')
+        conn.execute(f'''
+                  CREATE TRIGGER {table}_fts_delete AFTER DELETE ON {table} BEGIN
+                      INSERT INTO {table}_fts ({table}_fts, rowid, {column_list}, guild)
+                      VALUES ('delete', old.id, {old_values}, 'g' || old.guild_id);
+                  END
+                  ''')
+        conn.execute(f'''
+                  CREATE TRIGGER {table}_fts_update AFTER UPDATE ON {table} BEGIN
+                      INSERT INTO {table}_fts ({table}_fts, rowid, {column_list}, guild)
+                      VALUES ('delete', old.id, {old_values}, 'g' || old.guild_id);
+                      INSERT INTO {table}_fts (rowid, {column_list}, guild) VALUES (new.id, {new_values}, 'g' || new.guild_id);
+                  END
+                  ''')
+        conn.execute(f"INSERT INTO {table}_fts ({table}_fts) VALUES ('rebuild')")
+
+
+MIGRATIONS = [
+    _initial_schema,
+    _nocase_names_and_indexes,
+    _roll_options_table,
+    _routines_table,
+    _easter_eggs_table,
+    _full_text_search,
+    _guild_partitioning,
+    _guild_prefixes_table,
+    _moderation_log_table,
+    _guild_search_index,
+]
+
+
+def migrate(conn):
+    """Aplica as migrações pendentes e retorna a versão final do esquema.
+
+    A versão é relida dentro de uma transação IMMEDIATE, então vários
+    processos iniciando juntos não aplicam a mesma migração duas vezes.
+    """
+    while True:
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version >= len(MIGRATIONS):
+                conn.rollback()
+                return version
+            MIGRATIONS[version](conn)
+            conn.execute(f"PRAGMA user_version = {version + 1}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+
+def import_legacy_routines(conn, default_timezone, path='rotinas.json'):
+    """Importa uma única vez as rotinas do rotinas.json para a tabela routines.
+
+    O arquivo é renomeado para rotinas.json.imported depois da importação,
+    então nas próximas inicializações não há nada a fazer. Retorna quantas
+    rotinas foram importadas.
+    """
+    try:
+        with open(path, 'r') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return 0
+    now = datetime.datetime.now(datetime.timezone.utc).isoformat()
+    rows = []
+    for horario, canais in data.items():
+        for chat, info in canais.items():
+            # O bot antigo gravava a rotina antes de validar o horário, então o
+            # arquivo pode ter entradas como "25:00" que nunca chegaram a rodar
+            try:
+                time = datetime.time.fromisoformat(horario)
+                timezone = info.get('fuso', default_timezone)
+                ZoneInfo(timezone)
+                normalized = time.isoformat(timespec='seconds' if time.second else 'minutes')
+                rows.append((info.get('guild_id'), int(chat), normalized, timezone, info['mensagem'],
+                             info.get('criada_em', now), info.get('ultima_execucao')))
+            except (ValueError, KeyError, TypeError, ZoneInfoNotFoundError):
+                log.warning("Rotina inválida no %s ignorada: horário %r, canal %r", path, horario, chat)
+    with conn:
+        conn.executemany('''
+            INSERT OR IGNORE INTO routines (guild_id, channel_id, time, timezone, message, created_at, last_run)
+            VALUES (?, ?, ?, ?, ?, ?, ?)''', rows)
+    try:
+        os.replace(path, path + '.imported')
+    except FileNotFoundError:
+        pass  # outro processo importou ao mesmo tempo (o INSERT OR IGNORE evita duplicatas)
+    return len(rows)
@@ -0,0 +1,126 @@
+"""Ban e kick em massa, com registro de auditoria gravado em lotes.
+
+As ações rodam em paralelo, no máximo CONCURRENCY por vez; o HTTP do
+discord.py continua respeitando os buckets de rate limit da API e espera
+quando recebe um 429. Cada resultado vai para a tabela moderation_log pelo
+AuditWriter, que junta as entradas e grava tudo numa transação só, então
+banir centenas de membros numa raid não faz centenas de commits.
+"""
+
+import asyncio
+import datetime
+import logging
+import re
+
+import discord
+from discord.ext import commands
+
+log = logging.getLogger(__name__)
+
+# Chamadas à API de moderação em andamento ao mesmo tempo, por comando
+CONCURRENCY = 5
+
+_MEMBER_REFERENCE = re.compile(r"<@!?(\d{15,20})>|(\d{15,20})")
+
+
+class MentionedMember(commands.Converter):
+    """Membro citado por menção (<@id>) ou pelo id, nunca pelo nome.
+
+    O MemberConverter também aceita nome e apelido, então no Greedy do $ban
+    uma palavra do motivo podia banir quem tivesse aquele nome (e custar uma
+    consulta ao gateway). Aqui qualquer outra coisa é recusada, e o Greedy
+    trata o primeiro argumento que não é menção como o início do motivo.
+    """
+
+    async def convert(self, ctx, argument):
+        match = _MEMBER_REFERENCE.fullmatch(argument)
+        if not match:
+            raise commands.BadArgument(f'"{argument}" não é uma menção nem um id de membro.')
+        member_id = int(match.group(1) or match.group(2))
+        member = ctx.guild.get_member(member_id)
+        if member is None:
+            try:
+                member = await ctx.guild.fetch_member(member_id)
+            except discord.NotFound:
+                raise commands.MemberNotFound(argument) from None
+        return member
+
+
+async def apply_to_members(members, action, concurrency=CONCURRENCY):
+    """Executa action(membro) para todos; retorna [(membro, erro ou None)] na mesma ordem."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def apply(member):
+        async with semaphore:
+            try:
+                await action(member)
+            except discord.HTTPException as e:
+                return member, str(e)
+            return member, None
+
+    return await asyncio.gather(*(apply(member) for member in members))
+
+
+def _insert_entries(conn, entries):
+    conn.executemany('''
+        INSERT INTO moderation_log (guild_id, moderator_id, target_id, action, reason, success, error, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)''', entries)
+
+
+class AuditWriter:
+    """Grava o registro de moderação em lotes, numa task em segundo plano.
+
+    record() só enfileira a entrada, sem esperar o banco. A task grava o
+    que acumulou a cada `interval` segundos, ou antes disso quando houver
+    `batch_size` entradas; close() grava o que faltar.
+
+    A task nunca é cancelada: um cancelamento no meio de flush() perderia o
+    lote, que já saiu da fila. close() só pede para ela parar e espera.
+    """
+
+    def __init__(self, db, batch_size=100, interval=1.0):
+        self.db = db
+        self.batch_size = batch_size
+        self.interval = interval
+        self._pending = []
+        self._wakeup = asyncio.Event()
+        self._closing = False
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def record(self, guild_id, moderator_id, target_id, action, reason, error=None):
+        now = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        self._pending.append((guild_id, moderator_id, target_id, action, reason, error is None, error, now))
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    async def _run(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self):
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        try:
+            await self.db.transaction(_insert_entries, batch)
+        except Exception:
+            # Volta para a fila; a próxima rodada tenta de novo
+            self._pending[:0] = batch
+            log.exception("Falha ao gravar %d entradas do registro de moderação", len(batch))
+
+    async def close(self):
+        self._closing = True
+        if self._task:
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
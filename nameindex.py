@@ -0,0 +1,121 @@
+import asyncio
+import bisect
+
+
+class NameIndex:
+    """Nomes em ordem alfabética para autocomplete por prefixo.
+
+    A busca é um bisect na lista ordenada (O(log n) + resultados), então
+    responde bem dentro da janela de 3 segundos do Discord mesmo com dezenas
+    de milhares de nomes. Cada nome guarda os ids das linhas que o usam
+    (ex.: personagens de criadores diferentes), então add/remove são
+    idempotentes e o nome só some quando a última linha é removida.
+    """
+
+    def __init__(self, items=()):
+        self._keys = []
+        self._names = {}
+        self._ids = {}
+        for item_id, name in items:
+            self.add(item_id, name)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def add(self, item_id, name):
+        key = name.lower()
+        ids = self._ids.get(key)
+        if ids is None:
+            self._ids[key] = {item_id}
+            self._names[key] = name
+            bisect.insort(self._keys, key)
+        else:
+            ids.add(item_id)
+
+    def remove(self, item_id, name):
+        key = name.lower()
+        ids = self._ids.get(key)
+        if ids is None:
+            return
+        ids.discard(item_id)
+        if ids:
+            return
+        del self._ids[key]
+        del self._names[key]
+        del self._keys[bisect.bisect_left(self._keys, key)]
+
+    def complete(self, prefix, limit=25):
+        prefix = prefix.lower()
+        start = bisect.bisect_left(self._keys, prefix)
+        results = []
+        for key in self._keys[start:start + limit]:
+            if not key.startswith(prefix):
+                break
+            results.append(self._names[key])
+        return results
+
+
+class GuildNameIndexes:
+    """Um NameIndex por servidor, carregado do banco na primeira consulta.
+
+    load(guild_id) deve retornar os pares (id, nome) daquele servidor. Como
+    no RandomSampler, escritas feitas durante a carga são reaplicadas depois.
+    load_all(), se existir, retorna (guild_id, id, nome) de todos os
+    servidores, para o warm montar vários índices com uma consulta só.
+    """
+
+    def __init__(self, load, load_all=None):
+        self.load = load
+        self.load_all = load_all
+        self._indexes = {}
+        self._pending = {}
+        self._locks = {}
+
+    async def get(self, guild_id):
+        index = self._indexes.get(guild_id)
+        if index is not None:
+            return index
+        lock = self._locks.setdefault(guild_id, asyncio.Lock())
+        async with lock:
+            index = self._indexes.get(guild_id)
+            if index is None:
+                self._pending[guild_id] = []
+                try:
+                    index = NameIndex(await self.load(guild_id))
+                finally:
+                    pending = self._pending.pop(guild_id)
+                for op, item_id, name in pending:
+                    getattr(index, op)(item_id, name)
+                self._indexes[guild_id] = index
+        return index
+
+    async def warm(self, keep=lambda guild_id: True):
+        """Monta de uma vez os índices dos servidores aceitos por keep (na inicialização)."""
+        grouped = {}
+        for guild_id, item_id, name in await self.load_all():
+            if keep(guild_id):
+                grouped.setdefault(guild_id, []).append((item_id, name))
+        for guild_id, items in grouped.items():
+            # Um servidor carregado (ou carregando) enquanto isso já está em dia
+            if guild_id not in self._indexes and guild_id not in self._pending:
+                self._indexes[guild_id] = NameIndex(items)
+
+    def clear(self):
+        """Descarta os índices carregados; a próxima consulta relê o banco."""
+        self._indexes.clear()
+
+    async def complete(self, guild_id, prefix, limit=25):
+        return (await self.get(guild_id)).complete(prefix, limit)
+
+    def add(self, guild_id, item_id, name):
+        self._apply(guild_id, 'add', item_id, name)
+
+    def remove(self, guild_id, item_id, name):
+        self._apply(guild_id, 'remove', item_id, name)
+
+    def _apply(self, guild_id, op, item_id, name):
+        if guild_id in self._indexes:
+            getattr(self._indexes[guild_id], op)(item_id, name)
+        elif guild_id in self._pending:
+            self._pending[guild_id].append((op, item_id, name))
+        # Se ainda não foi carregado, a carga vai ler o estado atual do banco
@@ -0,0 +1,92 @@
+import asyncio
+import io
+import time
+
+import discord
+
+# Limite de caracteres de uma mensagem do Discord
+MESSAGE_LIMIT = 2000
+# Acima desse número de mensagens a resposta vai como arquivo anexado
+FILE_THRESHOLD = 5
+
+
+def split_message(text, limit=MESSAGE_LIMIT):
+    """Divide um texto em pedaços de até `limit` caracteres.
+
+    Quebra preferencialmente em linhas; uma linha maior que o limite é
+    quebrada no último espaço antes dele (ou no próprio limite).
+    """
+    chunks = []
+    current = ''
+    for line in text.splitlines(keepends=True):
+        while len(line) > limit:
+            cut = line.rfind(' ', 0, limit)
+            cut = cut + 1 if cut > 0 else limit
+            if current:
+                chunks.append(current)
+                current = ''
+            chunks.append(line[:cut])
+            line = line[cut:]
+        if len(current) + len(line) > limit:
+            chunks.append(current)
+            current = ''
+        current += line
+    if current:
+        chunks.append(current)
+    return [chunk.rstrip('\n') for chunk in chunks if chunk.strip()]
+
+
+class ChannelRateLimiter:
+    """Token bucket por canal, para não estourar o limite de envio do Discord.
+
+    Cada canal aceita `rate` mensagens por `per` segundos; quem passar disso
+    espera a vez em vez de tomar um 429 da API.
+    """
+
+    def __init__(self, rate=5, per=5.0, clock=time.monotonic):
+        self.rate = rate
+        self.per = per
+        self.clock = clock
+        self._buckets = {}
+
+    async def acquire(self, channel_id):
+        while True:
+            now = self.clock()
+            tokens, updated = self._buckets.get(channel_id, (self.rate, now))
+            tokens = min(self.rate, tokens + (now - updated) * self.rate / self.per)
+            if tokens >= 1:
+                self._buckets[channel_id] = (tokens - 1, now)
+                self._prune(now)
+                return
+            self._buckets[channel_id] = (tokens, now)
+            await asyncio.sleep((1 - tokens) * self.per / self.rate)
+
+    def _prune(self, now):
+        # Buckets que já estariam cheios de novo não precisam ficar guardados
+        if len(self._buckets) > 10000:
+            self._buckets = {key: (tokens, updated) for key, (tokens, updated) in self._buckets.items()
+                             if now - updated < self.per}
+
+
+limiter = ChannelRateLimiter()
+
+
+async def send_long(destination, text, *, filename='resposta.txt'):
+    """Envia um texto de qualquer tamanho respeitando o limite do Discord.
+
+    Até FILE_THRESHOLD mensagens o texto é dividido e enviado em sequência,
+    respeitando o limite do canal; acima disso vai como um único arquivo.
+    Retorna o número de mensagens enviadas.
+    """
+    chunks = split_message(text)
+    channel = getattr(destination, 'channel', destination)
+    if len(chunks) > FILE_THRESHOLD:
+        await limiter.acquire(channel.id)
+        data = io.BytesIO(text.encode('utf-8'))
+        await destination.send("A resposta é grande demais, segue em anexo:",
+                               file=discord.File(data, filename=filename))
+        return 1
+    for chunk in chunks:
+        await limiter.acquire(channel.id)
+        await destination.send(chunk)
+    return len(chunks)
@@ -0,0 +1,151 @@
+import asyncio
+
+import discord
+
+
+class KeysetPager:
+    """Percorre uma tabela uma linha por vez usando keyset pagination no id.
+
+    Só a janela ao redor da linha atual fica em memória: quando a navegação
+    chega na borda da janela, o próximo bloco de `window` linhas é buscado
+    com `id > ?` (ou `id < ?`), então o custo de cada página não depende do
+    tamanho da tabela. Ao passar do fim volta para o começo e vice-versa.
+
+    fetch_after(after_id, limit) e fetch_before(before_id, limit) devem
+    retornar linhas em ordem crescente de id, com o id na primeira coluna;
+    after_id/before_id None significa "desde o começo"/"desde o fim".
+    fetch_at(offset, limit) é usado só para pular direto para uma página.
+    """
+
+    def __init__(self, fetch_after, fetch_before, fetch_at, window=5):
+        self.fetch_after = fetch_after
+        self.fetch_before = fetch_before
+        self.fetch_at = fetch_at
+        self.window = window
+        self._rows = []
+        self._pos = 0
+
+    @property
+    def current(self):
+        return self._rows[self._pos] if self._rows else None
+
+    async def first(self):
+        self._rows = list(await self.fetch_after(None, self.window))
+        self._pos = 0
+        return self.current
+
+    async def last(self):
+        self._rows = list(await self.fetch_before(None, self.window))
+        self._pos = len(self._rows) - 1
+        return self.current
+
+    async def jump(self, page):
+        """Vai para a página `page` (começando em 1); além do fim vai para a última."""
+        rows = list(await self.fetch_at(max(page - 1, 0), self.window))
+        if not rows:
+            return await self.last()
+        self._rows = rows
+        self._pos = 0
+        return self.current
+
+    async def next(self):
+        if not self._rows:
+            return await self.first()
+        if self._pos + 1 >= len(self._rows):
+            more = await self.fetch_after(self._rows[-1][0], self.window)
+            if not more:
+                return await self.first()
+            # Mantém só a linha atual como vizinha para trás
+            self._rows = self._rows[self._pos:] + list(more)
+            self._pos = 0
+        self._pos += 1
+        return self.current
+
+    async def previous(self):
+        if not self._rows:
+            return await self.last()
+        if self._pos == 0:
+            more = await self.fetch_before(self._rows[0][0], self.window)
+            if not more:
+                return await self.last()
+            self._rows = list(more) + self._rows[:1]
+            self._pos = len(self._rows) - 1
+        self._pos -= 1
+        return self.current
+
+
+class JumpModal(discord.ui.Modal, title='Ir para a página'):
+    page = discord.ui.TextInput(label='Página', placeholder='1', max_length=7)
+
+    def __init__(self, paginator):
+        super().__init__()
+        self.paginator = paginator
+
+    async def on_submit(self, interaction):
+        try:
+            page = int(self.page.value)
+        except ValueError:
+            await interaction.response.send_message("Número de página inválido.", ephemeral=True)
+            return
+        await self.paginator.navigate(interaction, self.paginator.source.jump, page)
+
+
+class Paginator(discord.ui.View):
+    """Paginação por botões para qualquer fonte de linhas com a interface do KeysetPager.
+
+    Cada clique faz exatamente uma chamada REST (a resposta da interação que
+    edita a mensagem). Qualquer pessoa no canal pode navegar; um lock impede
+    que cliques simultâneos embaralhem a posição da fonte.
+    """
+
+    def __init__(self, source, render, *, timeout=120.0):
+        super().__init__(timeout=timeout)
+        self.source = source
+        self.render = render
+        self.message = None
+        self._lock = asyncio.Lock()
+
+    async def start(self, ctx):
+        """Envia a primeira página; retorna False se a fonte estiver vazia."""
+        row = await self.source.first()
+        if row is None:
+            return False
+        self.message = await ctx.send(embed=self.render(row), view=self)
+        return True
+
+    async def navigate(self, interaction, move, *args):
+        async with self._lock:
+            row = await move(*args)
+        if row is None:
+            # A fonte ficou vazia enquanto a mensagem estava aberta
+            await interaction.response.edit_message(content="Não há mais nada para mostrar.", embed=None, view=None)
+            self.stop()
+            return
+        await interaction.response.edit_message(embed=self.render(row))
+
+    @discord.ui.button(emoji='⏮️', style=discord.ButtonStyle.secondary)
+    async def first_page(self, interaction, button):
+        await self.navigate(interaction, self.source.first)
+
+    @discord.ui.button(emoji='◀️', style=discord.ButtonStyle.primary)
+    async def previous_page(self, interaction, button):
+        await self.navigate(interaction, self.source.previous)
+
+    @discord.ui.button(emoji='▶️', style=discord.ButtonStyle.primary)
+    async def next_page(self, interaction, button):
+        await self.navigate(interaction, self.source.next)
+
+    @discord.ui.button(emoji='⏭️', style=discord.ButtonStyle.secondary)
+    async def last_page(self, interaction, button):
+        await self.navigate(interaction, self.source.last)
+
+    @discord.ui.button(emoji='🔢', style=discord.ButtonStyle.secondary)
+    async def jump_to_page(self, interaction, button):
+        await interaction.response.send_modal(JumpModal(self))
+
+    async def on_timeout(self):
+        if self.message:
+            try:
+                await self.message.edit(view=None)
+            except discord.HTTPException:
+                pass
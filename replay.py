@@ -0,0 +1,327 @@
+"""Reproduz comandos do bot offline, sem token e sem conectar ao Discord.
+
+Uso:
+    python replay.py trace.jsonl --concurrency 50 --repeat 3
+    python replay.py --synthetic 2000 --concurrency 100 --db powers.db
+
+Cada linha do trace é um JSON com o texto da mensagem e, opcionalmente,
+quem mandou e onde:
+
+    {"content": "$roll cores x3", "guild_id": 1, "channel_id": 10, "user_id": 100, "admin": false}
+
+Linhas com "setup": true rodam uma a uma antes da medição (para criar
+poderes, rolls etc.). Traces reais podem ser gravados rodando o bot com
+TRACE_PATH definido. O banco usado é sempre uma cópia temporária, então o
+powers.db de verdade nunca é alterado.
+
+Os comandos passam pelo caminho normal do discord.py (bot.get_context e
+bot.invoke, com checks, conversores e hooks); só o envio das respostas e a
+camada HTTP são trocados por versões falsas que apenas contam as chamadas.
+"""
+
+import argparse
+import asyncio
+import importlib
+import itertools
+import json
+import math
+import os
+import random
+import shutil
+import tempfile
+import time
+from collections import Counter, defaultdict
+from types import SimpleNamespace
+
+import discord
+from discord.ext import commands
+
+import output
+
+BOT_USER_ID = 1
+
+
+class TraceRecorder:
+    """Grava os comandos recebidos num JSONL que este harness consegue reproduzir."""
+
+    def __init__(self, path):
+        self._file = open(path, 'a', encoding='utf-8', buffering=1)
+
+    def record(self, ctx):
+        permissions = getattr(ctx.author, 'guild_permissions', None)
+        entry = {
+            'content': ctx.message.content,
+            'guild_id': ctx.guild.id if ctx.guild else None,
+            'channel_id': ctx.channel.id,
+            'user_id': ctx.author.id,
+            'admin': bool(permissions and permissions.administrator),
+            'time': time.time(),
+        }
+        self._file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+    def close(self):
+        self._file.close()
+
+
+class FakeUser:
+    def __init__(self, user_id, admin=False):
+        self.id = user_id
+        self.name = self.display_name = self.global_name = f'usuario{user_id}'
+        self.mention = f'<@{user_id}>'
+        self.bot = False
+        self.guild_permissions = discord.Permissions.all() if admin else discord.Permissions.none()
+        self.avatar = self.display_avatar = SimpleNamespace(url=f'https://cdn.discordapp.com/embed/avatars/{user_id % 5}.png')
+
+
+class FakeGuild:
+    def __init__(self, guild_id):
+        self.id = guild_id
+        self.name = f'servidor{guild_id}'
+        self.channels = {}
+        self.members = []
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+    def get_member(self, user_id):
+        return None
+
+    def get_member_named(self, name):
+        return None
+
+
+class FakeChannel:
+    def __init__(self, channel_id, guild):
+        self.id = channel_id
+        self.guild = guild
+        self.mention = f'<#{channel_id}>'
+
+    async def send(self, content=None, **kwargs):
+        return FakeMessage(content, None, self)
+
+
+class FakeMessage:
+    _ids = itertools.count(1)
+
+    def __init__(self, content, author, channel, state=None):
+        self._state = state
+        self.id = next(self._ids)
+        self.content = content or ''
+        self.author = author
+        self.channel = channel
+        self.guild = channel.guild
+        self.attachments = []
+        self.mentions = []
+        self.role_mentions = []
+        self.channel_mentions = []
+
+    async def edit(self, **kwargs):
+        return self
+
+    async def delete(self, **kwargs):
+        pass
+
+    async def add_reaction(self, emoji):
+        pass
+
+
+class NoRateLimit:
+    async def acquire(self, channel_id):
+        pass
+
+
+class World:
+    """Servidores, canais e usuários falsos, criados sob demanda pelo trace."""
+
+    def __init__(self, state):
+        self.state = state
+        self.guilds = {}
+        self.users = {}
+
+    def message(self, entry):
+        guild_id = entry.get('guild_id', 1)
+        guild = self.guilds.get(guild_id)
+        if guild is None:
+            guild = self.guilds[guild_id] = FakeGuild(guild_id)
+        channel_id = entry.get('channel_id', guild_id * 1000)
+        channel = guild.channels.get(channel_id)
+        if channel is None:
+            channel = guild.channels[channel_id] = FakeChannel(channel_id, guild)
+        key = (entry.get('user_id', 100), bool(entry.get('admin')))
+        user = self.users.get(key)
+        if user is None:
+            user = self.users[key] = FakeUser(*key)
+        return FakeMessage(entry['content'], user, channel, self.state)
+
+
+def synthetic_trace(count, guilds=3, seed=0):
+    """Gera um trace com a mistura de comandos mais comum no bot."""
+    rng = random.Random(seed)
+    entries = []
+    for guild_id in range(1, guilds + 1):
+        admin = {'guild_id': guild_id, 'user_id': 100, 'admin': True, 'setup': True}
+        for i in range(50):
+            entries.append({**admin, 'content': f'$addpower "Poder {i}" "Descrição do poder {i} com fogo e gelo" '
+                                                f'"Vantagem {i}" "Desvantagem {i}"'})
+        for i in range(20):
+            entries.append({**admin, 'content': f'$addcharacter "Personagem {i}" "Uma personagem número {i}" "Servidor"'})
+        entries.append({**admin, 'content': '$rollcreate cores vermelho, azul:2, verde:0.5, amarelo'})
+
+    commands = [
+        (20, lambda: f'$roll cores x{rng.randint(1, 5)}'),
+        (15, lambda: f'$getpower "Poder {rng.randrange(60)}"'),
+        (10, lambda: '$Prandom'),
+        (10, lambda: rng.choice(['$dado 2d6', '$dado 4d6kh3+2', '$dado 3d6!', '$dado 10000d20 sum'])),
+        (8, lambda: '$pergunta o Lotus vai ganhar?'),
+        (8, lambda: f'$getcharacter "Personagem {rng.randrange(25)}"'),
+        (6, lambda: rng.choice(['$searchpower fogo', '$searchpower gelo vantagem', '$searchcharacter persnagem'])),
+        (5, lambda: '$listpowers'),
+        (5, lambda: '$humor'),
+        (5, lambda: '$choose a, b, c'),
+    ]
+    weights = [weight for weight, _ in commands]
+    for _ in range(count):
+        _, make = rng.choices(commands, weights)[0]
+        entries.append({'content': make(), 'guild_id': rng.randint(1, guilds),
+                        'user_id': rng.randint(100, 200), 'channel_id': rng.randint(1, 20)})
+    return entries
+
+
+def load_trace(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _percentile(values, q):
+    return values[max(math.ceil(q * len(values)) - 1, 0)]
+
+
+def load_bot(db_path):
+    """Importa o bot.py apontando para o banco de teste, sem conectar ao Discord."""
+    os.environ['DATABASE_PATH'] = db_path
+    os.environ.pop('TRACE_PATH', None)
+    os.environ.pop('METRICS_PORT', None)
+    return importlib.import_module('bot')
+
+
+async def replay(lass, entries, concurrency=10, rate_limits=False, setup_hook=True):
+    """Executa o trace e retorna (latências por comando, erros, envios, chamadas HTTP, duração).
+
+    Com setup_hook=False o bot não é inicializado de novo, para rodar vários
+    traces seguidos no mesmo processo.
+    """
+    class ReplayContext(commands.Context):
+        async def send(self, content=None, **kwargs):
+            sends[self.command.qualified_name if self.command else '(desconhecido)'] += 1
+            return await self.channel.send(content, **kwargs)
+
+        reply = send
+
+    bot = lass.bot
+    if setup_hook:
+        await bot._async_setup_hook()
+        await bot.setup_hook()
+    bot._connection.user = FakeUser(BOT_USER_ID)
+    if not rate_limits:
+        # Sem o limite por canal, mede só o trabalho do bot
+        output.limiter = NoRateLimit()
+
+    http_calls = Counter()
+
+    async def fake_request(route, **kwargs):
+        http_calls[f'{route.method} {route.path}'] += 1
+        return None
+
+    bot.http.request = fake_request
+
+    errors = Counter()
+
+    async def on_command_error(ctx, error):
+        errors[type(error).__name__] += 1
+
+    # Com um listener próprio o discord.py não imprime cada erro no stderr
+    bot.add_listener(on_command_error, 'on_command_error')
+
+    world = World(bot._connection)
+    sends = Counter()
+    latencies = defaultdict(list)
+    failures = Counter()
+
+    async def run(entry):
+        ctx = await bot.get_context(world.message(entry), cls=ReplayContext)
+        start = time.perf_counter()
+        await bot.invoke(ctx)
+        elapsed = time.perf_counter() - start
+        name = ctx.command.qualified_name if ctx.command else '(desconhecido)'
+        if ctx.command_failed or ctx.command is None:
+            failures[name] += 1
+        return name, elapsed
+
+    for entry in entries:
+        if entry.get('setup'):
+            await run(entry)
+    measured = [entry for entry in entries if not entry.get('setup')]
+    sends.clear()
+    http_calls.clear()
+    failures.clear()
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(entry):
+        async with semaphore:
+            name, elapsed = await run(entry)
+        latencies[name].append(elapsed)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(limited(entry) for entry in measured))
+    duration = time.perf_counter() - start
+    bot.remove_listener(on_command_error, 'on_command_error')
+    return latencies, failures, errors, sends, http_calls, duration
+
+
+def report(latencies, failures, errors, sends, http_calls, duration):
+    total = sum(len(values) for values in latencies.values())
+    lines = [f"{total} comandos em {duration:.2f}s ({total / duration:.0f} comandos/s)",
+             f"{'comando':<18}{'n':>7}{'erros':>7}{'envios':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'máx ms':>9}"]
+    for name, values in sorted(latencies.items(), key=lambda item: -len(item[1])):
+        values.sort()
+        p50, p95, p99 = (_percentile(values, q) * 1000 for q in (0.5, 0.95, 0.99))
+        lines.append(f"{name:<18}{len(values):>7}{failures[name]:>7}{sends[name]:>8}"
+                     f"{p50:>9.2f}{p95:>9.2f}{p99:>9.2f}{values[-1] * 1000:>9.2f}")
+    if errors:
+        lines.append("erros: " + ", ".join(f"{name} x{count}" for name, count in errors.most_common()))
+    if http_calls:
+        lines.append("chamadas HTTP: " + ", ".join(f"{route} x{count}" for route, count in http_calls.most_common()))
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('trace', nargs='?', help="arquivo JSONL com os comandos")
+    parser.add_argument('--synthetic', type=int, metavar='N', help="gera um trace com N comandos em vez de ler um arquivo")
+    parser.add_argument('--concurrency', type=int, default=10, help="comandos executando ao mesmo tempo")
+    parser.add_argument('--repeat', type=int, default=1, help="repete os comandos medidos N vezes")
+    parser.add_argument('--db', help="banco a copiar como ponto de partida (padrão: banco vazio)")
+    parser.add_argument('--rate-limits', action='store_true', help="respeita o limite de envio por canal")
+    args = parser.parse_args()
+    if not args.trace and not args.synthetic:
+        parser.error("informe um trace ou --synthetic N")
+
+    entries = load_trace(args.trace) if args.trace else synthetic_trace(args.synthetic)
+    entries = [entry for entry in entries if entry.get('setup')] + \
+        [entry for entry in entries if not entry.get('setup')] * args.repeat
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, 'replay.db')
+        if args.db:
+            shutil.copyfile(args.db, db_path)
+        lass = load_bot(db_path)
+        try:
+            results = asyncio.run(replay(lass, entries, args.concurrency, args.rate_limits))
+        finally:
+            lass.db.close()
+    print(report(*results))
+
+
+if __name__ == '__main__':
+    main()
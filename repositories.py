@@ -0,0 +1,458 @@
+import datetime
+import difflib
+import itertools
+import random
+import re
+import sqlite3
+import unicodedata
+
+from cache import LRUCache, nocase
+from matcher import TriggerMatcher
+from nameindex import GuildNameIndexes
+from rolltables import AliasTable
+from sampler import RandomSampler
+from scheduler import Routine
+
+POWER_COLUMNS = "id, name, description, advantage, disadvantage, image"
+CHARACTER_COLUMNS = "id, name, description, server, image"
+ROUTINE_COLUMNS = "id, guild_id, channel_id, time, timezone, message, created_at, last_run"
+
+
+def _search_words(text):
+    # Mesma normalização do tokenizer do FTS (minúsculas, sem acentos)
+    text = unicodedata.normalize('NFKD', text.lower())
+    return re.findall(r"\w+", ''.join(char for char in text if not unicodedata.combining(char)))
+
+
+def _similar_terms(conn, vocab_table, word):
+    """Termos do índice parecidos com a palavra (para erros de digitação)."""
+    prefix = word[:2]
+    candidates = [row[0] for row in conn.execute(
+        f"SELECT DISTINCT term FROM {vocab_table} WHERE term >= ? AND term < ? AND col != 'guild' LIMIT 5000",
+        (prefix, prefix + '\uffff'))]
+    return difflib.get_close_matches(word, candidates, n=3, cutoff=0.75)
+
+
+def _full_text_search(conn, table, select, weights, guild_id, text, limit):
+    """Busca ranqueada no índice FTS5 de `table`, só nas linhas do servidor.
+
+    Tenta primeiro todas as palavras (como prefixo), depois qualquer uma
+    delas e, por fim, termos parecidos do vocabulário do índice. O termo do
+    servidor faz parte do MATCH, então só as linhas dele são ranqueadas.
+    """
+    words = _search_words(text)
+    if not words:
+        return []
+    sql = f'''
+        SELECT {select}, snippet({table}_fts, -1, '**', '**', '…', 12)
+        FROM {table}_fts JOIN {table} t ON t.id = {table}_fts.rowid
+        WHERE {table}_fts MATCH ?
+        ORDER BY bm25({table}_fts, {weights}, 0.0)
+        LIMIT ?'''
+    # Só o termo do servidor leva filtro de coluna: filtrar as palavras também
+    # obrigaria a ler as posições de cada ocorrência, o que dobra o tempo
+    guild = f'guild : "g{guild_id}" AND '
+    for query in (' '.join(f'"{word}"*' for word in words), ' OR '.join(f'"{word}"*' for word in words)):
+        rows = conn.execute(sql, (f'{guild}({query})', limit)).fetchall()
+        if rows:
+            return rows
+    fuzzy = [term for word in words for term in _similar_terms(conn, f"{table}_fts_vocab", word)]
+    if not fuzzy:
+        return []
+    return conn.execute(sql, (guild + '(' + ' OR '.join(f'"{term}"' for term in fuzzy) + ')', limit)).fetchall()
+
+
+def _delete_one(conn, table, where, params):
+    """Apaga a linha que satisfaz `where` e retorna (id, nome), ou None se não existir."""
+    row = conn.execute(f"SELECT id, name FROM {table} WHERE {where}", params).fetchone()
+    if row:
+        conn.execute(f"DELETE FROM {table} WHERE id = ?", (row[0],))
+    return row
+
+
+class PowerRepository:
+    """Poderes, separados por servidor: toda consulta começa pelo guild_id."""
+
+    def __init__(self, db):
+        self.db = db
+        self.cache = LRUCache()
+        self._samplers = {}
+        self.names = GuildNameIndexes(
+            lambda guild_id: self.db.fetchall("SELECT id, name FROM powers WHERE guild_id = ?", (guild_id,)),
+            lambda: self.db.fetchall("SELECT guild_id, id, name FROM powers"))
+
+    def clear_cache(self):
+        """Esquece tudo que está em memória (usado quando outro processo grava no banco)."""
+        self.cache.clear()
+        self._samplers.clear()
+        self.names.clear()
+
+    def _sampler(self, guild_id):
+        sampler = self._samplers.get(guild_id)
+        if sampler is None:
+            sampler = self._samplers[guild_id] = RandomSampler(lambda: self.db.fetchall(
+                "SELECT id, creator_id FROM powers WHERE guild_id = ?", (guild_id,)))
+        return sampler
+
+    async def add(self, guild_id, name, description, advantage, disadvantage, image, creator_id):
+        power_id = await self.db.insert(
+            "INSERT INTO powers (guild_id, name, description, advantage, disadvantage, image, creator_id) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (guild_id, name, description, advantage, disadvantage, image, creator_id))
+        self.cache.invalidate((guild_id, nocase(name)))
+        if power_id is not None:
+            # Um servidor que nunca sorteou não tem sampler; a carga lerá o banco
+            if guild_id in self._samplers:
+                self._samplers[guild_id].add(power_id, creator_id)
+            self.names.add(guild_id, power_id, name)
+        return power_id
+
+    async def page_after(self, guild_id, after_id, limit):
+        if after_id is None:
+            return await self.db.fetchall(
+                f"SELECT {POWER_COLUMNS} FROM powers WHERE guild_id = ? ORDER BY id LIMIT ?", (guild_id, limit))
+        return await self.db.fetchall(
+            f"SELECT {POWER_COLUMNS} FROM powers WHERE guild_id = ? AND id > ? ORDER BY id LIMIT ?",
+            (guild_id, after_id, limit))
+
+    async def page_before(self, guild_id, before_id, limit):
+        if before_id is None:
+            rows = await self.db.fetchall(
+                f"SELECT {POWER_COLUMNS} FROM powers WHERE guild_id = ? ORDER BY id DESC LIMIT ?", (guild_id, limit))
+        else:
+            rows = await self.db.fetchall(
+                f"SELECT {POWER_COLUMNS} FROM powers WHERE guild_id = ? AND id < ? ORDER BY id DESC LIMIT ?",
+                (guild_id, before_id, limit))
+        return rows[::-1]
+
+    async def page_at(self, guild_id, offset, limit):
+        return await self.db.fetchall(
+            f"SELECT {POWER_COLUMNS} FROM powers WHERE guild_id = ? ORDER BY id LIMIT ? OFFSET ?",
+            (guild_id, limit, offset))
+
+    async def get(self, guild_id, name):
+        return await self.cache.get_or_load((guild_id, nocase(name)), lambda: self.db.fetchone(
+            f"SELECT {POWER_COLUMNS} FROM powers WHERE guild_id = ? AND name = ?", (guild_id, name)))
+
+    async def search(self, guild_id, text, limit=10):
+        """Retorna (nome, trecho destacado) dos poderes mais relevantes para o texto."""
+        return await self.db.run(_full_text_search, 'powers', 't.name', '10.0, 1.0, 2.0, 2.0', guild_id, text, limit)
+
+    async def random(self, guild_id, creator_id=None, rng=random):
+        """Sorteia um poder do servidor (opcionalmente só de um criador) sem ordenar a tabela."""
+        power_id = await self._sampler(guild_id).choice(creator_id, rng=rng)
+        if power_id is None:
+            return None
+        return await self.db.fetchone(f"SELECT {POWER_COLUMNS} FROM powers WHERE id = ?", (power_id,))
+
+    async def delete(self, guild_id, name, creator_id):
+        """Remove o poder e retorna o id dele, ou None se não existir."""
+        deleted = await self.db.transaction(
+            _delete_one, 'powers', "guild_id = ? AND name = ? AND creator_id = ?", (guild_id, name, creator_id))
+        if deleted is None:
+            return None
+        power_id, stored_name = deleted
+        self.cache.invalidate((guild_id, nocase(name)))
+        if guild_id in self._samplers:
+            self._samplers[guild_id].remove(power_id, creator_id)
+        self.names.remove(guild_id, power_id, stored_name)
+        return power_id
+
+    async def update(self, guild_id, name, field, value, creator_id):
+        # field já foi validado pelo comando contra a lista de campos editáveis
+        query = f"UPDATE powers SET {field} = ? WHERE guild_id = ? AND name = ? AND creator_id = ?"
+        updated = await self.db.execute(query, (value, guild_id, name, creator_id)) > 0
+        if updated:
+            self.cache.invalidate((guild_id, nocase(name)))
+        return updated
+
+
+class CharacterRepository:
+    """Personagens, separados por servidor como os poderes."""
+
+    def __init__(self, db):
+        self.db = db
+        self.cache = LRUCache()
+        self.names = GuildNameIndexes(
+            lambda guild_id: self.db.fetchall("SELECT id, name FROM characters WHERE guild_id = ?", (guild_id,)),
+            lambda: self.db.fetchall("SELECT guild_id, id, name FROM characters"))
+
+    def clear_cache(self):
+        self.cache.clear()
+        self.names.clear()
+
+    async def add(self, guild_id, name, description, server, image, creator_id):
+        character_id = await self.db.insert(
+            "INSERT INTO characters (guild_id, name, description, server, image, creator_id) VALUES (?, ?, ?, ?, ?, ?)",
+            (guild_id, name, description, server, image, creator_id))
+        self.cache.invalidate((guild_id, nocase(name)))
+        if character_id is not None:
+            self.names.add(guild_id, character_id, name)
+        return character_id
+
+    async def page_after(self, guild_id, after_id, limit):
+        if after_id is None:
+            return await self.db.fetchall(
+                f"SELECT {CHARACTER_COLUMNS} FROM characters WHERE guild_id = ? ORDER BY id LIMIT ?", (guild_id, limit))
+        return await self.db.fetchall(
+            f"SELECT {CHARACTER_COLUMNS} FROM characters WHERE guild_id = ? AND id > ? ORDER BY id LIMIT ?",
+            (guild_id, after_id, limit))
+
+    async def page_before(self, guild_id, before_id, limit):
+        if before_id is None:
+            rows = await self.db.fetchall(
+                f"SELECT {CHARACTER_COLUMNS} FROM characters WHERE guild_id = ? ORDER BY id DESC LIMIT ?",
+                (guild_id, limit))
+        else:
+            rows = await self.db.fetchall(
+                f"SELECT {CHARACTER_COLUMNS} FROM characters WHERE guild_id = ? AND id < ? ORDER BY id DESC LIMIT ?",
+                (guild_id, before_id, limit))
+        return rows[::-1]
+
+    async def page_at(self, guild_id, offset, limit):
+        return await self.db.fetchall(
+            f"SELECT {CHARACTER_COLUMNS} FROM characters WHERE guild_id = ? ORDER BY id LIMIT ? OFFSET ?",
+            (guild_id, limit, offset))
+
+    async def get(self, guild_id, name):
+        # O nome só é único por criador; como antes, vale o primeiro encontrado
+        return await self.cache.get_or_load((guild_id, nocase(name)), lambda: self.db.fetchone(
+            f"SELECT {CHARACTER_COLUMNS} FROM characters WHERE guild_id = ? AND name = ?", (guild_id, name)))
+
+    async def search(self, guild_id, text, limit=10):
+        """Retorna (nome, trecho destacado) dos personagens mais relevantes para o texto."""
+        return await self.db.run(_full_text_search, 'characters', 't.name', '10.0, 1.0', guild_id, text, limit)
+
+    async def delete(self, guild_id, name, creator_id):
+        """Remove o personagem e retorna o id dele, ou None se não existir."""
+        deleted = await self.db.transaction(
+            _delete_one, 'characters', "guild_id = ? AND name = ? AND creator_id = ?", (guild_id, name, creator_id))
+        if deleted is None:
+            return None
+        self.cache.invalidate((guild_id, nocase(name)))
+        self.names.remove(guild_id, *deleted)
+        return deleted[0]
+
+    async def update(self, guild_id, name, field, value, creator_id):
+        query = f"UPDATE characters SET {field} = ? WHERE guild_id = ? AND name = ? AND creator_id = ?"
+        updated = await self.db.execute(query, (value, guild_id, name, creator_id)) > 0
+        if updated:
+            self.cache.invalidate((guild_id, nocase(name)))
+        return updated
+
+
+class RollRepository:
+    def __init__(self, db):
+        self.db = db
+        self.cache = LRUCache()
+        self.names = GuildNameIndexes(
+            lambda server_id: self.db.fetchall("SELECT id, name FROM rolls WHERE server_id = ?", (server_id,)),
+            lambda: self.db.fetchall("SELECT server_id, id, name FROM rolls"))
+
+    def clear_cache(self):
+        self.cache.clear()
+        self.names.clear()
+
+    async def create(self, server_id, name, options, creator_id):
+        """Cria um roll com uma lista de (opção, peso); None se o nome já existir."""
+        def _create(conn):
+            try:
+                with conn:
+                    roll_id = conn.execute(
+                        "INSERT INTO rolls (server_id, name, creator_id) VALUES (?, ?, ?)",
+                        (server_id, name, creator_id)).lastrowid
+                    conn.executemany(
+                        "INSERT INTO roll_options (roll_id, option, weight) VALUES (?, ?, ?)",
+                        [(roll_id, option, weight) for option, weight in options])
+                    return roll_id
+            except sqlite3.IntegrityError:
+                return None
+
+        roll_id = await self.db.run(_create)
+        self.cache.invalidate((server_id, nocase(name)))
+        if roll_id is not None:
+            self.names.add(server_id, roll_id, name)
+        return roll_id
+
+    async def delete(self, server_id, name):
+        # As opções são removidas em cascata pela chave estrangeira
+        deleted = await self.db.transaction(_delete_one, 'rolls', "server_id = ? AND name = ?", (server_id, name))
+        if deleted is None:
+            return False
+        self.cache.invalidate((server_id, nocase(name)))
+        self.names.remove(server_id, *deleted)
+        return True
+
+    async def get_table(self, server_id, name):
+        """Retorna a AliasTable pré-calculada do roll, ou None se não existir."""
+        async def load():
+            rows = await self.db.fetchall('''
+                SELECT o.option, o.weight FROM roll_options o
+                JOIN rolls r ON r.id = o.roll_id
+                WHERE r.server_id = ? AND r.name = ?
+                ORDER BY o.id''', (server_id, name))
+            return AliasTable(rows) if rows else None
+        return await self.cache.get_or_load((server_id, nocase(name)), load)
+
+    async def warm(self, keep=lambda server_id: True):
+        """Pré-calcula as tabelas dos rolls mais recentes, até encher o cache."""
+        rows = await self.db.fetchall('''
+            SELECT r.server_id, r.name, o.option, o.weight FROM rolls r
+            JOIN roll_options o ON o.roll_id = r.id
+            WHERE r.id IN (SELECT id FROM rolls ORDER BY id DESC LIMIT ?)
+            ORDER BY r.id, o.id''', (self.cache.maxsize,))
+        for (server_id, name), options in itertools.groupby(rows, key=lambda row: row[:2]):
+            if keep(server_id):
+                self.cache.set((server_id, nocase(name)), AliasTable([row[2:] for row in options]))
+
+
+def _routine_from_row(row):
+    routine_id, guild_id, channel_id, time, timezone, message, created_at, last_run = row
+    return Routine(
+        key=routine_id,
+        guild_id=guild_id,
+        channel_id=channel_id,
+        time=datetime.time.fromisoformat(time),
+        timezone=timezone,
+        message=message,
+        created_at=datetime.datetime.fromisoformat(created_at),
+        last_run=datetime.datetime.fromisoformat(last_run) if last_run else None,
+    )
+
+
+class RoutineRepository:
+    """Rotinas diárias, uma linha por (canal, horário).
+
+    Cada operação toca só a linha envolvida, então o custo de uma escrita
+    não cresce com o número de rotinas.
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    async def all(self):
+        rows = await self.db.fetchall(f"SELECT {ROUTINE_COLUMNS} FROM routines")
+        return [_routine_from_row(row) for row in rows]
+
+    async def for_guild(self, guild_id):
+        rows = await self.db.fetchall(
+            f"SELECT {ROUTINE_COLUMNS} FROM routines WHERE guild_id = ? ORDER BY time, channel_id", (guild_id,))
+        return [_routine_from_row(row) for row in rows]
+
+    async def save(self, guild_id, channel_id, time, timezone, message):
+        """Cria a rotina, ou substitui a que já existir no mesmo canal e horário."""
+        created_at = datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+        def _save(conn):
+            conn.execute('''
+                INSERT INTO routines (guild_id, channel_id, time, timezone, message, created_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (channel_id, time) DO UPDATE SET
+                    guild_id = excluded.guild_id, timezone = excluded.timezone, message = excluded.message,
+                    created_at = excluded.created_at, last_run = NULL''',
+                (guild_id, channel_id, time, timezone, message, created_at))
+            return conn.execute(f"SELECT {ROUTINE_COLUMNS} FROM routines WHERE channel_id = ? AND time = ?",
+                                (channel_id, time)).fetchone()
+
+        return _routine_from_row(await self.db.transaction(_save))
+
+    async def delete(self, guild_id, channel_id, time):
+        """Remove a rotina e retorna o id dela, ou None se não existir."""
+        def _delete(conn):
+            row = conn.execute("SELECT id FROM routines WHERE guild_id = ? AND channel_id = ? AND time = ?",
+                               (guild_id, channel_id, time)).fetchone()
+            if row:
+                conn.execute("DELETE FROM routines WHERE id = ?", (row[0],))
+            return row[0] if row else None
+
+        return await self.db.transaction(_delete)
+
+    async def claim(self, routine_id, run_at):
+        """Marca a execução de run_at; só o primeiro a marcar recebe True.
+
+        Com vários processos (ou um reinício no meio do disparo) isso garante
+        que cada horário de uma rotina é enviado uma vez só.
+        """
+        run_at = run_at.isoformat()
+        return await self.db.execute(
+            "UPDATE routines SET last_run = ? WHERE id = ? AND (last_run IS NULL OR last_run < ?)",
+            (run_at, routine_id, run_at)) > 0
+
+    async def set_guild(self, routine_id, guild_id):
+        await self.db.execute("UPDATE routines SET guild_id = ? WHERE id = ?", (guild_id, routine_id))
+
+
+class PrefixRepository:
+    """Prefixo de comandos de cada servidor.
+
+    Todos os prefixos ficam num dicionário carregado uma vez na
+    inicialização e atualizado a cada escrita, então resolver o prefixo de
+    uma mensagem é uma única busca no dicionário, sem ir ao banco.
+    """
+
+    def __init__(self, db, default):
+        self.db = db
+        self.default = default
+        self.prefixes = {}
+
+    async def load(self):
+        self.prefixes = dict(await self.db.fetchall("SELECT guild_id, prefix FROM guild_prefixes"))
+
+    def get(self, guild_id):
+        return self.prefixes.get(guild_id, self.default)
+
+    async def set(self, guild_id, prefix):
+        if prefix == self.default:
+            await self.db.execute("DELETE FROM guild_prefixes WHERE guild_id = ?", (guild_id,))
+            self.prefixes.pop(guild_id, None)
+            return
+        await self.db.execute(
+            "INSERT INTO guild_prefixes (guild_id, prefix) VALUES (?, ?) "
+            "ON CONFLICT (guild_id) DO UPDATE SET prefix = excluded.prefix", (guild_id, prefix))
+        self.prefixes[guild_id] = prefix
+
+
+class EasterEggRepository:
+    """Easter eggs do $pergunta: globais (guild_id 0) e por servidor.
+
+    O matcher compilado de cada servidor fica em cache e só é reconstruído
+    quando os easter eggs daquele servidor mudam.
+    """
+
+    GLOBAL = 0
+
+    def __init__(self, db):
+        self.db = db
+        self.cache = LRUCache(maxsize=256, ttl=3600.0)
+
+    def clear_cache(self):
+        self.cache.clear()
+
+    async def matcher(self, guild_id):
+        guild_id = guild_id or self.GLOBAL
+
+        async def load():
+            # Os globais vêm primeiro para que os do servidor os substituam
+            rows = await self.db.fetchall(
+                "SELECT trigger, response FROM easter_eggs WHERE guild_id IN (?, ?) ORDER BY guild_id = ?, id",
+                (self.GLOBAL, guild_id, guild_id))
+            return TriggerMatcher(rows)
+        return await self.cache.get_or_load(guild_id, load)
+
+    async def for_guild(self, guild_id):
+        return await self.db.fetchall(
+            "SELECT trigger, response FROM easter_eggs WHERE guild_id = ? ORDER BY trigger", (guild_id,))
+
+    async def add(self, guild_id, trigger, response, creator_id):
+        egg_id = await self.db.insert(
+            "INSERT INTO easter_eggs (guild_id, trigger, response, creator_id) VALUES (?, ?, ?, ?)",
+            (guild_id, trigger, response, creator_id))
+        self.cache.invalidate(guild_id)
+        return egg_id
+
+    async def delete(self, guild_id, trigger):
+        deleted = await self.db.execute(
+            "DELETE FROM easter_eggs WHERE guild_id = ? AND trigger = ?", (guild_id, trigger)) > 0
+        if deleted:
+            self.cache.invalidate(guild_id)
+        return deleted
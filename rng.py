@@ -0,0 +1,31 @@
+"""Geradores de números aleatórios do bot.
+
+Nenhum comando usa o gerador global do módulo random: cada um pede o seu
+ao RNGService. Assim a semente fixa do $humor (por usuário e por dia) não
+afeta os outros sorteios, que continuam imprevisíveis, e rolagens feitas em
+outra thread não disputam o estado do gerador do event loop.
+"""
+
+import datetime
+import random
+from zoneinfo import ZoneInfo
+
+
+class RNGService:
+    def __init__(self, timezone='UTC', seed=None):
+        self.timezone = ZoneInfo(timezone)
+        # Gerador rápido e sem semente fixa para os sorteios do dia a dia
+        self.fast = random.Random(seed)
+
+    def spawn(self):
+        """Gerador independente, para usar fora do event loop (ex.: numa thread)."""
+        return random.Random(self.fast.getrandbits(128))
+
+    def daily(self, user_id, date=None):
+        """Gerador determinístico do usuário no dia: a mesma sequência o dia todo.
+
+        A semente usa a data completa (não só o dia do mês), então o resultado
+        não se repete entre meses nem coincide entre usuários de ids vizinhos.
+        """
+        date = date or datetime.datetime.now(self.timezone).date()
+        return random.Random(f"{user_id}:{date.isoformat()}")
@@ -0,0 +1,64 @@
+import math
+import random
+
+
+def parse_options(text):
+    """Converte "a, b:3, c" em [("a", 1.0), ("b", 3.0), ("c", 1.0)].
+
+    Espaços nas pontas são removidos, opções vazias ignoradas e repetidas
+    contam uma vez só. O peso é opcional e vem depois do último ':'; se o
+    que vier depois não for um número positivo, o ':' faz parte da opção.
+    """
+    options = {}
+    for raw in text.split(','):
+        option, weight = raw.strip(), 1.0
+        head, sep, tail = option.rpartition(':')
+        if sep:
+            try:
+                parsed = float(tail)
+            except ValueError:
+                parsed = 0.0
+            if math.isfinite(parsed) and parsed > 0:
+                option, weight = head.strip(), parsed
+        if option and option not in options:
+            options[option] = weight
+    return list(options.items())
+
+
+class AliasTable:
+    """Tabela de alias (método de Vose) para sorteios com peso em O(1).
+
+    A construção é O(n) e acontece uma vez por roll; cada sorteio depois
+    disso é um número aleatório e uma comparação.
+    """
+
+    def __init__(self, options):
+        self.options = [option for option, _ in options]
+        weights = [weight for _, weight in options]
+        n = len(weights)
+        total = sum(weights)
+        scaled = [weight * n / total for weight in weights]
+        self._prob = [1.0] * n
+        self._alias = list(range(n))
+
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            self._prob[s] = scaled[s]
+            self._alias[s] = l
+            scaled[l] -= 1.0 - scaled[s]
+            (small if scaled[l] < 1.0 else large).append(l)
+        # O que sobrar em qualquer lista tem probabilidade 1 (erros de arredondamento)
+
+    def __len__(self):
+        return len(self.options)
+
+    def draw(self, rng=random):
+        column = rng.randrange(len(self._prob))
+        if rng.random() < self._prob[column]:
+            return self.options[column]
+        return self.options[self._alias[column]]
+
+    def draw_many(self, count, rng=random):
+        return [self.draw(rng) for _ in range(count)]
@@ -0,0 +1,108 @@
+import asyncio
+import random
+
+
+class IdPool:
+    """Conjunto de ids com inserção, remoção e sorteio em O(1).
+
+    Os ids ficam numa lista e um dicionário guarda a posição de cada um;
+    para remover, o último elemento é movido para o buraco.
+    """
+
+    def __init__(self, ids=()):
+        self._ids = []
+        self._positions = {}
+        for item_id in ids:
+            self.add(item_id)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, item_id):
+        return item_id in self._positions
+
+    def add(self, item_id):
+        if item_id in self._positions:
+            return
+        self._positions[item_id] = len(self._ids)
+        self._ids.append(item_id)
+
+    def remove(self, item_id):
+        position = self._positions.pop(item_id, None)
+        if position is None:
+            return
+        last = self._ids.pop()
+        if position < len(self._ids):
+            self._ids[position] = last
+            self._positions[last] = position
+
+    def choice(self, rng=random):
+        if not self._ids:
+            return None
+        return self._ids[rng.randrange(len(self._ids))]
+
+
+class RandomSampler:
+    """Sorteia ids de uma tabela sem ORDER BY RANDOM().
+
+    Os pares (id, grupo) são carregados do banco uma única vez, no primeiro
+    sorteio, e depois mantidos pelos comandos de escrita via add/remove.
+    O grupo (por exemplo, o criador do poder) permite sortear só dentro dele.
+    """
+
+    def __init__(self, load):
+        self.load = load
+        self._all = IdPool()
+        self._groups = {}
+        self._loaded = False
+        self._lock = asyncio.Lock()
+        # Escritas feitas enquanto a carga inicial estava em andamento; como
+        # add/remove são idempotentes, basta reaplicá-las depois da carga
+        self._pending = []
+
+    async def ensure_loaded(self):
+        if self._loaded:
+            return
+        async with self._lock:
+            if self._loaded:
+                return
+            for item_id, group in await self.load():
+                self._add(item_id, group)
+            for op, item_id, group in self._pending:
+                op(item_id, group)
+            self._pending.clear()
+            self._loaded = True
+
+    def add(self, item_id, group=None):
+        if self._loaded:
+            self._add(item_id, group)
+        else:
+            self._pending.append((self._add, item_id, group))
+
+    def remove(self, item_id, group=None):
+        if self._loaded:
+            self._remove(item_id, group)
+        else:
+            self._pending.append((self._remove, item_id, group))
+
+    def _add(self, item_id, group):
+        self._all.add(item_id)
+        if group not in self._groups:
+            self._groups[group] = IdPool()
+        self._groups[group].add(item_id)
+
+    def _remove(self, item_id, group):
+        self._all.remove(item_id)
+        pool = self._groups.get(group)
+        if pool is not None:
+            pool.remove(item_id)
+            if not pool:
+                del self._groups[group]
+
+    async def choice(self, group=None, rng=random):
+        """Sorteia um id; None se não houver nenhum. group restringe o sorteio a um grupo."""
+        await self.ensure_loaded()
+        if group is not None:
+            pool = self._groups.get(group)
+            return pool.choice(rng) if pool else None
+        return self._all.choice(rng)
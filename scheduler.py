@@ -0,0 +1,137 @@
+import asyncio
+import datetime
+import heapq
+import itertools
+import logging
+from dataclasses import dataclass
+from zoneinfo import ZoneInfo
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class Routine:
+    """Uma mensagem diária enviada num canal em um horário local."""
+    key: object
+    guild_id: int
+    channel_id: int
+    time: datetime.time
+    timezone: str
+    message: str
+    created_at: datetime.datetime
+    last_run: datetime.datetime = None
+
+    def due_times(self, now):
+        """Retorna (último horário que já passou, próximo horário) em UTC."""
+        tz = ZoneInfo(self.timezone)
+        local = now.astimezone(tz)
+
+        def at(date):
+            return datetime.datetime.combine(date, self.time, tzinfo=tz).astimezone(datetime.timezone.utc)
+
+        today = at(local.date())
+        if today <= now:
+            return today, at(local.date() + datetime.timedelta(days=1))
+        return at(local.date() - datetime.timedelta(days=1)), today
+
+
+class Clock:
+    """Relógio real; os testes podem trocar por um relógio falso."""
+
+    def now(self):
+        return datetime.datetime.now(datetime.timezone.utc)
+
+    async def wait(self, event, timeout):
+        """Espera o evento ou o timeout (None = sem limite), o que vier antes."""
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+class Scheduler:
+    """Agendador de rotinas baseado num heap ordenado pelo próximo disparo.
+
+    Uma única task dorme até o disparo mais próximo (ou até uma rotina ser
+    adicionada), então entre disparos o custo é zero, independente de
+    quantas rotinas existem. Rotinas removidas ficam no heap e são ignoradas
+    quando chegam ao topo.
+
+    fire(routine) é chamado para cada disparo, já com routine.last_run
+    atualizado, e deve enviar a mensagem e persistir o last_run.
+    """
+
+    def __init__(self, fire, clock=None):
+        self.fire = fire
+        self.clock = clock or Clock()
+        self._routines = {}
+        self._heap = []
+        self._counter = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self._firing = set()
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    def __len__(self):
+        return len(self._routines)
+
+    def add(self, routine):
+        """Agenda (ou reagenda) uma rotina.
+
+        Se ela deveria ter disparado enquanto o bot estava desligado, dispara
+        uma vez assim que o agendador rodar.
+        """
+        now = self.clock.now()
+        previous, upcoming = routine.due_times(now)
+        last_run = routine.last_run or routine.created_at
+        due = previous if last_run < previous else upcoming
+        token = next(self._counter)
+        self._routines[routine.key] = (routine, token)
+        heapq.heappush(self._heap, (due, token, routine.key))
+        self._wakeup.set()
+
+    def remove(self, key):
+        return self._routines.pop(key, (None, None))[0]
+
+    def start(self):
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout=None):
+        """Para de agendar e espera até `timeout` segundos os disparos em andamento."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._firing and timeout != 0:
+            await asyncio.wait(set(self._firing), timeout=timeout)
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            now = self.clock.now()
+            while self._heap and self._heap[0][0] <= now:
+                due, token, key = heapq.heappop(self._heap)
+                routine, current = self._routines.get(key, (None, None))
+                if current != token:
+                    continue  # removida ou reagendada
+                routine.last_run = due
+                task = asyncio.create_task(self._fire(routine))
+                self._firing.add(task)
+                task.add_done_callback(self._firing.discard)
+                _, upcoming = routine.due_times(max(now, due))
+                heapq.heappush(self._heap, (upcoming, token, key))
+            timeout = (self._heap[0][0] - now).total_seconds() if self._heap else None
+            await self.clock.wait(self._wakeup, timeout)
+
+    async def _fire(self, routine):
+        try:
+            await self.fire(routine)
+        except Exception:
+            log.exception("Falha ao executar a rotina %r", routine.key)
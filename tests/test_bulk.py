@@ -0,0 +1,40 @@
+import json
+import sqlite3
+
+from bulk import import_file
+from migrations import migrate
+
+
+def import_records(tmp_path, kind, records):
+    path = tmp_path / 'import.jsonl'
+    path.write_text(''.join(json.dumps(record) + '\n' for record in records), encoding='utf-8')
+    conn = sqlite3.connect(':memory:')
+    migrate(conn)
+    with conn:
+        result = import_file(conn, kind, str(path), 1, 2)
+    return result, conn
+
+
+def test_powers_missing_required_fields_are_ignored(tmp_path):
+    power = {'name': 'Voo', 'description': 'Voa', 'advantage': 'Rápido', 'disadvantage': 'Cansa'}
+    records = [power] + [{**power, 'name': f'Sem {column}', column: ' '}
+                         for column in ('description', 'advantage', 'disadvantage')]
+    records.append({key: value for key, value in power.items() if key != 'advantage'} | {'name': 'Faltando'})
+    (imported, ignored), conn = import_records(tmp_path, 'powers', records)
+    assert (imported, ignored) == (1, 4)
+    assert conn.execute("SELECT name, advantage, image FROM powers").fetchall() == [('Voo', 'Rápido', None)]
+
+
+def test_invalid_image_urls_are_ignored(tmp_path):
+    character = {'name': 'Lass', 'description': 'Bot', 'server': 'RPG'}
+    records = [
+        {**character, 'image': 'https://example.com/lass.png'},
+        {**character, 'name': 'Sem imagem', 'image': ''},
+        {**character, 'name': 'Imagem ruim', 'image': 'javascript:alert(1)'},
+        {**character, 'name': 'Relativa', 'image': 'lass.png'},
+        {'name': 'Sem servidor', 'description': 'Bot'},
+    ]
+    (imported, ignored), conn = import_records(tmp_path, 'characters', records)
+    assert (imported, ignored) == (2, 3)
+    assert sorted(conn.execute("SELECT name, image FROM characters")) == [
+        ('Lass', 'https://example.com/lass.png'), ('Sem imagem', None)]
@@ -0,0 +1,220 @@
+import asyncio
+import datetime
+import io
+import json
+import multiprocessing
+import os
+import signal
+import sqlite3
+import subprocess
+import sys
+import textwrap
+import time
+
+import cluster
+from database import Database
+from migrations import MIGRATIONS, migrate
+from repositories import RoutineRepository
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIRES = 200
+START = datetime.datetime(2026, 1, 1, 8, 0, tzinfo=datetime.timezone.utc)
+
+# Worker do cluster.py: importa o bot.py de verdade (com os shards do
+# SHARD_COUNT/SHARD_IDS) e roda o setup_hook, mas no lugar do gateway só
+# marca o bot como pronto, e no lugar do HTTP os canais gravam cada envio
+# num arquivo. Fica rodando até receber o SIGTERM
+WORKER = textwrap.dedent('''
+    import asyncio, json, os, signal
+    import replay
+
+    lass = replay.load_bot(os.environ['DATABASE_PATH'])
+    name = os.environ.get('SHARD_IDS', 'todos')
+
+    class Channel:
+        def __init__(self, channel_id):
+            self.id = channel_id
+
+        async def send(self, content=None, **kwargs):
+            with open(f'sent-{name}.jsonl', 'a') as f:
+                f.write(json.dumps({'channel_id': self.id, 'content': content}) + '\\n')
+
+    async def no_http(route, **kwargs):
+        raise AssertionError(f'chamada HTTP inesperada: {route.method} {route.path}')
+
+    async def main():
+        stop = asyncio.Event()
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop.set)
+        lass.bot.http.request = no_http
+        lass.bot.get_channel = Channel
+        await lass.bot._async_setup_hook()
+        await lass.bot.setup_hook()
+        # O READY do gateway falso: libera os envios das rotinas
+        lass.bot._ready.set()
+        result = {'shard_count': lass.bot.shard_count, 'scheduled': sorted(lass.scheduler._routines)}
+        with open(f'ready-{name}.tmp', 'w') as f:
+            json.dump(result, f)
+        os.replace(f'ready-{name}.tmp', f'ready-{name}.json')
+        await stop.wait()
+        await lass.scheduler.stop()
+        lass.db.close()
+
+    asyncio.run(main())
+''')
+GUILDS = 32
+SHARDS = 8
+
+
+def create_routine(path):
+    conn = sqlite3.connect(path)
+    migrate(conn)
+    with conn:
+        conn.execute("INSERT INTO routines (id, guild_id, channel_id, time, timezone, message, created_at) "
+                     "VALUES (1, 1, 10, '08:00', 'UTC', 'bom dia', ?)", ((START - datetime.timedelta(days=1)).isoformat(),))
+    conn.close()
+
+
+def test_split_shards():
+    assert cluster.split_shards(8, 3) == [[0, 3, 6], [1, 4, 7], [2, 5]]
+    assert cluster.split_shards(2, 4) == [[0], [1]]
+
+
+def test_recommended_shards_reads_the_gateway(monkeypatch):
+    requests = []
+
+    def urlopen(request, timeout):
+        requests.append(request)
+        return io.BytesIO(json.dumps({'url': 'wss://gateway.discord.gg', 'shards': 6}).encode())
+
+    monkeypatch.setattr(cluster.urllib.request, 'urlopen', urlopen)
+    assert cluster.recommended_shards('token') == 6
+    assert requests[0].full_url.endswith('/gateway/bot')
+    assert requests[0].get_header('Authorization') == 'Bot token'
+
+
+def _migrate(path):
+    db = Database(path)
+    db.open_sync()
+    try:
+        return db.run_sync(migrate)
+    finally:
+        db.close()
+
+
+def test_concurrent_migrations_apply_each_migration_once(tmp_path):
+    path = str(tmp_path / 'powers.db')
+    with multiprocessing.get_context('spawn').Pool(4) as pool:
+        versions = pool.map(_migrate, [path] * 4)
+    assert versions == [len(MIGRATIONS)] * 4
+    conn = sqlite3.connect(path)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == len(MIGRATIONS)
+    # Uma migração aplicada duas vezes falharia (ALTER TABLE/CREATE repetidos);
+    # a tabela de easter eggs padrão também só pode ter sido preenchida uma vez
+    triggers = [row[0] for row in conn.execute("SELECT trigger FROM easter_eggs")]
+    assert len(triggers) == len(set(triggers))
+    conn.close()
+
+
+def _claim(path):
+    async def main():
+        db = Database(path)
+        await db.open()
+        repo = RoutineRepository(db)
+        try:
+            return [day for day in range(FIRES) if await repo.claim(1, START + datetime.timedelta(days=day))]
+        finally:
+            db.close()
+    return asyncio.run(main())
+
+
+def test_each_fire_is_claimed_by_exactly_one_process(tmp_path):
+    path = str(tmp_path / 'powers.db')
+    create_routine(path)
+    with multiprocessing.get_context('spawn').Pool(4) as pool:
+        claimed = pool.map(_claim, [path] * 4)
+    days = sorted(day for days in claimed for day in days)
+    assert days == list(range(FIRES))
+
+
+def create_guild_routines(path):
+    """Duas rotinas por servidor: uma atrasada e uma que vence em alguns segundos."""
+    conn = sqlite3.connect(path)
+    migrate(conn)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    soon = (now + datetime.timedelta(seconds=8)).time().replace(microsecond=0)
+    routines = {}
+    with conn:
+        for index in range(1, GUILDS + 1):
+            # O shard de um servidor é (guild_id >> 22) % SHARDS
+            guild_id = index << 22 | 7
+            for channel_id, time_of_day, created_at in (
+                    (index * 10, now.time().replace(microsecond=0), now - datetime.timedelta(days=2)),
+                    (index * 10 + 1, soon, now)):
+                routine_id = conn.execute(
+                    "INSERT INTO routines (guild_id, channel_id, time, timezone, message, created_at) "
+                    "VALUES (?, ?, ?, 'UTC', ?, ?)",
+                    (guild_id, channel_id, time_of_day.isoformat(), f'rotina {channel_id}', created_at.isoformat())
+                ).lastrowid
+                routines[routine_id] = (guild_id, channel_id)
+    conn.close()
+    return routines
+
+
+def test_cluster_workers_send_each_routine_once(tmp_path):
+    path = str(tmp_path / 'powers.db')
+    routines = create_guild_routines(path)
+    script = tmp_path / 'worker.py'
+    script.write_text(WORKER)
+    env = dict(os.environ, DATABASE_PATH=path, PYTHONPATH=ROOT)
+    for name in ('SHARD_COUNT', 'SHARD_IDS', 'AUTO_SHARD', 'TRACE_PATH', 'METRICS_PORT'):
+        env.pop(name, None)
+    process = subprocess.Popen([sys.executable, os.path.join(ROOT, 'cluster.py'), '--processes', '4',
+                                '--shards', str(SHARDS), '--script', str(script)],
+                               cwd=tmp_path, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    # Um processo a mais, sem shards, que agenda todas as rotinas (como um
+    # deploy antigo que ainda não saiu): as marcações no banco impedem que
+    # ele envie de novo o que os workers já enviaram, e vice-versa
+    extra = subprocess.Popen([sys.executable, str(script)], cwd=tmp_path, env=env,
+                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    def sent():
+        messages = []
+        for log in tmp_path.glob('sent-*.jsonl'):
+            shard_ids = log.stem[len('sent-'):]
+            messages += [(shard_ids, json.loads(line)['channel_id']) for line in log.read_text().splitlines()]
+        return messages
+
+    try:
+        deadline = time.monotonic() + 90
+        while len(list(tmp_path.glob('ready-*.json'))) < 5 or len(sent()) < len(routines):
+            assert process.poll() is None, process.stdout.read()
+            assert time.monotonic() < deadline, f"só {len(sent())} de {len(routines)} rotinas enviadas"
+            time.sleep(0.2)
+        # Tempo para um envio repetido aparecer, se houvesse
+        time.sleep(1)
+    finally:
+        for running in (process, extra):
+            running.send_signal(signal.SIGTERM)
+        extra.wait(timeout=60)
+        process.wait(timeout=60)
+
+    messages = sent()
+    assert sorted(channel_id for _, channel_id in messages) == sorted(channel for _, channel in routines.values())
+
+    ready = {result.stem[len('ready-'):]: json.loads(result.read_text()) for result in tmp_path.glob('ready-*.json')}
+    assert set(ready) == {'0,4', '1,5', '2,6', '3,7', 'todos'}
+    assert ready.pop('todos')['scheduled'] == sorted(routines)
+    for shard_ids, result in ready.items():
+        assert result['shard_count'] == SHARDS
+        owned = {int(shard) for shard in shard_ids.split(',')}
+        expected = sorted(routine_id for routine_id, (guild_id, _) in routines.items() if (guild_id >> 22) % SHARDS in owned)
+        # Cada worker agenda só as rotinas dos servidores dos seus shards
+        assert result['scheduled'] == expected
+    for shard_ids, channel_id in messages:
+        if shard_ids != 'todos':
+            guild_id = next(guild for guild, channel in routines.values() if channel == channel_id)
+            assert (guild_id >> 22) % SHARDS in {int(shard) for shard in shard_ids.split(',')}
+
+    # O cluster saiu sozinho depois do SIGTERM, sem reiniciar ninguém
+    assert process.returncode == 0
+    assert "saiu com código" not in process.stdout.read()
@@ -0,0 +1,46 @@
+import json
+import sqlite3
+
+from migrations import _initial_schema, import_legacy_routines, migrate
+from repositories import ROUTINE_COLUMNS, _routine_from_row
+
+
+def migrated():
+    conn = sqlite3.connect(':memory:')
+    migrate(conn)
+    return conn
+
+
+def test_legacy_routines_with_invalid_times_are_skipped(tmp_path, caplog):
+    path = tmp_path / 'rotinas.json'
+    path.write_text(json.dumps({
+        '08:00': {'123': {'mensagem': 'Bom dia'}, 'abc': {'mensagem': 'Canal inválido'}},
+        '25:00': {'123': {'mensagem': 'Oi'}},
+        '21:30:15': {'456': {'mensagem': 'Boa noite', 'fuso': 'UTC'}},
+        '22:00': {'789': {'mensagem': 'Fuso ruim', 'fuso': 'Marte/Olympus'}, '790': {}},
+    }))
+    conn = migrated()
+    assert import_legacy_routines(conn, 'America/Sao_Paulo', str(path)) == 2
+    routines = [_routine_from_row(row) for row in conn.execute(f"SELECT {ROUTINE_COLUMNS} FROM routines ORDER BY time")]
+    assert [(routine.time.isoformat(), routine.channel_id, routine.timezone) for routine in routines] == [
+        ('08:00:00', 123, 'America/Sao_Paulo'), ('21:30:15', 456, 'UTC')]
+    assert sum("Rotina inválida" in record.message for record in caplog.records) == 4
+    assert not path.exists()
+
+
+def test_duplicate_names_are_renamed_not_deleted():
+    conn = sqlite3.connect(':memory:')
+    _initial_schema(conn)
+    conn.executemany("INSERT INTO powers (id, name, description, creator_id) VALUES (?, ?, 'x', 1)",
+                     [(1, 'Voo'), (2, 'VOO'), (3, 'Gelo')])
+    # No bot antigo o $roll buscava o nome em minúsculas: a linha 4 é a que funcionava
+    conn.executemany("INSERT INTO rolls (id, server_id, name, options, creator_id) VALUES (?, 10, ?, ?, 1)",
+                     [(2, 'Familia', 'a, b'), (4, 'familia', 'c, d'), (5, 'Cores', 'e'), (6, 'CORES', 'f')])
+    conn.commit()
+    migrate(conn)
+    assert conn.execute("SELECT id, name FROM powers ORDER BY id").fetchall() == [(1, 'Voo'), (2, 'VOO (2)'), (3, 'Gelo')]
+    assert conn.execute("SELECT id, name FROM rolls ORDER BY id").fetchall() == [
+        (2, 'Familia (2)'), (4, 'familia'), (5, 'Cores'), (6, 'CORES (6)')]
+    options = conn.execute('''SELECT o.option FROM roll_options o JOIN rolls r ON r.id = o.roll_id
+                              WHERE r.server_id = 10 AND r.name = 'familia' ORDER BY o.id''').fetchall()
+    assert options == [('c',), ('d',)]
@@ -0,0 +1,78 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+discord = pytest.importorskip('discord')
+from discord.ext import commands
+from discord.ext.commands.view import StringView
+
+from moderation import MentionedMember
+
+MEMBER_ID = 123456789012345678
+UNCACHED_ID = 223456789012345678
+
+
+class FakeGuild:
+    def __init__(self):
+        self.cached = {MEMBER_ID: SimpleNamespace(id=MEMBER_ID, name='raider')}
+        self.fetched = []
+
+    def get_member(self, member_id):
+        return self.cached.get(member_id)
+
+    async def fetch_member(self, member_id):
+        self.fetched.append(member_id)
+        if member_id != UNCACHED_ID:
+            raise discord.NotFound(SimpleNamespace(status=404, reason='Not Found'), 'Unknown Member')
+        return SimpleNamespace(id=member_id, name='outro')
+
+    def get_member_named(self, name):
+        raise AssertionError("nomes não devem ser procurados")
+
+    async def query_members(self, *args, **kwargs):
+        raise AssertionError("o gateway não deve ser consultado")
+
+
+def convert(guild, argument):
+    return asyncio.run(MentionedMember().convert(SimpleNamespace(guild=guild), argument))
+
+
+def test_mentions_and_ids_are_converted():
+    guild = FakeGuild()
+    assert convert(guild, f'<@{MEMBER_ID}>').id == MEMBER_ID
+    assert convert(guild, f'<@!{MEMBER_ID}>').id == MEMBER_ID
+    assert convert(guild, str(MEMBER_ID)).id == MEMBER_ID
+    assert guild.fetched == []
+    # Quem não está no cache é buscado pela API, só pelo id
+    assert convert(guild, str(UNCACHED_ID)).id == UNCACHED_ID
+    assert guild.fetched == [UNCACHED_ID]
+
+
+def test_names_and_unknown_ids_are_rejected():
+    guild = FakeGuild()
+    for argument in ('raider', 'spam', '@raider', '12345', f'<@{MEMBER_ID}>x'):
+        with pytest.raises(commands.BadArgument):
+            convert(guild, argument)
+    with pytest.raises(commands.MemberNotFound):
+        convert(guild, '323456789012345678')
+
+
+def test_greedy_stops_at_the_first_word_of_the_reason():
+    bot = commands.Bot(command_prefix='$', intents=discord.Intents.default())
+    calls = []
+
+    @bot.command()
+    async def ban(ctx, members: commands.Greedy[MentionedMember], *, reason=None):
+        calls.append(([member.id for member in members], reason))
+
+    guild = FakeGuild()
+    content = f'$ban <@{MEMBER_ID}> {UNCACHED_ID} spam links <@{MEMBER_ID}>'
+    message = SimpleNamespace(content=content, guild=guild, author=SimpleNamespace(id=1), channel=None,
+                              attachments=[], _state=bot._connection)
+    view = StringView(content)
+    view.skip_string('$')
+    view.get_word()
+    ctx = commands.Context(message=message, bot=bot, view=view, prefix='$', invoked_with='ban', command=ban)
+    asyncio.run(ban.invoke(ctx))
+    assert calls == [([MEMBER_ID, UNCACHED_ID], f'spam links <@{MEMBER_ID}>')]
@@ -0,0 +1,160 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip('discord')
+
+from pagination import KeysetPager, Paginator  # noqa: E402
+
+
+class FakeHTTP:
+    """Conta as chamadas REST que a paginação faria."""
+
+    def __init__(self):
+        self.calls = []
+
+
+class FakeResponse:
+    def __init__(self, http):
+        self.http = http
+
+    async def edit_message(self, **kwargs):
+        self.http.calls.append(('edit_message', kwargs))
+
+    async def send_message(self, *args, **kwargs):
+        self.http.calls.append(('send_message', kwargs))
+
+    async def send_modal(self, modal):
+        self.http.calls.append(('send_modal', modal))
+
+
+class FakeInteraction:
+    def __init__(self, http):
+        self.response = FakeResponse(http)
+
+
+class FakeContext:
+    def __init__(self, http):
+        self.http = http
+
+    async def send(self, **kwargs):
+        self.http.calls.append(('send', kwargs))
+
+
+def table(count):
+    """Fonte em memória com as mesmas consultas do repositório; conta as buscas."""
+    rows = [(row_id, f'linha {row_id}') for row_id in range(1, count + 1)]
+    fetches = []
+
+    async def fetch_after(after_id, limit):
+        fetches.append('after')
+        return [row for row in rows if after_id is None or row[0] > after_id][:limit]
+
+    async def fetch_before(before_id, limit):
+        fetches.append('before')
+        return [row for row in rows if before_id is None or row[0] < before_id][-limit:]
+
+    async def fetch_at(offset, limit):
+        fetches.append('at')
+        return rows[offset:offset + limit]
+
+    return KeysetPager(fetch_after, fetch_before, fetch_at, window=5), fetches
+
+
+def render(row):
+    return row[1]
+
+
+async def start(count):
+    http = FakeHTTP()
+    source, fetches = table(count)
+    paginator = Paginator(source, render)
+    assert await paginator.start(FakeContext(http))
+    http.calls.clear()
+    return paginator, http, fetches
+
+
+def shown(call):
+    return call[1]['embed']
+
+
+def test_each_click_is_one_edit():
+    async def main():
+        paginator, http, _ = await start(12)
+        clicks = [paginator.next_page] * 7 + [paginator.previous_page] * 3 + [paginator.last_page, paginator.first_page]
+        for button in clicks:
+            before = len(http.calls)
+            await button.callback(FakeInteraction(http))
+            assert [name for name, _ in http.calls[before:]] == ['edit_message']
+        return [shown(call) for call in http.calls]
+
+    pages = asyncio.run(main())
+    assert pages == [f'linha {n}' for n in (2, 3, 4, 5, 6, 7, 8, 7, 6, 5, 12, 1)]
+
+
+def test_wraps_around_at_both_ends():
+    async def main():
+        paginator, http, _ = await start(3)
+        for _ in range(3):
+            await paginator.next_page.callback(FakeInteraction(http))
+        await paginator.previous_page.callback(FakeInteraction(http))
+        return [shown(call) for call in http.calls]
+
+    assert asyncio.run(main()) == ['linha 2', 'linha 3', 'linha 1', 'linha 3']
+
+
+def test_jump_to_page():
+    async def main():
+        paginator, http, fetches = await start(100)
+        fetches.clear()
+        await paginator.navigate(FakeInteraction(http), paginator.source.jump, 42)
+        await paginator.navigate(FakeInteraction(http), paginator.source.jump, 1000)
+        return http.calls, fetches
+
+    calls, fetches = asyncio.run(main())
+    assert [name for name, _ in calls] == ['edit_message', 'edit_message']
+    assert [shown(call) for call in calls] == ['linha 42', 'linha 100']
+    # Além do fim: a busca pela posição volta vazia e a fonte vai para a última
+    assert fetches == ['at', 'at', 'before']
+
+
+def test_pages_within_the_window_do_not_query():
+    async def main():
+        paginator, http, fetches = await start(50)
+        fetches.clear()
+        for _ in range(20):
+            await paginator.next_page.callback(FakeInteraction(http))
+        return fetches
+
+    # Janela de 5 linhas: uma busca a cada 5 avanços
+    assert asyncio.run(main()) == ['after'] * 4
+
+
+def test_concurrent_viewers_each_get_one_edit():
+    async def main():
+        paginator, http, _ = await start(30)
+        await asyncio.gather(*(paginator.next_page.callback(FakeInteraction(http)) for _ in range(10)))
+        return http.calls
+
+    calls = asyncio.run(main())
+    assert [name for name, _ in calls] == ['edit_message'] * 10
+    # O lock serializa os cliques: cada um avança uma página
+    assert sorted(shown(call) for call in calls) == sorted(f'linha {n}' for n in range(2, 12))
+
+
+def test_empty_source_does_not_send():
+    async def main():
+        http = FakeHTTP()
+        source, _ = table(0)
+        return await Paginator(source, render).start(FakeContext(http)), http.calls
+
+    assert asyncio.run(main()) == (False, [])
+
+
+def test_jump_button_opens_modal_without_editing():
+    async def main():
+        paginator, http, _ = await start(5)
+        await paginator.jump_to_page.callback(FakeInteraction(http))
+        return http.calls
+
+    assert [name for name, _ in asyncio.run(main())] == ['send_modal']
@@ -0,0 +1,92 @@
+import datetime
+import random
+import threading
+
+from rng import RNGService
+
+
+def draws(generator, count=8):
+    return [generator.getrandbits(64) for _ in range(count)]
+
+
+def test_daily_is_stable_within_a_day():
+    service = RNGService()
+    day = datetime.date(2026, 10, 18)
+    assert draws(service.daily(42, day)) == draws(service.daily(42, day))
+    # Outra instância (ex.: depois de reiniciar o bot) dá a mesma sequência
+    assert draws(RNGService().daily(42, day)) == draws(service.daily(42, day))
+
+
+def test_daily_differs_across_dates_and_users():
+    service = RNGService()
+    day = datetime.date(2026, 10, 18)
+    sequences = {
+        tuple(draws(service.daily(user_id, date)))
+        for user_id in (42, 43, 44)
+        for date in (day, day + datetime.timedelta(days=1), day.replace(month=11))
+    }
+    assert len(sequences) == 9
+    # A semente antiga (id + dia do mês) fazia estes dois coincidirem
+    assert draws(service.daily(42, datetime.date(2026, 10, 2))) != draws(service.daily(43, datetime.date(2026, 10, 1)))
+
+
+def test_daily_uses_the_configured_timezone():
+    service = RNGService('Pacific/Kiritimati')
+    today = datetime.datetime.now(service.timezone).date()
+    assert draws(service.daily(42)) == draws(service.daily(42, today))
+
+
+def test_daily_leaves_other_generators_untouched():
+    service = RNGService()
+    global_state = random.getstate()
+    fast_state = service.fast.getstate()
+    for user_id in range(100):
+        service.daily(user_id).choice(range(6))
+    assert random.getstate() == global_state
+    assert service.fast.getstate() == fast_state
+
+
+def test_fast_and_spawn_leave_the_global_generator_untouched():
+    service = RNGService()
+    state = random.getstate()
+    service.fast.random()
+    service.spawn().choices(range(20), k=1000)
+    assert random.getstate() == state
+
+
+def test_global_reseed_does_not_make_fast_predictable():
+    service = RNGService()
+    random.seed(1)
+    first = draws(service.fast)
+    random.seed(1)
+    assert draws(service.fast) != first
+
+
+def test_seeded_service_is_reproducible():
+    assert draws(RNGService(seed=7).fast) == draws(RNGService(seed=7).fast)
+    assert draws(RNGService(seed=7).spawn()) == draws(RNGService(seed=7).spawn())
+
+
+def test_spawned_generators_are_independent():
+    service = RNGService(seed=1)
+    first, second = service.spawn(), service.spawn()
+    assert draws(first) != draws(second)
+
+
+def test_spawned_generators_in_threads_do_not_interfere():
+    # Cada thread com o seu gerador dá o mesmo resultado que rodando sozinha
+    expected = draws(RNGService(seed=3).spawn(), 1000)
+    service = RNGService(seed=3)
+    generators = [service.spawn() for _ in range(8)]
+    results = [None] * len(generators)
+
+    def work(index):
+        results[index] = draws(generators[index], 1000)
+
+    threads = [threading.Thread(target=work, args=(index,)) for index in range(len(generators))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results[0] == expected
+    assert len({tuple(result) for result in results}) == len(generators)
@@ -0,0 +1,146 @@
+import asyncio
+import datetime
+import random
+from zoneinfo import ZoneInfo
+
+from scheduler import Routine, Scheduler
+
+UTC = datetime.timezone.utc
+
+
+class FakeClock:
+    """Relógio que pula direto para o próximo disparo em vez de dormir.
+
+    Passado o `end`, a espera bloqueia até alguém acordar o agendador e o
+    relógio fica marcado como ocioso. `waits` conta quantas vezes o
+    agendador dormiu: sem polling, é uma vez por horário distinto.
+    """
+
+    def __init__(self, now, end):
+        self.current = now
+        self.end = end
+        self.waits = 0
+        self.idle = asyncio.Event()
+
+    def now(self):
+        return self.current
+
+    async def wait(self, event, timeout):
+        self.waits += 1
+        # Deixa rodar os disparos do horário atual antes de avançar o relógio
+        await asyncio.sleep(0)
+        if event.is_set():
+            return
+        if timeout is None or self.current + datetime.timedelta(seconds=timeout) >= self.end:
+            self.idle.set()
+            await event.wait()
+            return
+        self.current += datetime.timedelta(seconds=timeout)
+
+
+def routine(key, time, timezone='UTC', created_at=None, last_run=None):
+    return Routine(key=key, guild_id=1, channel_id=10, time=time, timezone=timezone, message=f'rotina {key}',
+                   created_at=created_at or datetime.datetime(2020, 1, 1, tzinfo=UTC), last_run=last_run)
+
+
+async def run(routines, start, end):
+    """Agenda as rotinas e roda o agendador de start até end; retorna {chave: [(due, agora)]}."""
+    clock = FakeClock(start, end)
+    fired = {}
+
+    async def fire(routine):
+        fired.setdefault(routine.key, []).append((routine.last_run, clock.now()))
+
+    scheduler = Scheduler(fire, clock)
+    for item in routines:
+        scheduler.add(item)
+    scheduler.start()
+    await clock.idle.wait()
+    await scheduler.stop(timeout=None)
+    return fired, clock
+
+
+def local_fires(fired, timezone):
+    return [now.astimezone(ZoneInfo(timezone)) for _, now in fired]
+
+
+def test_thousands_of_routines_fire_once_per_day_at_their_time():
+    rng = random.Random(0)
+    timezones = ['UTC', 'America/Sao_Paulo', 'Asia/Tokyo', 'Asia/Kolkata']
+    start = datetime.datetime(2026, 6, 1, 0, 0, 30, tzinfo=UTC)
+    routines = []
+    for key in range(3000):
+        time = datetime.time(rng.randrange(24), rng.randrange(60), rng.randrange(60))
+        timezone = rng.choice(timezones)
+        # Já rodou no último horário antes do início: nada atrasado para recuperar
+        previous, _ = routine(key, time, timezone).due_times(start)
+        routines.append(routine(key, time, timezone, last_run=previous))
+
+    fired, clock = asyncio.run(run(routines, start, start + datetime.timedelta(days=2)))
+
+    for item in routines:
+        fires = fired[item.key]
+        assert len(fires) == 2
+        for due, now in fires:
+            assert due == now
+            local = now.astimezone(ZoneInfo(item.timezone))
+            assert local.time() == item.time
+        assert fires[1][1] - fires[0][1] == datetime.timedelta(days=1)
+    # Uma espera por horário distinto (e a última, já ociosa): nenhuma espera a mais
+    distinct = {now for fires in fired.values() for _, now in fires}
+    assert clock.waits <= len(distinct) + 1
+
+
+def test_missed_run_fires_once_after_restart():
+    start = datetime.datetime(2026, 6, 10, 12, 0, tzinfo=UTC)
+    # O bot ficou três dias desligado: a rotina das 08:00 perdeu três disparos
+    last_run = datetime.datetime(2026, 6, 7, 8, 0, tzinfo=UTC)
+    item = routine('atrasada', datetime.time(8, 0), last_run=last_run)
+
+    fired, _ = asyncio.run(run([item], start, start + datetime.timedelta(hours=12)))
+
+    assert fired['atrasada'] == [(datetime.datetime(2026, 6, 10, 8, 0, tzinfo=UTC), start)]
+
+
+def test_new_routine_does_not_fire_for_times_before_it_existed():
+    start = datetime.datetime(2026, 6, 10, 12, 0, tzinfo=UTC)
+    item = routine('nova', datetime.time(8, 0), created_at=start - datetime.timedelta(minutes=5))
+
+    fired, _ = asyncio.run(run([item], start, start + datetime.timedelta(hours=12)))
+
+    assert fired == {}
+
+
+def test_spring_forward():
+    # 08 de março de 2026: em Nova York 02:00 EST vira 03:00 EDT
+    timezone = 'America/New_York'
+    start = datetime.datetime(2026, 3, 7, 0, 0, tzinfo=UTC)
+    morning = routine('manha', datetime.time(8, 0), timezone, created_at=start)
+    # 02:30 não existe no dia da mudança; dispara uma vez, uma hora "depois"
+    missing = routine('lacuna', datetime.time(2, 30), timezone, created_at=start)
+
+    fired, _ = asyncio.run(run([morning, missing], start, start + datetime.timedelta(days=3)))
+
+    assert [now for _, now in fired['manha']] == [
+        datetime.datetime(2026, 3, 7, 13, 0, tzinfo=UTC),
+        datetime.datetime(2026, 3, 8, 12, 0, tzinfo=UTC),
+        datetime.datetime(2026, 3, 9, 12, 0, tzinfo=UTC),
+    ]
+    assert [local.date().day for local in local_fires(fired['lacuna'], timezone)] == [7, 8, 9]
+    assert [local.time() for local in local_fires(fired['lacuna'], timezone)] == [
+        datetime.time(2, 30), datetime.time(3, 30), datetime.time(2, 30)]
+
+
+def test_fall_back_fires_once():
+    # 01 de novembro de 2026: em Nova York 01:00–02:00 acontece duas vezes
+    timezone = 'America/New_York'
+    start = datetime.datetime(2026, 10, 31, 0, 0, tzinfo=UTC)
+    repeated = routine('repetida', datetime.time(1, 30), timezone, created_at=start)
+
+    fired, _ = asyncio.run(run([repeated], start, start + datetime.timedelta(days=3)))
+
+    assert [now for _, now in fired['repetida']] == [
+        datetime.datetime(2026, 10, 31, 5, 30, tzinfo=UTC),
+        datetime.datetime(2026, 11, 1, 5, 30, tzinfo=UTC),
+        datetime.datetime(2026, 11, 2, 6, 30, tzinfo=UTC),
+    ]
@@ -0,0 +1,40 @@
+import sqlite3
+
+from migrations import migrate
+from repositories import _full_text_search
+
+
+def search(conn, guild_id, text):
+    return [row[0] for row in _full_text_search(conn, 'powers', 't.name', '10.0, 1.0, 2.0, 2.0', guild_id, text, 10)]
+
+
+def populated():
+    conn = sqlite3.connect(':memory:')
+    migrate(conn)
+    conn.executemany(
+        "INSERT INTO powers (guild_id, name, description, advantage, disadvantage, creator_id) VALUES (?, ?, ?, '', '', 1)",
+        [(1, 'Bola de fogo', 'Lança uma bola de fogo'), (2, 'Fogo eterno', 'Chamas que não apagam'),
+         (1, 'Nevasca', 'Congela a obsidiana'), (12, 'Fogo fátuo', 'Uma luz que engana')])
+    conn.commit()
+    return conn
+
+
+def test_search_only_ranks_the_guild_rows():
+    conn = populated()
+    assert search(conn, 1, 'fogo') == ['Bola de fogo']
+    assert search(conn, 2, 'fogo') == ['Fogo eterno']
+    assert search(conn, 12, 'fogo') == ['Fogo fátuo']
+    assert search(conn, 3, 'fogo') == []
+    # Erros de digitação sugerem termos do texto, nunca os dos servidores
+    assert search(conn, 1, 'obsidiama') == ['Nevasca']
+    assert search(conn, 1, 'g12') == []
+
+
+def test_index_follows_edits_and_deletes():
+    conn = populated()
+    conn.execute("UPDATE powers SET guild_id = 3 WHERE name = 'Fogo eterno'")
+    conn.execute("UPDATE powers SET description = 'Apaga o fogo' WHERE name = 'Nevasca'")
+    conn.execute("DELETE FROM powers WHERE name = 'Bola de fogo'")
+    assert search(conn, 1, 'fogo') == ['Nevasca']
+    assert search(conn, 2, 'fogo') == []
+    assert search(conn, 3, 'fogo') == ['Fogo eterno']